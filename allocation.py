@@ -0,0 +1,288 @@
+import heapq
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional
+from matching import ItemSignature, item_similarity, URGENCY_WEIGHTS
+
+# One unit of work for the UI/models: move `quantity` of offering_item to request_item
+Allocation = namedtuple("Allocation", ["request", "request_item", "offering", "offering_item", "quantity", "score"])
+
+# Integer cost scale for the flow solver (costs must be integers for exact arithmetic)
+COST_SCALE = 1000
+
+
+class MinCostFlow:
+    """Successive shortest paths with Johnson potentials (Dijkstra on reduced costs)"""
+
+    def __init__(self, n: int):
+        self.n = n
+        # Each edge is [to, capacity, cost, index of reverse edge]
+        self.graph = [[] for _ in range(n)]
+
+    def add_edge(self, u: int, v: int, capacity: int, cost: int) -> int:
+        """Add an edge u -> v; returns its index in graph[u] (see flow_on)"""
+        self.graph[u].append([v, capacity, cost, len(self.graph[v])])
+        self.graph[v].append([u, 0, -cost, len(self.graph[u]) - 1])
+        return len(self.graph[u]) - 1
+
+    def flow_on(self, u: int, index: int) -> int:
+        """Units pushed along edge `index` of node u (the capacity of its reverse edge)"""
+        v, _, _, reverse = self.graph[u][index]
+        return self.graph[v][reverse][1]
+
+    def _initial_potentials(self, source: int) -> List[float]:
+        # Bellman-Ford (queue based); the initial graph has negative costs but no cycles
+        potential = [float("inf")] * self.n
+        potential[source] = 0
+        queue = [source]
+        in_queue = [False] * self.n
+        in_queue[source] = True
+        while queue:
+            u = queue.pop()
+            in_queue[u] = False
+            for v, capacity, cost, _ in self.graph[u]:
+                if capacity > 0 and potential[u] + cost < potential[v]:
+                    potential[v] = potential[u] + cost
+                    if not in_queue[v]:
+                        in_queue[v] = True
+                        queue.append(v)
+        return [p if p != float("inf") else 0 for p in potential]
+
+    def solve(self, source: int, sink: int, profitable_only: bool = True):
+        """
+        Push flow from source to sink along cheapest paths.
+
+        With profitable_only=True the solver stops once the cheapest path
+        costs >= 0, i.e. it maximizes total negative cost (benefit) rather
+        than total flow. Returns (flow, cost).
+        """
+        potential = self._initial_potentials(source)
+        total_flow = total_cost = 0
+        while True:
+            dist = [float("inf")] * self.n
+            prev = [None] * self.n
+            dist[source] = 0
+            heap = [(0, source)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                for i, (v, capacity, cost, _) in enumerate(self.graph[u]):
+                    if capacity <= 0:
+                        continue
+                    nd = d + cost + potential[u] - potential[v]
+                    if nd < dist[v]:
+                        dist[v] = nd
+                        prev[v] = (u, i)
+                        heapq.heappush(heap, (nd, v))
+            if dist[sink] == float("inf"):
+                break
+            path_cost = dist[sink] + potential[sink] - potential[source]
+            if profitable_only and path_cost >= 0:
+                break
+            for v in range(self.n):
+                if dist[v] != float("inf"):
+                    potential[v] += dist[v]
+
+            # Bottleneck capacity along the path
+            push = float("inf")
+            v = sink
+            while v != source:
+                u, i = prev[v]
+                push = min(push, self.graph[u][i][1])
+                v = u
+            v = sink
+            while v != source:
+                u, i = prev[v]
+                edge = self.graph[u][i]
+                edge[1] -= push
+                self.graph[v][edge[3]][1] += push
+                v = u
+            total_flow += push
+            total_cost += push * path_cost
+        return total_flow, total_cost
+
+
+class AllocationEngine:
+    """
+    Split offering quantities across requests to maximize urgency-weighted coverage.
+
+    Line items with the same normalized name are interchangeable, so they are
+    pooled into supply classes (offering side) and demand classes (request
+    side, also keyed by urgency). Items with the same head noun always match
+    at similarity 1.0, so classes are further pooled by head: one edge joins
+    the supply pool of a head to its demand pool for each urgency, instead of
+    one edge per pair of classes. Only classes with different heads get
+    direct edges, scored on their exact tokens. A min-cost flow over this
+    small graph decides how many units move; the flow is then handed out to
+    individual line items, oldest requests and oldest offerings first. Each
+    unit moved is worth urgency weight x item similarity, and pairs below
+    min_similarity are never connected.
+    """
+
+    def __init__(self, min_similarity: float = 0.5):
+        self.min_similarity = min_similarity
+
+    @staticmethod
+    def _class_key(sig: ItemSignature):
+        return (tuple(sorted(sig.tokens)), sig.head, sig.category)
+
+    def allocate(self, requests, offerings, now: Optional[datetime] = None) -> List[Allocation]:
+        now = now or datetime.now()
+        # Supply classes: key -> {'sig', 'lines': [(created_at, offering, item)], 'total'}
+        supply: Dict[tuple, dict] = {}
+        for offering in offerings:
+            for item in offering.items:
+                if item.remaining <= 0:
+                    continue
+                sig = ItemSignature(item)
+                entry = supply.setdefault(self._class_key(sig), {'sig': sig, 'lines': [], 'total': 0})
+                entry['lines'].append((offering.created_at, offering, item))
+                entry['total'] += item.remaining
+
+        demand: Dict[tuple, dict] = {}
+        for request in requests:
+            weight = URGENCY_WEIGHTS.get(request.urgency, 0.5)
+            for item in request.items:
+                if item.remaining <= 0:
+                    continue
+                sig = ItemSignature(item)
+                entry = demand.setdefault(self._class_key(sig) + (weight,), {'sig': sig, 'weight': weight, 'lines': [], 'total': 0})
+                entry['lines'].append((request.created_at, request, item))
+                entry['total'] += item.remaining
+
+        if not supply or not demand:
+            return []
+
+        # Items without a single word never match anything
+        supply_keys = [key for key in supply if supply[key]['sig'].head]
+        demand_keys = [key for key in demand if demand[key]['sig'].head]
+        supply_pools = sorted({supply[key]['sig'].head for key in supply_keys})
+        demand_pools = sorted({(demand[key]['sig'].head, demand[key]['weight']) for key in demand_keys})
+        # Nodes: 0 source, 1 sink, then supply pools, supply classes, demand classes, demand pools
+        node: Dict[tuple, int] = {}
+        for name in ([('supply pool', head) for head in supply_pools] + [('supply', key) for key in supply_keys] +
+                     [('demand', key) for key in demand_keys] + [('demand pool', pool) for pool in demand_pools]):
+            node[name] = 2 + len(node)
+        source, sink = 0, 1
+        flow = MinCostFlow(2 + len(node))
+
+        # Each class caps its own units on the edge from (or to) its pool
+        pool_totals: Dict[tuple, int] = {}
+        for key in supply_keys:
+            s = supply[key]
+            pool = node['supply pool', s['sig'].head]
+            s['pool_edge'] = (pool, flow.add_edge(pool, node['supply', key], s['total'], 0))
+            pool_totals[pool] = pool_totals.get(pool, 0) + s['total']
+        for key in demand_keys:
+            d = demand[key]
+            pool = node['demand pool', (d['sig'].head, d['weight'])]
+            d['pool_edge'] = (node['demand', key], flow.add_edge(node['demand', key], pool, d['total'], 0))
+            pool_totals[pool] = pool_totals.get(pool, 0) + d['total']
+        for head in supply_pools:
+            flow.add_edge(source, node['supply pool', head], pool_totals[node['supply pool', head]], 0)
+        pool_edges = []
+        for head, weight in demand_pools:
+            pool = node['demand pool', (head, weight)]
+            flow.add_edge(pool, sink, pool_totals[pool], 0)
+            if ('supply pool', head) in node:
+                supply_pool = node['supply pool', head]
+                benefit = int(round(COST_SCALE * weight))
+                edge_index = flow.add_edge(supply_pool, pool, min(pool_totals[supply_pool], pool_totals[pool]), -benefit)
+                pool_edges.append((head, weight, supply_pool, edge_index, benefit))
+
+        # Token index over supply classes so each demand class only looks at related supply
+        by_token: Dict[str, List[tuple]] = {}
+        for key in supply_keys:
+            for token in supply[key]['sig'].tokens:
+                by_token.setdefault(token, []).append(key)
+        pair_edges = []
+        # Similarity per pair of item classes (demand classes differ only by urgency)
+        similarity: Dict[tuple, float] = {}
+        for key in demand_keys:
+            d = demand[key]
+            related = set()
+            for token in d['sig'].tokens:
+                related.update(by_token.get(token, ()))
+            for supply_key in related:
+                s = supply[supply_key]
+                if s['sig'].head == d['sig'].head:
+                    continue
+                sim = similarity.get((supply_key, key[:-1]))
+                if sim is None:
+                    sim = similarity[supply_key, key[:-1]] = item_similarity(d['sig'], s['sig'])
+                if sim < self.min_similarity:
+                    continue
+                benefit = int(round(COST_SCALE * d['weight'] * sim))
+                edge_index = flow.add_edge(node['supply', supply_key], node['demand', key], d['total'], -benefit)
+                pair_edges.append((supply_key, key, edge_index, benefit))
+
+        flow.solve(source, sink)
+
+        # Units moved between pairs of classes: direct edges first, then each
+        # pool edge split over the units its classes have left (any split of a
+        # pool is worth the same; classes with the oldest lines go first)
+        moves = []
+        for supply_key, demand_key, edge_index, benefit in pair_edges:
+            moved = flow.flow_on(node['supply', supply_key], edge_index)
+            if moved > 0:
+                moves.append((supply_key, demand_key, moved, benefit))
+        supply_left: Dict[str, List[list]] = {}
+        for key in sorted(supply_keys, key=lambda key: min(line[0] for line in supply[key]['lines'])):
+            s = supply[key]
+            spare = s['total'] - flow.flow_on(*s['pool_edge'])
+            supply_left.setdefault(s['sig'].head, []).append([key, spare])
+        demand_left: Dict[tuple, List[list]] = {}
+        for key in sorted(demand_keys, key=lambda key: min(line[0] for line in demand[key]['lines'])):
+            d = demand[key]
+            spare = d['total'] - flow.flow_on(*d['pool_edge'])
+            demand_left.setdefault((d['sig'].head, d['weight']), []).append([key, spare])
+        for head, weight, supply_pool, edge_index, benefit in sorted(pool_edges, key=lambda e: -e[4]):
+            moved = flow.flow_on(supply_pool, edge_index)
+            sources, targets = supply_left[head], demand_left[head, weight]
+            while moved > 0:
+                while sources[0][1] == 0:
+                    sources.pop(0)
+                while targets[0][1] == 0:
+                    targets.pop(0)
+                quantity = min(moved, sources[0][1], targets[0][1])
+                moves.append((sources[0][0], targets[0][0], quantity, benefit))
+                sources[0][1] -= quantity
+                targets[0][1] -= quantity
+                moved -= quantity
+
+        # Hand class-level flow out to individual line items
+        for entry in supply.values():
+            entry['lines'].sort(key=lambda line: line[0])
+            entry['cursor'] = 0
+        for entry in demand.values():
+            entry['lines'].sort(key=lambda line: line[0])
+            entry['cursor'] = 0
+        left = {}
+
+        allocations = []
+        for supply_key, demand_key, moved, benefit in sorted(moves, key=lambda move: -move[3]):
+            s = supply[supply_key]
+            d = demand[demand_key]
+            while moved > 0:
+                _, offering, off_item = s['lines'][s['cursor']]
+                _, request, req_item = d['lines'][d['cursor']]
+                off_left = left.get(id(off_item), off_item.remaining)
+                req_left = left.get(id(req_item), req_item.remaining)
+                quantity = min(moved, off_left, req_left)
+                allocations.append(Allocation(request, req_item, offering, off_item, quantity, benefit / COST_SCALE))
+                left[id(off_item)] = off_left - quantity
+                left[id(req_item)] = req_left - quantity
+                moved -= quantity
+                if left[id(off_item)] == 0:
+                    s['cursor'] += 1
+                if left[id(req_item)] == 0:
+                    d['cursor'] += 1
+        return allocations
+
+
+def apply_allocations(allocations: List[Allocation]):
+    """Record allocations on the requests and offerings (partial fulfillment and leftovers)"""
+    for allocation in allocations:
+        allocation.offering.record_allocation(allocation.offering_item, allocation.quantity)
+        allocation.request.record_allocation(allocation.request_item, allocation.quantity, allocation.offering.donor)
@@ -0,0 +1,114 @@
+import asyncio
+import random
+import time
+from typing import List, Optional
+from llm_backends import LLMBackend, get_default_backend
+from models import TextParser
+
+
+class AsyncTextParser:
+    """
+    Asyncio front-end to TextParser for bulk ingestion.
+
+    Calls go through the same rule tier and cache as TextParser; only the
+    Gemini round trips run concurrently, bounded by a semaphore and an
+    optional request rate. Each call gets a timeout and is retried with
+    full-jitter exponential backoff before falling back like the sync path.
+    Batch helpers return results in input order.
+    """
+
+    def __init__(self, concurrency: int = 8, timeout: float = 30.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, max_rate: Optional[float] = None,
+                 backend: Optional[LLMBackend] = None):
+        self.backend = backend or get_default_backend()
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Maximum model calls per second across all workers (None = unlimited)
+        self.max_rate = max_rate
+        self._semaphores = {}
+        self._next_slot = 0.0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop, so keep one per loop
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphores = {loop: semaphore}
+        return semaphore
+
+    async def _throttle(self):
+        if not self.max_rate:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1.0 / self.max_rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _generate(self, prompt: str) -> str:
+        """Call the model with timeout and jittered retries; raises after the last attempt"""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore():
+                    await self._throttle()
+                    return await asyncio.wait_for(self.backend.generate_async(prompt, task="parse"), self.timeout)
+            except Exception as e:
+                last_error = e
+                if attempt == self.max_retries:
+                    break
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                await asyncio.sleep(random.uniform(0, delay))
+        raise last_error
+
+    async def parse_request(self, text: str, use_cache: bool = True, use_rules: bool = True):
+        """Async TextParser.parse_request: returns (items, urgency)"""
+        result = TextParser._fast_path(text, self.backend, use_cache=use_cache, use_rules=use_rules)
+        if result is not None:
+            return result
+
+        try:
+            response_text = await self._generate(TextParser._build_parse_prompt(text))
+            return TextParser._parse_response(text, response_text, self.backend)
+        except Exception as e:
+            print(f"Error parsing text: {e}")
+            return TextParser._fallback(text)
+
+    async def parse_text_to_items(self, text: str, use_cache: bool = True):
+        items, _ = await self.parse_request(text, use_cache=use_cache)
+        return items
+
+    async def analyze_urgency(self, text: str, use_cache: bool = True) -> str:
+        _, urgency = await self.parse_request(text, use_cache=use_cache)
+        return urgency
+
+    async def parse_many(self, texts: List[str], use_cache: bool = True) -> list:
+        """Parse many texts concurrently; results line up with the input order"""
+        return await asyncio.gather(*(self.parse_request(text, use_cache=use_cache) for text in texts))
+
+    async def analyze_urgency_many(self, texts: List[str], use_cache: bool = True) -> List[str]:
+        results = await self.parse_many(texts, use_cache=use_cache)
+        return [urgency for _, urgency in results]
+
+    def run_many(self, texts: List[str], use_cache: bool = True) -> list:
+        """Blocking helper for scripts: parse_many in a fresh event loop"""
+        return asyncio.run(self.parse_many(texts, use_cache=use_cache))
+
+
+# Example usage
+if __name__ == "__main__":
+    import sys
+
+    # One request per line on stdin; set LLM_BACKEND=stub to benchmark offline
+    texts = [line.strip() for line in sys.stdin if line.strip()]
+    parser = AsyncTextParser()
+    start = time.perf_counter()
+    results = parser.run_many(texts)
+    elapsed = time.perf_counter() - start
+    for text, (items, urgency) in zip(texts, results):
+        print(f"[{urgency}] ({items.tier}) {text[:60]} -> {', '.join(str(item) for item in items)}")
+    print(f"Parsed {len(texts)} texts in {elapsed:.2f}s; tiers: {TextParser.tier_counts}")
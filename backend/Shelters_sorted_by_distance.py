@@ -1,42 +1,26 @@
-from bs4 import BeautifulSoup
-import re
-
-# Load your HTML file
-with open("/Users/naren/Documents/Python/DubHacks/foodbanks_map.html", "r", encoding="utf-8") as f:
-    html_content = f.read()
-
-soup = BeautifulSoup(html_content, "html.parser")
-
-# Find all popup HTML content in the script tags
-popups = soup.find_all("script")
-
-# Regex pattern to extract shelter info from popup HTML
-pattern = re.compile(
-    r"<b>(.*?)</b>.*?<i>(.*?)</i>.*?Distance:</b>\s*([\d\.]+)?\s*km",
-    re.DOTALL
-)
-
-shelters = []
-
-for script in popups:
-    matches = pattern.findall(str(script))
-    for match in matches:
-        name = match[0].strip()
-        address = match[1].strip()
-        distance_str = match[2].strip()
-        distance_km = float(distance_str) if distance_str else None
-        shelters.append({
-            "name": name,
-            "address": address,
-            "distance_km": distance_km
-        })
-
-# Filter out shelters without distance (optional)
-shelters_with_distance = [s for s in shelters if s["distance_km"] is not None]
-
-# Sort by distance
-shelters_sorted = sorted(shelters_with_distance, key=lambda x: x["distance_km"])
-
-# Display sorted shelters
-for s in shelters_sorted:
-    print(f"{s['name']} - {s['address']} - {s['distance_km']} km")
+import sys
+try:
+    from backend.org_dataset import load_dataset
+    from backend.spatial_index import SpatialIndex
+except ImportError:  # run as a script from backend/
+    from org_dataset import load_dataset
+    from spatial_index import SpatialIndex
+
+# Organizations with coordinates and travel distance, as written by map.py
+shelters = load_dataset()
+
+if len(sys.argv) >= 3:
+    # Usage: python backend/Shelters_sorted_by_distance.py lat lon [k [category]]
+    # Nearest organizations to any location (straight-line distance)
+    k = int(sys.argv[3]) if len(sys.argv) >= 4 else 10
+    category = sys.argv[4] if len(sys.argv) >= 5 else None
+    index = SpatialIndex()
+    for row in shelters.itertuples(index=False):
+        index.add(row.name, row.lat, row.lon, row.category if isinstance(row.category, str) else (),
+                  {'name': row.name, 'address': row.address})
+    for _, distance_km, s in index.nearest(float(sys.argv[1]), float(sys.argv[2]), k=k, category=category):
+        print(f"{s['name']} - {s['address']} - {round(distance_km, 2)} km")
+else:
+    # Sorted by travel distance from map.py's user_location
+    for row in shelters.sort_values("distance_km").itertuples(index=False):
+        print(f"{row.name} - {row.address} - {row.distance_km} km")
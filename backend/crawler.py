@@ -0,0 +1,250 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = os.environ.get("WA211_BASE_URL", "https://search.wa211.org")
+LOCATION = "King County, Washington, United States"
+COORDS = "-122.297622,47.59526"
+
+# (taxonomy code, label, Categories value for the organizations found)
+QUERIES = [
+    ("BH-1800.8500-150", "Overnight Shelters", "Shelter"),
+    ("BD-1800.2000", "Food Pantries", "Food"),
+    ("BD-5000.8300", "Soup Kitchens", "Food"),
+]
+
+# Seconds between requests to the same host
+MIN_INTERVAL = 1.0
+MAX_PAGES = 50
+
+_TITLE_CLASS = "font-semibold leading-none tracking-tight flex flex-row justify-between gap-2"
+_DESCRIPTION_CLASS = "whitespace-break-spaces print:hidden"
+_DETAIL_CLASS = "flex flex-col items-start justify-start gap-2"
+
+
+class HostRateLimiter:
+    """Spaces requests to each host at least min_interval apart, across threads"""
+
+    def __init__(self, min_interval: float = MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._next: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, 0.0))
+            self._next[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def search_url(base_url: str, code: str, label: str, page: int = 1) -> str:
+    params = {'query': code, 'query_label': label, 'query_type': "taxonomy", 'location': LOCATION, 'coords': COORDS}
+    if page > 1:
+        params['page'] = page
+    return f"{base_url.rstrip('/')}/en/search?{urlencode(params)}"
+
+
+def parse_page(html: str, page_url: str, category: str) -> Tuple[List[dict], Optional[str]]:
+    """(organizations as user rows, next page URL or None) from one search results page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    titles = [title.text.strip() for title in soup.find_all(class_=_TITLE_CLASS)]
+    descriptions = [description.text.strip() for description in soup.find_all(class_=_DESCRIPTION_CLASS)]
+    details = [detail.contents for detail in soup.find_all(class_=_DETAIL_CLASS)]
+    organizations = []
+    for i, name in enumerate(titles):
+        children = details[i] if i < len(details) else []
+        text = [child.text.strip() for child in children[:3]] + ["", "", ""]
+        organizations.append({
+            "Name": name,
+            "Password": "",
+            "Description": descriptions[i] if i < len(descriptions) else "",
+            "Address": text[1],
+            "Link": text[0],
+            "Phone Number": text[2],
+            "Categories": category,
+            "User Type": "Organization",
+        })
+    next_link = soup.find("a", rel="next") or soup.find("a", attrs={"aria-label": "Next page"})
+    next_url = urljoin(page_url, next_link["href"]) if next_link is not None and next_link.get("href") else None
+    return organizations, next_url
+
+
+class Crawler:
+    """
+    Crawls wa211 search results for several taxonomy queries at once.
+
+    Each query's pages are followed in its own worker through one pooled
+    session (with retries on 429/5xx), and requests to a host are rate
+    limited across all workers. Pages are fetched conditionally
+    (If-None-Match / If-Modified-Since) and skipped when the server says
+    304 or the body hashes the same as last time, so a re-crawl only parses
+    and upserts pages that changed. Page validators live in state_path and
+    are saved after the page's organizations are in the store.
+    """
+
+    def __init__(self, base_url: str = BASE_URL, queries=QUERIES, max_workers: int = 4,
+                 min_interval: float = MIN_INTERVAL, state_path: str = "crawl_state.sqlite3",
+                 max_pages: int = MAX_PAGES, session: Optional[requests.Session] = None):
+        self.base_url = base_url
+        self.queries = queries
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.limiter = HostRateLimiter(min_interval)
+        self.session = session or self._session(max_workers)
+        self.state_path = state_path
+        self.stats = {'fetched': 0, 'not_modified': 0, 'unchanged': 0, 'parsed': 0}
+        self._lock = threading.Lock()
+        self._upsert_lock = threading.Lock()
+        self._conn = None
+
+    @staticmethod
+    def _session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = "dubhacks-donation-crawler"
+        return session
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.state_path, check_same_thread=False)
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    next_url TEXT,
+                    fetched_at REAL
+                )"""
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _state(self, url: str) -> Optional[tuple]:
+        with self._lock:
+            return self._connect().execute(
+                "SELECT etag, last_modified, content_hash, next_url FROM pages WHERE url = ?", (url,)).fetchone()
+
+    def _save_state(self, url: str, etag, last_modified, content_hash: str, next_url: Optional[str]):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                             (url, etag, last_modified, content_hash, next_url, time.time()))
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def fetch_page(self, url: str, category: str) -> Tuple[Optional[List[dict]], Optional[str], tuple]:
+        """
+        (organizations, next URL, page state) for one page; organizations is
+        None if the page has not changed. The state is not saved here: pass it
+        to _save_state once the organizations are stored.
+        """
+        state = self._state(url)
+        headers = {}
+        if state is not None:
+            if state[0]:
+                headers["If-None-Match"] = state[0]
+            if state[1]:
+                headers["If-Modified-Since"] = state[1]
+        self.limiter.wait(url)
+        response = self.session.get(url, headers=headers, timeout=30)
+        self._count('fetched')
+        if response.status_code == 304 and state is not None:
+            self._count('not_modified')
+            return None, state[3], ()
+        response.raise_for_status()
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if state is not None and state[2] == content_hash:
+            self._count('unchanged')
+            return None, state[3], (url, etag, last_modified, content_hash, state[3])
+        organizations, next_url = parse_page(response.text, url, category)
+        self._count('parsed')
+        return organizations, next_url, (url, etag, last_modified, content_hash, next_url)
+
+    def crawl_query(self, store, code: str, label: str, category: str) -> Dict[str, int]:
+        """
+        Upsert the organizations from every changed page of one query, following
+        next links. A page's ETag and hash are saved only after its organizations
+        are committed, so a failed upsert is retried on the next crawl.
+        """
+        counts = {'added': 0, 'updated': 0}
+        url, seen = search_url(self.base_url, code, label), set()
+        while url and url not in seen and len(seen) < self.max_pages:
+            seen.add(url)
+            try:
+                organizations, next_url, page_state = self.fetch_page(url, category)
+            except requests.RequestException as e:
+                print(f"Crawling {label} stopped at {url}: {e}")
+                break
+            if organizations:
+                # One writer at a time, so categories merged from two queries are not lost
+                with self._upsert_lock:
+                    page_counts = upsert_organizations(store, organizations)
+                for key in counts:
+                    counts[key] += page_counts[key]
+            if page_state:
+                self._save_state(*page_state)
+            url = next_url
+        return counts
+
+    def crawl(self, store) -> Dict[str, int]:
+        """Crawl all queries at once, upserting changed pages into store; returns added/updated counts"""
+        counts = {'added': 0, 'updated': 0}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for query_counts in pool.map(lambda query: self.crawl_query(store, *query), self.queries):
+                for key in counts:
+                    counts[key] += query_counts[key]
+        return counts
+
+
+def merge_categories(*values) -> str:
+    """"Food" + "Food, Shelter" -> "Food, Shelter" (first spelling of each kept, in order)"""
+    merged = {}
+    for value in values:
+        for category in str(value or "").split(","):
+            category = category.strip()
+            if category and category.lower() not in merged:
+                merged[category.lower()] = category
+    return ", ".join(merged.values())
+
+
+def upsert_organizations(store, organizations: List[dict]) -> Dict[str, int]:
+    """
+    Add new organizations and refresh the scraped fields of known ones;
+    passwords and user types are kept and categories only ever grow.
+    """
+    counts = {'added': 0, 'updated': 0}
+    for organization in organizations:
+        if store.add_user(organization):
+            counts['added'] += 1
+            continue
+        existing = store.get_user(organization["Name"]) or {}
+        changes = {column: organization[column] for column in ("Description", "Address", "Link", "Phone Number")
+                   if organization[column] and organization[column] != existing.get(column)}
+        categories = merge_categories(existing.get("Categories"), organization["Categories"])
+        if categories != (existing.get("Categories") or ""):
+            changes["Categories"] = categories
+        if changes and store.update_user(organization["Name"], changes):
+            counts['updated'] += 1
+    return counts
@@ -0,0 +1,150 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# Nominatim's usage policy allows one request per second
+MIN_INTERVAL = 1.0
+# Addresses that did not resolve are retried after this long
+NEGATIVE_TTL = 30 * 86400
+
+_SPACE_RE = re.compile(r"\s+")
+_COMMA_RE = re.compile(r"\s*,\s*")
+
+
+def normalize_address(address: str) -> str:
+    """Cache key: lowercase, single spaces, consistent commas, no trailing punctuation"""
+    text = _SPACE_RE.sub(" ", str(address or "").strip().lower())
+    return _COMMA_RE.sub(", ", text).strip(" ,.;")
+
+
+class GeocodeCache:
+    """
+    Persistent address -> (lat, lon) cache in front of Nominatim.
+
+    Lookups are keyed by the normalized address, so only the first build
+    for an address calls the geocoder. Addresses that do not resolve are
+    cached too (for NEGATIVE_TTL), while network errors are not cached. One
+    geocoder client is reused for every call, and calls are spaced at least
+    MIN_INTERVAL apart instead of sleeping after each one.
+    """
+
+    def __init__(self, path: str = "geocode_cache.sqlite3", min_interval: float = MIN_INTERVAL,
+                 negative_ttl: float = NEGATIVE_TTL, user_agent: str = "dubhacks-donation-map"):
+        self.path = path
+        self.min_interval = min_interval
+        self.negative_ttl = negative_ttl
+        self.user_agent = user_agent
+        # Geocoder calls made by this instance (cache misses)
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._geocoder = None
+        self._last_call = 0.0
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS geocodes (
+                    address_key TEXT PRIMARY KEY,
+                    address TEXT,
+                    lat REAL,
+                    lon REAL,
+                    resolved_at REAL
+                )"""
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _client(self):
+        if self._geocoder is None:
+            import certifi
+            import ssl
+            from geopy.geocoders import Nominatim
+            ctx = ssl.create_default_context(cafile=certifi.where())
+            self._geocoder = Nominatim(user_agent=self.user_agent, ssl_context=ctx)
+        return self._geocoder
+
+    def cached(self, address: str) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """Cached (lat, lon) — (None, None) for a known miss — or None if the address needs a lookup"""
+        key = normalize_address(address)
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT lat, lon, resolved_at FROM geocodes WHERE address_key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        lat, lon, resolved_at = row
+        if lat is None and time.time() - resolved_at > self.negative_ttl:
+            return None
+        return lat, lon
+
+    def lookup(self, address: str) -> Tuple[Optional[float], Optional[float]]:
+        """(lat, lon) for an address, or (None, None) if it cannot be resolved"""
+        if not address or not normalize_address(address):
+            return None, None
+        cached = self.cached(address)
+        if cached is not None:
+            return cached
+        with self._lock:
+            wait = self._last_call + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                location = self._client().geocode(address, timeout=10)
+            except Exception as e:
+                # Transient (network, quota): do not remember it
+                print(f"Geocoding failed for {address!r}: {e}")
+                return None, None
+            finally:
+                self._last_call = time.monotonic()
+                self.calls += 1
+            lat, lon = (location.latitude, location.longitude) if location else (None, None)
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?)",
+                             (normalize_address(address), address, lat, lon, time.time()))
+        return lat, lon
+
+    def prefetch(self, addresses: Iterable[str]) -> Dict[str, int]:
+        """Geocode every address not cached yet; returns counts of cached, resolved and unresolved"""
+        counts = {'cached': 0, 'resolved': 0, 'unresolved': 0}
+        seen = set()
+        for address in addresses:
+            key = normalize_address(address)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            if self.cached(address) is not None:
+                counts['cached'] += 1
+            elif self.lookup(address)[0] is not None:
+                counts['resolved'] += 1
+            else:
+                counts['unresolved'] += 1
+        return counts
+
+
+_geocode_cache = None
+
+
+def get_geocode_cache() -> GeocodeCache:
+    """Shared cache; GEOCODE_CACHE sets its file"""
+    global _geocode_cache
+    if _geocode_cache is None:
+        _geocode_cache = GeocodeCache(os.environ.get("GEOCODE_CACHE", "geocode_cache.sqlite3"))
+    return _geocode_cache
+
+
+def lookup(address: str) -> Tuple[Optional[float], Optional[float]]:
+    return get_geocode_cache().lookup(address)
+
+
+if __name__ == "__main__":
+    # Warm the cache for every organization's address (from the repository root): python -m backend.geocode
+    from storage import get_store
+    counts = get_geocode_cache().prefetch(user["Address"] for user in get_store().users(user_type="Organization"))
+    print(f"{counts['cached']} already cached, {counts['resolved']} resolved, {counts['unresolved']} unresolved")
@@ -1,29 +1,16 @@
-import pandas as pd
-df = pd.read_csv('user_information.csv', sep="|")
-
-names = df['Name']
-addresses = df['Address']
-cat = df['Categories']
-
-foodbanks = []
-
-for i in range(len(names)):
-    foodbanks.append({
-        'name': names[i],
-        'address': addresses[i],
-        'categories': cat[i]
-    })
-
-print(foodbanks)
-
-
+# Usage (from the repository root): python -m backend.map
 import folium
-from geopy.geocoders import Nominatim
 from folium.plugins import MeasureControl
 import openrouteservice
-import time
-import certifi
-import ssl
+from backend.geocode import get_geocode_cache
+from backend.routing import RoutingMatrix
+from backend.org_dataset import write_dataset
+from storage import get_store
+
+foodbanks = [
+    {'name': user["Name"], 'address': user["Address"], 'categories': user["Categories"]}
+    for user in get_store().users(user_type="Organization")
+]
 
 user_location = (47.6075017, -122.3319142)  # CHANGE USER LOCATION BASED ON WHERE THEY ARE
 
@@ -31,29 +18,30 @@ client = openrouteservice.Client(
     key='APIKEY'
 )  # REPLACE WITH YOUR OWN KEY
 
+# Batched, cached distance matrix; falls back to straight-line estimates
+routing = RoutingMatrix(client)
 
-def get_lat_lon(address):
-    # ✅ Fix 2: Use certifi SSL context to avoid certificate errors
-    ctx = ssl.create_default_context(cafile=certifi.where())
-    loc = Nominatim(user_agent="Geopy Library", ssl_context=ctx)
-
-    getLoc = loc.geocode(address, timeout=10)
-    time.sleep(1)
 
-    if getLoc:
-        return getLoc.latitude, getLoc.longitude
-    else:
-        return None, None
+def get_lat_lon(address):
+    # Persistent cache (see geocode.py): warm builds make no geocoding calls
+    return get_geocode_cache().lookup(address)
 
 
 def plot_map(foodbanks):
     m = folium.Map(location=user_location, zoom_start=12, width='100%', height='80%')
 
+    located = []
     for fb in foodbanks:
         lat, lon = get_lat_lon(fb["address"])
         if lat is None or lon is None:
             continue
+        located.append((fb, lat, lon))
+
+    # Distances to every food bank at once (a handful of matrix calls at most)
+    distances, durations, estimated = routing.from_origin(user_location, [(lat, lon) for _, lat, lon in located])
+    records = []
 
+    for (fb, lat, lon), distance, duration, is_estimate in zip(located, distances, durations, estimated):
         if fb['categories'] == 'Food':
             map_icon = "cutlery"
         elif fb['categories'] == 'Shelter':
@@ -61,31 +49,22 @@ def plot_map(foodbanks):
         else:
             map_icon = "info-sign"
 
-        coords = ((user_location[1], user_location[0]), (lon, lat))
-
-        try:
-            route = client.directions(coords)
-            distance_m = route['routes'][0]['summary']['distance']
-            duration_s = route['routes'][0]['summary']['duration']
-            distance_km = round(distance_m / 1000, 2)
-            duration_min = round(duration_s / 60, 1)
-
-            popup_text = f"""
-            <div style="font-size: 14pt; line-height: 1.5; max-width: 300px;">
-                <b>{fb['name']}</b><br>
-                <i>{fb['address']}</i><br>
-                <b>Distance:</b> {distance_km} km<br>
-                <b>Travel Time:</b> {duration_min} min
-            </div>
-            """
-        except Exception:
-            popup_text = f"""
-            <div style="font-size: 14pt; line-height: 1.5; max-width: 300px;">
-                <b>{fb['name']}</b><br>
-                <i>{fb['address']}</i><br>
-                Distance/Time not available
-            </div>
-            """
+        distance_km = round(float(distance), 2)
+        duration_min = round(float(duration), 1)
+        approx = " (est.)" if is_estimate else ""
+        records.append({
+            'name': fb['name'], 'address': fb['address'], 'category': fb['categories'], 'lat': lat, 'lon': lon,
+            'distance_km': distance_km, 'travel_min': duration_min, 'estimated': bool(is_estimate)
+        })
+
+        popup_text = f"""
+        <div style="font-size: 14pt; line-height: 1.5; max-width: 300px;">
+            <b>{fb['name']}</b><br>
+            <i>{fb['address']}</i><br>
+            <b>Distance:</b> {distance_km} km{approx}<br>
+            <b>Travel Time:</b> {duration_min} min{approx}
+        </div>
+        """
 
         folium.Marker(
             location=[lat, lon],
@@ -95,6 +74,8 @@ def plot_map(foodbanks):
 
     m.add_child(MeasureControl(primary_length_unit='kilometers'))
     m.save("foodbanks_map.html")
+    # Same data for other tools (see org_dataset.py), so nothing has to parse the HTML
+    print(f"Wrote {len(records)} organizations to {write_dataset(records)}")
     return m
 
 
@@ -0,0 +1,144 @@
+import json
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    from backend.spatial_index import parse_categories
+except ImportError:  # run as a script from backend/
+    from spatial_index import parse_categories
+
+LEAFLET = "https://unpkg.com/leaflet@1.9.4/dist"
+MARKERCLUSTER = "https://unpkg.com/leaflet.markercluster@1.5.3/dist"
+# Checkbox for organizations that list no category
+OTHER = "other"
+
+
+def _text(value) -> str:
+    """Cell value as text; missing values from a DataFrame (NaN) become empty"""
+    return value if isinstance(value, str) else ""
+
+
+def organizations_geojson(rows: Iterable[dict], lookup) -> dict:
+    """
+    FeatureCollection of organizations located with lookup(address) -> (lat, lon).
+    Other user rows (people in need, volunteers) are home addresses: they are
+    skipped before lookup, so they are neither geocoded nor mapped.
+    """
+    features = []
+    for row in rows:
+        if row.get("User Type") != "Organization":
+            continue
+        address = _text(row.get("Address"))
+        if not address.strip():
+            continue
+        lat, lon = lookup(address)
+        if lat is None or lon is None:
+            continue
+        features.append({
+            'type': "Feature",
+            # GeoJSON order is (lon, lat)
+            'geometry': {'type': "Point", 'coordinates': [lon, lat]},
+            'properties': {
+                'name': _text(row.get("Name")),
+                'description': _text(row.get("Description")),
+                'address': address,
+                'categories': sorted(parse_categories(_text(row.get("Categories")))),
+            },
+        })
+    return {'type': "FeatureCollection", 'features': features}
+
+
+def script_json(value) -> str:
+    """JSON for inlining in a <script>: "<" is escaped so no value can close the tag or open a comment"""
+    return json.dumps(value).replace("<", "\\u003c")
+
+
+def geojson_categories(geojson: dict) -> List[str]:
+    """Checkbox categories, with OTHER when some organization lists none"""
+    return sorted({category for feature in geojson['features']
+                   for category in feature['properties']['categories'] or [OTHER]})
+
+
+def cluster_map_html(geojson: dict, center: Tuple[float, float] = (47.6062, -122.3321), zoom: int = 12,
+                     categories: Optional[List[str]] = None) -> str:
+    """
+    Self-contained Leaflet page: the GeoJSON is embedded once, markers are
+    clustered (leaflet.markercluster, chunked loading) and the category
+    checkboxes filter in the browser, so toggling them needs no rerun.
+    An organization is shown if any of its categories is checked; ones
+    without a category are shown with the "other" checkbox.
+    """
+    categories = categories if categories is not None else geojson_categories(geojson)
+    # Everything inlined in the script goes through script_json (user text can contain "</script>")
+    data = script_json(geojson)
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<link rel="stylesheet" href="{LEAFLET}/leaflet.css">
+<link rel="stylesheet" href="{MARKERCLUSTER}/MarkerCluster.css">
+<link rel="stylesheet" href="{MARKERCLUSTER}/MarkerCluster.Default.css">
+<script src="{LEAFLET}/leaflet.js"></script>
+<script src="{MARKERCLUSTER}/leaflet.markercluster.js"></script>
+<style>
+html, body {{ margin: 0; padding: 0; height: 100%; overflow: hidden; background-color: black; }}
+#map {{ height: 100vh; width: 100%; }}
+#filters {{ position: absolute; top: 10px; right: 10px; z-index: 1000; background: white;
+           padding: 6px 10px; border-radius: 4px; font: 14px sans-serif; }}
+#filters label {{ display: block; text-transform: capitalize; }}
+</style>
+</head>
+<body>
+<div id="map"></div>
+<div id="filters"></div>
+<script>
+var data = {data};
+var categories = {script_json(categories)};
+var other = {script_json(OTHER)};
+var map = L.map("map").setView([{center[0]}, {center[1]}], {zoom});
+L.tileLayer("https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png", {{
+    maxZoom: 19, attribution: "&copy; OpenStreetMap contributors"
+}}).addTo(map);
+var clusters = L.markerClusterGroup({{chunkedLoading: true}});
+map.addLayer(clusters);
+
+function escapeHtml(text) {{
+    var div = document.createElement("div");
+    div.textContent = text;
+    return div.innerHTML;
+}}
+
+// Markers are built once; filtering only swaps which ones are in the cluster group
+var markers = data.features.map(function (feature) {{
+    var p = feature.properties;
+    var marker = L.marker([feature.geometry.coordinates[1], feature.geometry.coordinates[0]]);
+    marker.bindPopup("<b>" + escapeHtml(p.name) + "</b><br>" + escapeHtml(p.description) + "<br>" + escapeHtml(p.address));
+    return {{marker: marker, categories: p.categories}};
+}});
+
+function applyFilters() {{
+    var checked = {{}};
+    document.querySelectorAll("#filters input").forEach(function (box) {{ checked[box.value] = box.checked; }});
+    clusters.clearLayers();
+    clusters.addLayers(markers.filter(function (m) {{
+        var categories = m.categories.length ? m.categories : [other];
+        return categories.some(function (c) {{ return checked[c]; }});
+    }}).map(function (m) {{ return m.marker; }}));
+}}
+
+var filters = document.getElementById("filters");
+categories.forEach(function (category) {{
+    var label = document.createElement("label");
+    var box = document.createElement("input");
+    box.type = "checkbox";
+    box.value = category;
+    box.checked = true;
+    box.addEventListener("change", applyFilters);
+    label.appendChild(box);
+    label.appendChild(document.createTextNode(" " + category));
+    filters.appendChild(label);
+}});
+applyFilters();
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,43 @@
+import os
+from typing import List
+
+# Organizations as map.py located them, relative to its user_location
+ORG_COLUMNS = ['name', 'address', 'category', 'lat', 'lon', 'distance_km', 'travel_min', 'estimated']
+ORG_DTYPES = {
+    'name': 'string',
+    'address': 'string',
+    'category': 'category',
+    'lat': 'float64',
+    'lon': 'float64',
+    'distance_km': 'float64',
+    'travel_min': 'float64',
+    'estimated': 'bool',
+}
+DATASET_BASE = "foodbanks"
+
+
+def to_frame(records: List[dict]):
+    import pandas as pd
+    return pd.DataFrame(records, columns=ORG_COLUMNS).astype(ORG_DTYPES)
+
+
+def write_dataset(records: List[dict], base: str = DATASET_BASE) -> str:
+    """Write the organizations as <base>.parquet (CSV with the same columns if pyarrow is missing); returns the path"""
+    frame = to_frame(records)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        path = base + ".csv"
+        frame.to_csv(path, index=False)
+        return path
+    path = base + ".parquet"
+    frame.to_parquet(path, index=False)
+    return path
+
+
+def load_dataset(base: str = DATASET_BASE):
+    """The organizations frame written by map.py, typed as ORG_DTYPES"""
+    import pandas as pd
+    if os.path.exists(base + ".parquet"):
+        return pd.read_parquet(base + ".parquet")
+    return pd.read_csv(base + ".csv").astype(ORG_DTYPES)
@@ -0,0 +1,175 @@
+import math
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+# Cache resolution: points in the same cell (about 500 m) share routes
+CELL_SIZE = 0.005
+ROUTE_TTL = 7 * 86400
+# openrouteservice matrix limits per request (public API)
+MAX_LOCATIONS = 50
+# After an error (quota, network), estimate instead of calling for this long
+COOL_DOWN = 300
+
+# Fallback estimate: straight-line distance times a road factor, at an urban driving speed
+ROAD_FACTOR = 1.3
+AVERAGE_SPEED_KMH = 40.0
+EARTH_RADIUS_KM = 6371.0
+
+LatLon = Tuple[float, float]
+
+
+def haversine_km(origins: Sequence[LatLon], destinations: Sequence[LatLon]) -> np.ndarray:
+    """Great-circle distances (km), one row per origin and one column per destination"""
+    o = np.radians(np.asarray(origins, dtype=float).reshape(-1, 2))
+    d = np.radians(np.asarray(destinations, dtype=float).reshape(-1, 2))
+    dlat = d[None, :, 0] - o[:, None, 0]
+    dlon = d[None, :, 1] - o[:, None, 1]
+    a = np.sin(dlat / 2) ** 2 + np.cos(o[:, None, 0]) * np.cos(d[None, :, 0]) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def estimate(origins: Sequence[LatLon], destinations: Sequence[LatLon]) -> Tuple[np.ndarray, np.ndarray]:
+    """(road distance km, travel minutes) estimated from straight-line distance"""
+    distance = haversine_km(origins, destinations) * ROAD_FACTOR
+    return distance, distance / AVERAGE_SPEED_KMH * 60
+
+
+def cell(point: LatLon, size: float = CELL_SIZE) -> Tuple[int, int]:
+    return math.floor(point[0] / size), math.floor(point[1] / size)
+
+
+class RoutingMatrix:
+    """
+    Driving distance/time between many origins and destinations.
+
+    Routes are cached per (origin cell, destination cell) for ROUTE_TTL, and
+    missing pairs are fetched with openrouteservice matrix calls of up to
+    MAX_LOCATIONS points each (e.g. one call for an origin and 49
+    destinations). Without a client, or while routing fails, pairs are
+    estimated from haversine distance instead; estimates are not cached.
+    """
+
+    def __init__(self, client=None, path: str = "routing_cache.sqlite3", cell_size: float = CELL_SIZE,
+                 ttl: float = ROUTE_TTL, max_locations: int = MAX_LOCATIONS):
+        self.client = client
+        self.path = path
+        self.cell_size = cell_size
+        self.ttl = ttl
+        self.max_locations = max_locations
+        # Matrix requests made (cache misses)
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._unavailable_until = 0.0
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS routes (
+                    origin_cell TEXT,
+                    destination_cell TEXT,
+                    distance_km REAL,
+                    duration_min REAL,
+                    fetched_at REAL,
+                    PRIMARY KEY (origin_cell, destination_cell)
+                )"""
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _key(self, point: LatLon) -> str:
+        lat_cell, lon_cell = cell(point, self.cell_size)
+        return f"{lat_cell}:{lon_cell}"
+
+    def _cached(self, origin_keys: List[str], destination_keys: List[str]) -> dict:
+        conn = self._connect()
+        wanted = set(destination_keys)
+        found = {}
+        oldest = time.time() - self.ttl
+        for origin_key in set(origin_keys):
+            rows = conn.execute("""SELECT destination_cell, distance_km, duration_min FROM routes
+                                   WHERE origin_cell = ? AND fetched_at >= ?""", (origin_key, oldest))
+            for destination_key, distance, duration in rows:
+                if destination_key in wanted:
+                    found[origin_key, destination_key] = (distance, duration)
+        return found
+
+    def _fetch(self, origins: List[LatLon], destinations: List[LatLon]) -> Optional[Tuple[list, list]]:
+        """One openrouteservice matrix call; None if routing is unavailable"""
+        if self.client is None or time.time() < self._unavailable_until:
+            return None
+        # openrouteservice takes (lon, lat)
+        locations = [(lon, lat) for lat, lon in origins + destinations]
+        try:
+            self.calls += 1
+            result = self.client.distance_matrix(
+                locations=locations,
+                sources=list(range(len(origins))),
+                destinations=list(range(len(origins), len(locations))),
+                metrics=["distance", "duration"],
+                units="km",
+            )
+        except Exception as e:
+            print(f"Routing unavailable, using estimates: {e}")
+            self._unavailable_until = time.time() + COOL_DOWN
+            return None
+        return result["distances"], result["durations"]
+
+    def matrix(self, origins: Sequence[LatLon], destinations: Sequence[LatLon]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(distance km, duration min, estimated) arrays of shape (len(origins), len(destinations))"""
+        origins, destinations = list(origins), list(destinations)
+        distance, duration = estimate(origins, destinations)
+        estimated = np.ones(distance.shape, dtype=bool)
+        if not origins or not destinations:
+            return distance, duration, estimated
+        origin_keys = [self._key(point) for point in origins]
+        destination_keys = [self._key(point) for point in destinations]
+        with self._lock:
+            cached = self._cached(origin_keys, destination_keys)
+            # One representative point per cell with a missing pair
+            missing_origins, missing_destinations = {}, {}
+            for i, origin_key in enumerate(origin_keys):
+                for j, destination_key in enumerate(destination_keys):
+                    if (origin_key, destination_key) not in cached:
+                        missing_origins.setdefault(origin_key, origins[i])
+                        missing_destinations.setdefault(destination_key, destinations[j])
+            # Sub-matrices of up to max_locations points (a few origins, the rest destinations)
+            rows = []
+            origin_batch = max(1, min(len(missing_origins), self.max_locations // 5))
+            destination_batch = self.max_locations - origin_batch
+            origin_items, destination_items = list(missing_origins.items()), list(missing_destinations.items())
+            for o_start in range(0, len(origin_items), origin_batch):
+                o_chunk = origin_items[o_start:o_start + origin_batch]
+                for d_start in range(0, len(destination_items), destination_batch):
+                    d_chunk = destination_items[d_start:d_start + destination_batch]
+                    fetched = self._fetch([point for _, point in o_chunk], [point for _, point in d_chunk])
+                    if fetched is None:
+                        continue
+                    now = time.time()
+                    for (origin_key, _), kms, seconds_row in zip(o_chunk, *fetched):
+                        for (destination_key, _), km, seconds in zip(d_chunk, kms, seconds_row):
+                            if km is not None and seconds is not None:
+                                cached[origin_key, destination_key] = (km, seconds / 60)
+                                rows.append((origin_key, destination_key, km, seconds / 60, now))
+            if rows:
+                conn = self._connect()
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?)", rows)
+        for i, origin_key in enumerate(origin_keys):
+            for j, destination_key in enumerate(destination_keys):
+                route = cached.get((origin_key, destination_key))
+                if route is not None:
+                    distance[i, j], duration[i, j] = route
+                    estimated[i, j] = False
+        return distance, duration, estimated
+
+    def from_origin(self, origin: LatLon, destinations: Sequence[LatLon]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """matrix() for a single origin, as 1-D arrays"""
+        distance, duration, estimated = self.matrix([origin], destinations)
+        return distance[0], duration[0], estimated[0]
@@ -0,0 +1,152 @@
+import heapq
+import math
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Grid cell size in degrees (about 5.5 km north-south)
+CELL_SIZE = 0.05
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def parse_categories(categories) -> Set[str]:
+    """{"food", "shelter"} from a Categories value like "Food, Shelter" """
+    if isinstance(categories, str):
+        categories = categories.split(",")
+    return {str(category).strip().lower() for category in categories or () if str(category).strip()}
+
+
+class SpatialIndex:
+    """
+    Organizations bucketed in a lat/lon grid, overall and per category.
+
+    nearest() searches rings of cells outward from the query point and stops
+    once no unvisited cell can hold anything closer than the k-th result, so
+    it only looks at the points around the query. within() visits the cells
+    overlapping the radius. add()/remove() touch one bucket per category.
+    """
+
+    def __init__(self, cell_size: float = CELL_SIZE):
+        self.cell_size = cell_size
+        # Category (None = all) -> cell -> {id: (lat, lon)}
+        self._grids: Dict[Optional[str], Dict[Tuple[int, int], Dict[Hashable, Tuple[float, float]]]] = {None: {}}
+        self._points: Dict[Hashable, Tuple[float, float, Set[str], dict]] = {}
+        # Category -> [min row, max row, min col, max col] of cells ever used (only grows)
+        self._bounds: Dict[Optional[str], List[int]] = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, org_id) -> bool:
+        return org_id in self._points
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def add(self, org_id, lat: float, lon: float, categories=(), data: Optional[dict] = None):
+        """Add or move an organization; data is returned with query results"""
+        if org_id in self._points:
+            self.remove(org_id)
+        categories = parse_categories(categories)
+        self._points[org_id] = (lat, lon, categories, data or {})
+        cell = self._cell(lat, lon)
+        for group in (None, *categories):
+            self._grids.setdefault(group, {}).setdefault(cell, {})[org_id] = (lat, lon)
+            bounds = self._bounds.setdefault(group, [cell[0], cell[0], cell[1], cell[1]])
+            bounds[:] = [min(bounds[0], cell[0]), max(bounds[1], cell[0]), min(bounds[2], cell[1]), max(bounds[3], cell[1])]
+
+    def remove(self, org_id):
+        point = self._points.pop(org_id, None)
+        if point is None:
+            return
+        lat, lon, categories, _ = point
+        cell = self._cell(lat, lon)
+        for group in (None, *categories):
+            bucket = self._grids[group][cell]
+            del bucket[org_id]
+            if not bucket:
+                del self._grids[group][cell]
+
+    def get(self, org_id) -> Optional[dict]:
+        point = self._points.get(org_id)
+        return point[3] if point else None
+
+    def _ring(self, center: Tuple[int, int], radius: int) -> Iterable[Tuple[int, int]]:
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for dc in range(-radius, radius + 1):
+            yield row - radius, col + dc
+            yield row + radius, col + dc
+        for dr in range(-radius + 1, radius):
+            yield row + dr, col - radius
+            yield row + dr, col + radius
+
+    def _min_ring_km(self, lat: float, radius: int) -> float:
+        """Lower bound on the distance from a point to any cell in ring `radius` or beyond"""
+        steps = max(0, radius - 1) * self.cell_size
+        # Longitude degrees are shortest at the ring's highest latitude
+        widest_lat = min(89.9, abs(lat) + (radius + 1) * self.cell_size)
+        return steps * KM_PER_DEGREE * min(1.0, math.cos(math.radians(widest_lat)))
+
+    def nearest(self, lat: float, lon: float, k: int = 5, category: Optional[str] = None) -> List[Tuple[Hashable, float, dict]]:
+        """The k closest organizations (optionally in one category) as (id, km, data), closest first"""
+        group = category.lower() if category else None
+        grid = self._grids.get(group)
+        if not grid or k <= 0:
+            return []
+        center = self._cell(lat, lon)
+        # Furthest ring that can contain a cell of the grid
+        low_row, high_row, low_col, high_col = self._bounds[group]
+        max_radius = max(abs(low_row - center[0]), abs(high_row - center[0]), abs(low_col - center[1]), abs(high_col - center[1]))
+        best: List[Tuple[float, Hashable]] = []  # max-heap via negated distances
+        for radius in range(max_radius + 1):
+            if len(best) == k and -best[0][0] <= self._min_ring_km(lat, radius):
+                break
+            for cell in self._ring(center, radius):
+                for org_id, (p_lat, p_lon) in grid.get(cell, {}).items():
+                    distance = haversine_km(lat, lon, p_lat, p_lon)
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, org_id))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, org_id))
+        return [(org_id, -negated, self._points[org_id][3]) for negated, org_id in sorted(best, reverse=True)]
+
+    def within(self, lat: float, lon: float, radius_km: float, category: Optional[str] = None) -> List[Tuple[Hashable, float, dict]]:
+        """Organizations within radius_km as (id, km, data), closest first"""
+        grid = self._grids.get(category.lower() if category else None)
+        if not grid:
+            return []
+        d_lat = radius_km / KM_PER_DEGREE
+        d_lon = radius_km / (KM_PER_DEGREE * max(0.01, math.cos(math.radians(min(89.9, abs(lat) + d_lat)))))
+        low_row, low_col = self._cell(lat - d_lat, lon - d_lon)
+        high_row, high_col = self._cell(lat + d_lat, lon + d_lon)
+        hits = []
+        if (high_row - low_row + 1) * (high_col - low_col + 1) > len(grid):
+            cells = [cell for cell in grid if low_row <= cell[0] <= high_row and low_col <= cell[1] <= high_col]
+        else:
+            cells = [(row, col) for row in range(low_row, high_row + 1) for col in range(low_col, high_col + 1)]
+        for cell in cells:
+            for org_id, (p_lat, p_lon) in grid.get(cell, {}).items():
+                distance = haversine_km(lat, lon, p_lat, p_lon)
+                if distance <= radius_km:
+                    hits.append((distance, org_id))
+        hits.sort(key=lambda hit: hit[0])
+        return [(org_id, distance, self._points[org_id][3]) for distance, org_id in hits]
+
+
+def organizations_index(rows: Iterable[dict], lookup) -> SpatialIndex:
+    """Index user rows (Name, Address, Categories, ...) located with lookup(address) -> (lat, lon)"""
+    index = SpatialIndex()
+    for row in rows:
+        lat, lon = lookup(row.get("Address"))
+        if lat is not None and lon is not None:
+            index.add(row["Name"], lat, lon, row.get("Categories") or (),
+                      {'name': row["Name"], 'address': row.get("Address"), 'categories': row.get("Categories")})
+    return index
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from backend.crawler import Crawler, _DESCRIPTION_CLASS, _DETAIL_CLASS, _TITLE_CLASS
+from storage import get_store
+
+QUERIES = [("FOOD", "Food Pantries", "Food"), ("SHELTER", "Overnight Shelters", "Shelter")]
+# query -> pages of organization names
+RESULTS = {"FOOD": [["Harbor Pantry", "Both Place"], ["Hill Pantry"]], "SHELTER": [["Both Place"]]}
+
+
+def _page_html(names, next_href):
+    cards = "".join(
+        f'<div class="{_TITLE_CLASS}">{name}</div>'
+        f'<p class="{_DESCRIPTION_CLASS}">About {name}</p>'
+        f'<div class="{_DETAIL_CLASS}"><a>https://example.org</a><span>1 Main St</span><span>555-0100</span></div>'
+        for name in names)
+    link = f'<a rel="next" href="{next_href}">Next</a>' if next_href else ""
+    return f"<html><body>{cards}{link}</body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        pages = RESULTS[params['query'][0]]
+        page = int(params.get('page', ['1'])[0])
+        next_href = self.path.split("&page=")[0] + f"&page={page + 1}" if page < len(pages) else None
+        body = _page_html(pages[page - 1], next_href).encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        self.server.hits += 1
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.hits = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _crawler(server, tmp_path):
+    return Crawler(base_url=f"http://127.0.0.1:{server.server_port}", queries=QUERIES, min_interval=0,
+                   state_path=str(tmp_path / "state.sqlite3"))
+
+
+def test_crawl_upserts_pages_then_skips_them(server, tmp_path):
+    crawler = _crawler(server, tmp_path)
+    assert crawler.crawl(get_store()) == {'added': 3, 'updated': 1}
+    assert crawler.stats['parsed'] == 3
+    assert set(get_store().get_user("Both Place")["Categories"].split(", ")) == {"Food", "Shelter"}
+    assert get_store().get_user("Hill Pantry")["Address"] == "1 Main St"
+
+    again = _crawler(server, tmp_path)
+    assert again.crawl(get_store()) == {'added': 0, 'updated': 0}
+    assert again.stats == {'fetched': 3, 'not_modified': 3, 'unchanged': 0, 'parsed': 0}
+
+
+class _FailingStore:
+    def add_user(self, user):
+        raise RuntimeError("database is locked")
+
+
+def test_page_state_is_kept_only_after_the_upsert(server, tmp_path):
+    with pytest.raises(RuntimeError):
+        _crawler(server, tmp_path).crawl(_FailingStore())
+
+    # The failed pages were not marked as seen, so the next crawl stores them
+    crawler = _crawler(server, tmp_path)
+    assert crawler.crawl(get_store())['added'] == 3
+    assert {user["Name"] for user in get_store().users()} == {"Harbor Pantry", "Both Place", "Hill Pantry"}
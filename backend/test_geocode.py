@@ -0,0 +1,57 @@
+import time
+from types import SimpleNamespace
+from backend.geocode import GeocodeCache, normalize_address
+
+
+class _Geocoder:
+    """Answers from a dict; raises for addresses listed in `failing`"""
+    def __init__(self, known, failing=()):
+        self.known = known
+        self.failing = set(failing)
+        self.queries = []
+
+    def geocode(self, address, timeout=None):
+        self.queries.append(address)
+        if address in self.failing:
+            raise TimeoutError("no network")
+        point = self.known.get(normalize_address(address))
+        return SimpleNamespace(latitude=point[0], longitude=point[1]) if point else None
+
+
+def _cache(tmp_path, geocoder, **kwargs):
+    cache = GeocodeCache(str(tmp_path / "geocode.sqlite3"), min_interval=0, **kwargs)
+    cache._geocoder = geocoder
+    return cache
+
+
+def test_spelling_variants_share_one_lookup(tmp_path):
+    geocoder = _Geocoder({"1 main st, seattle, wa": (47.6, -122.3)})
+    cache = _cache(tmp_path, geocoder)
+    for address in ["1 Main St, Seattle, WA", " 1 main  st ,seattle,WA.", "1 MAIN ST,SEATTLE, WA"]:
+        assert cache.lookup(address) == (47.6, -122.3)
+    assert geocoder.queries == ["1 Main St, Seattle, WA"]
+    # Persisted: a new cache on the same file makes no calls
+    fresh = _cache(tmp_path, _Geocoder({}))
+    assert fresh.lookup("1 main st, seattle, wa") == (47.6, -122.3) and fresh.calls == 0
+
+
+def test_misses_are_cached_but_errors_are_not(tmp_path):
+    geocoder = _Geocoder({}, failing={"Flaky Rd"})
+    cache = _cache(tmp_path, geocoder, negative_ttl=0.05)
+    assert cache.lookup("Nowhere Lane") == (None, None)
+    assert cache.lookup("nowhere lane") == (None, None) and cache.calls == 1
+    assert cache.lookup("Flaky Rd") == (None, None)
+    assert cache.cached("Flaky Rd") is None
+    time.sleep(0.1)
+    # The known miss expired and is tried again
+    assert cache.prefetch(["Nowhere Lane", "nowhere lane", "Flaky Rd", ""]) == {'cached': 0, 'resolved': 0, 'unresolved': 2}
+    assert geocoder.queries == ["Nowhere Lane", "Flaky Rd", "Nowhere Lane", "Flaky Rd"]
+
+
+def test_calls_are_spaced_out(tmp_path):
+    cache = _cache(tmp_path, _Geocoder({}))
+    cache.min_interval = 0.05
+    start = time.monotonic()
+    for i in range(4):
+        cache.lookup(f"{i} Pine St")
+    assert time.monotonic() - start >= 0.15
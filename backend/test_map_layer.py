@@ -0,0 +1,50 @@
+import json
+import re
+from backend.map_layer import OTHER, cluster_map_html, geojson_categories, organizations_geojson
+
+PAYLOAD = "</script><script>alert(1)//"
+
+
+def _inline_script(html: str) -> str:
+    # The page's only inline script (the others are <script src=...></script>)
+    return re.search(r"<script>(.*?)</script>", html, re.DOTALL).group(1)
+
+
+def test_user_text_cannot_close_the_script():
+    rows = [{"Name": PAYLOAD, "Description": "<!-- " + PAYLOAD, "Address": "1 Main St", "Categories": PAYLOAD + ", Food",
+             "User Type": "Organization"}]
+    geojson = organizations_geojson(rows, lambda address: (47.6, -122.3))
+    html = cluster_map_html(geojson)
+
+    script = _inline_script(html)
+    assert "alert(1)" in script  # still inside the inline script, as data
+    assert "</script" not in script and "<!--" not in script
+    assert html.count("</script>") == 3
+
+    # The embedded values decode back to the original text
+    data = json.loads(re.search(r"var data = (.*?);\nvar categories", script, re.DOTALL).group(1))
+    categories = json.loads(re.search(r"var categories = (.*?);\n", script).group(1))
+    assert data['features'][0]['properties']['name'] == PAYLOAD
+    assert PAYLOAD.lower() in categories and "food" in categories
+
+
+def test_organizations_without_location_are_skipped():
+    rows = [{"Name": name, "Address": address, "User Type": "Organization"}
+            for name, address in (("A", "somewhere"), ("B", float("nan")), ("C", "nowhere"))]
+    geojson = organizations_geojson(rows, lambda address: (47.6, -122.3) if address == "somewhere" else (None, None))
+    assert [feature['properties']['name'] for feature in geojson['features']] == ["A"]
+    assert geojson['features'][0]['geometry']['coordinates'] == [-122.3, 47.6]
+
+
+def test_only_organizations_are_looked_up_and_mapped():
+    rows = [{"Name": "Food Bank", "Address": "1 Main St", "Categories": "Food", "User Type": "Organization"},
+            {"Name": "Sam", "Address": "12 Home Ave", "User Type": "Person in Need"},
+            {"Name": "Ana", "Address": "34 Home Ave", "User Type": "Volunteer"},
+            {"Name": "Shelter", "Address": "5 Pine St", "Categories": float("nan"), "User Type": "Organization"}]
+    looked_up = []
+    geojson = organizations_geojson(rows, lambda address: looked_up.append(address) or (47.6, -122.3))
+    assert looked_up == ["1 Main St", "5 Pine St"]
+    assert [feature['properties']['name'] for feature in geojson['features']] == ["Food Bank", "Shelter"]
+    assert "Home Ave" not in json.dumps(geojson)
+    # Organizations without a category get their own checkbox instead of always showing
+    assert geojson_categories(geojson) == ["food", OTHER]
@@ -0,0 +1,34 @@
+import runpy
+import sys
+from backend.org_dataset import ORG_COLUMNS, ORG_DTYPES, load_dataset, write_dataset
+
+RECORDS = [
+    {'name': 'Hill "Community" Pantry, Inc.', 'address': "12 Pine St, Seattle", 'category': "Food", 'lat': 47.61,
+     'lon': -122.32, 'distance_km': 3.2, 'travel_min': 9.5, 'estimated': False},
+    {'name': "Harbor Shelter", 'address': "1 Dock Rd | Unit 2", 'category': "Shelter", 'lat': 47.58,
+     'lon': -122.35, 'distance_km': 1.1, 'travel_min': 4.0, 'estimated': True},
+    {'name': "Drop-in Center", 'address': "5 Main St", 'category': None, 'lat': 47.7,
+     'lon': -122.3, 'distance_km': 9.0, 'travel_min': 20.0, 'estimated': True},
+]
+
+
+def test_dataset_round_trip():
+    path = write_dataset(RECORDS)
+    frame = load_dataset()
+    assert path in ("foodbanks.parquet", "foodbanks.csv")
+    assert list(frame.columns) == ORG_COLUMNS
+    assert {column: str(dtype) for column, dtype in frame.dtypes.items()} == ORG_DTYPES
+    rows = frame.astype(object).where(frame.notna(), None).to_dict('records')
+    assert rows == RECORDS
+
+
+def test_sorted_listing_reads_the_dataset(monkeypatch, capsys):
+    write_dataset(RECORDS)
+    monkeypatch.setattr(sys, "argv", ["Shelters_sorted_by_distance.py"])
+    runpy.run_module("backend.Shelters_sorted_by_distance", run_name="__main__")
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split(" - ")[0] for line in lines] == ["Harbor Shelter", 'Hill "Community" Pantry, Inc.', "Drop-in Center"]
+
+    monkeypatch.setattr(sys, "argv", ["Shelters_sorted_by_distance.py", "47.6", "-122.32", "1", "shelter"])
+    runpy.run_module("backend.Shelters_sorted_by_distance", run_name="__main__")
+    assert capsys.readouterr().out.startswith("Harbor Shelter - 1 Dock Rd | Unit 2 - ")
@@ -0,0 +1,55 @@
+import numpy as np
+from backend.routing import RoutingMatrix, estimate, haversine_km
+
+SEATTLE, PORTLAND = (47.6062, -122.3321), (45.5152, -122.6784)
+
+
+class _Client:
+    """openrouteservice stand-in: twice the straight-line distance, in km and seconds"""
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sizes = []
+
+    def distance_matrix(self, locations, sources, destinations, metrics, units):
+        self.sizes.append(len(locations))
+        if self.fail:
+            raise ConnectionError("quota exceeded")
+        points = [(lat, lon) for lon, lat in locations]
+        km = 2 * haversine_km([points[i] for i in sources], [points[j] for j in destinations])
+        return {'distances': km.tolist(), 'durations': (km * 60).tolist()}
+
+
+def test_haversine_and_estimate():
+    assert abs(haversine_km([SEATTLE], [PORTLAND])[0, 0] - 233.9) < 1
+    distance, minutes = estimate([SEATTLE, PORTLAND], [SEATTLE])
+    assert distance.shape == (2, 1) and distance[0, 0] == 0
+    assert np.isclose(minutes[1, 0], distance[1, 0] / 40 * 60)
+
+
+def test_routes_are_batched_and_cached(tmp_path):
+    rng = np.random.default_rng(0)
+    origins = [tuple(p) for p in rng.uniform([47.5, -122.4], [47.7, -122.2], (7, 2))]
+    destinations = [tuple(p) for p in rng.uniform([47.5, -122.4], [47.7, -122.2], (60, 2))]
+    client = _Client()
+    routing = RoutingMatrix(client, path=str(tmp_path / "routes.sqlite3"), max_locations=20)
+    distance, minutes, estimated = routing.matrix(origins, destinations)
+    assert not estimated.any()
+    assert max(client.sizes) <= 20
+    assert np.allclose(distance, 2 * haversine_km(origins, destinations), rtol=0.05)
+    assert np.allclose(minutes, distance)
+
+    calls = routing.calls
+    again = RoutingMatrix(client, path=str(tmp_path / "routes.sqlite3"), max_locations=20)
+    assert np.array_equal(again.matrix(origins, destinations)[0], distance)
+    assert again.calls == 0 and routing.calls == calls
+
+
+def test_failures_fall_back_to_estimates(tmp_path):
+    client = _Client(fail=True)
+    routing = RoutingMatrix(client, path=str(tmp_path / "routes.sqlite3"))
+    distance, _, estimated = routing.from_origin(SEATTLE, [PORTLAND])
+    assert estimated.all() and np.isclose(distance[0], estimate([SEATTLE], [PORTLAND])[0][0, 0])
+    # Cooling down: no more calls for a while
+    routing.from_origin(SEATTLE, [PORTLAND])
+    assert routing.calls == 1
+    assert RoutingMatrix(None, path=str(tmp_path / "routes.sqlite3")).from_origin(SEATTLE, [PORTLAND])[2].all()
@@ -0,0 +1,46 @@
+import random
+from backend.spatial_index import SpatialIndex, haversine_km, organizations_index
+
+
+def _brute_force(points, lat, lon, category=None):
+    return sorted((haversine_km(lat, lon, p_lat, p_lon), org_id) for org_id, (p_lat, p_lon, cats) in points.items()
+                  if category is None or category in cats)
+
+
+def test_queries_match_brute_force():
+    rng = random.Random(21)
+    index, points = SpatialIndex(), {}
+    # Clustered around Seattle, plus a few far away (Spokane, Alaska)
+    for i in range(600):
+        lat, lon = rng.choice([(47.6, -122.3), (47.66, -117.4), (61.2, -149.9)])
+        point = (lat + rng.gauss(0, 0.15), lon + rng.gauss(0, 0.2), set(rng.sample(["food", "shelter", "medical"], 1)))
+        points[i] = point
+        index.add(i, point[0], point[1], point[2], {'name': f"org{i}"})
+    for i in rng.sample(sorted(points), 150):
+        index.remove(i)
+        del points[i]
+    # Moves replace the old position
+    for i in rng.sample(sorted(points), 50):
+        points[i] = (47.6 + rng.gauss(0, 0.3), -122.3 + rng.gauss(0, 0.3), points[i][2])
+        index.add(i, points[i][0], points[i][1], points[i][2])
+
+    for _ in range(40):
+        center_lat, center_lon = rng.choice([(47.6, -122.3), (47.66, -117.4), (61.2, -149.9)])
+        lat, lon = center_lat + rng.gauss(0, 0.5), center_lon + rng.gauss(0, 0.5)
+        category = rng.choice([None, "food", "Medical"])
+        expected = _brute_force(points, lat, lon, category.lower() if category else None)
+        nearest = index.nearest(lat, lon, k=8, category=category)
+        assert [round(km, 9) for _, km, _ in nearest] == [round(km, 9) for km, _ in expected[:8]]
+        radius = rng.choice([2, 20, 300])
+        within = index.within(lat, lon, radius, category=category)
+        assert sorted(org_id for org_id, _, _ in within) == sorted(org_id for km, org_id in expected if km <= radius)
+        assert [km for _, km, _ in within] == sorted(km for _, km, _ in within)
+
+
+def test_organizations_index_skips_unlocated_rows():
+    rows = [{"Name": "Pantry", "Address": "1 Main St", "Categories": "Food, Shelter"},
+            {"Name": "Lost", "Address": "nowhere", "Categories": "Food"}]
+    index = organizations_index(rows, lambda address: (47.6, -122.3) if address == "1 Main St" else (None, None))
+    assert len(index) == 1 and "Lost" not in index
+    assert [org_id for org_id, _, _ in index.nearest(47.61, -122.3, category="shelter")] == ["Pantry"]
+    assert index.get("Pantry")['categories'] == "Food, Shelter"
@@ -0,0 +1,94 @@
+from typing import Optional, Tuple
+from text_utils import normalize_tokens
+
+# Keyword lexicon for ItemCategory values. Multi-word phrases are matched
+# against consecutive tokens; everything is singularized before matching.
+CATEGORY_KEYWORDS = {
+    'food': [
+        "food", "meal", "soup", "can", "canned", "rice", "pasta", "bread", "grocery", "groceries",
+        "apple", "banana", "orange", "fruit", "vegetable", "produce", "milk", "cereal", "bean",
+        "snack", "chip", "pizza", "sandwich", "juice", "water", "tuna", "oatmeal", "flour", "sugar",
+        "coffee", "tea", "egg", "meat", "chicken", "protein", "granola", "cracker", "peanut butter",
+        "baby food", "baby formula", "formula", "noodle", "ramen", "cheese", "yogurt", "potato",
+    ],
+    'clothing': [
+        "clothes", "clothing", "jacket", "coat", "shirt", "pant", "jean", "hoodie", "hoody",
+        "sweater", "sweatshirt", "sock", "glove", "mitten", "hat", "beanie", "scarf", "shoe", "boot",
+        "sneaker", "underwear", "raincoat", "poncho", "dress", "skirt", "short", "legging", "uniform",
+    ],
+    'shelter': [
+        "shelter", "blanket", "sleeping bag", "tent", "tarp", "cot", "mattress", "pillow", "bed",
+        "bedding", "sheet", "comforter", "quilt", "heater", "hand warmer", "sleeping pad", "housing",
+    ],
+    'medical': [
+        "medical", "medicine", "medication", "first aid", "bandage", "band aid", "gauze",
+        "aspirin", "ibuprofen", "tylenol", "acetaminophen", "thermometer", "prescription", "insulin",
+        "inhaler", "face mask", "mask", "vitamin", "antiseptic", "ointment", "medical kit", "splint",
+    ],
+    'hygiene': [
+        "hygiene", "soap", "shampoo", "conditioner", "toothbrush", "toothpaste", "floss", "deodorant",
+        "tampon", "pad", "diaper", "toilet paper", "tissue", "razor", "sanitizer", "hand sanitizer",
+        "wipe", "towel", "lotion", "feminine", "sunscreen", "hygiene kit", "laundry detergent",
+    ],
+}
+
+# Name matches count more than description matches
+NAME_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.5
+MIN_CONFIDENCE = 0.75
+
+
+def _build_lexicon():
+    lexicon = {}
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            phrase = tuple(normalize_tokens(keyword))
+            if phrase:
+                lexicon.setdefault(phrase, set()).add(category)
+    return lexicon
+
+
+_LEXICON = _build_lexicon()
+_MAX_PHRASE = max(len(phrase) for phrase in _LEXICON)
+
+
+def _score_tokens(tokens, weight, scores):
+    i = 0
+    while i < len(tokens):
+        # Prefer the longest phrase starting at this token ("sleeping bag" over "bag")
+        for size in range(min(_MAX_PHRASE, len(tokens) - i), 0, -1):
+            categories = _LEXICON.get(tuple(tokens[i:i + size]))
+            if categories:
+                for category in categories:
+                    scores[category] = scores.get(category, 0.0) + weight * size
+                i += size
+                break
+        else:
+            i += 1
+
+
+def category_scores(name: str, description: str = "") -> dict:
+    """Return raw lexicon scores per category value"""
+    scores = {}
+    _score_tokens(normalize_tokens(name), NAME_WEIGHT, scores)
+    _score_tokens(normalize_tokens(description), DESCRIPTION_WEIGHT, scores)
+    return scores
+
+
+def classify_local(name: str, description: str = "", min_confidence: float = MIN_CONFIDENCE) -> Tuple[Optional[str], float]:
+    """
+    Classify an item with the keyword lexicon.
+
+    Returns (category value, confidence). The category is None when the
+    lexicon has no confident answer and the caller should fall back to Gemini.
+    """
+    scores = category_scores(name, description)
+    if not scores:
+        return None, 0.0
+
+    best = max(scores, key=scores.get)
+    confidence = scores[best] / sum(scores.values())
+    # Require at least one full-weight hit so a stray description word is not enough
+    if confidence >= min_confidence and scores[best] >= NAME_WEIGHT:
+        return best, confidence
+    return None, confidence
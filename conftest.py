@@ -0,0 +1,18 @@
+import os
+import pytest
+
+# No network calls from tests: parse with the offline stub backend
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+
+@pytest.fixture(autouse=True)
+def isolated_files(tmp_path, monkeypatch):
+    """Run every test in its own directory so the app's CSV, SQLite and LLM cache files are never touched"""
+    monkeypatch.chdir(tmp_path)
+    import models
+    from llm_cache import LLMCache
+    monkeypatch.setattr(models, "llm_cache", LLMCache(str(tmp_path / "llm_cache.sqlite3")))
+    import storage
+    storage.set_store(storage.SqliteStore(str(tmp_path / "donations.sqlite3"), import_existing=False))
+    yield tmp_path
+    storage.set_store(None)
@@ -0,0 +1,357 @@
+import threading
+import weakref
+from datetime import datetime
+from typing import Dict, Optional
+from storage import (get_store, rows_to_frame, status_tuple, ACTIVE_STATUSES, DEFAULT_PAGE_SIZE, Page,
+                     OFFERING_COLUMNS, REQUEST_COLUMNS, USER_COLUMNS, Statuses)
+from search_index import SearchIndex, item_fields, record_fields
+import line_items
+from priority_queue import PriorityQueue
+
+
+class DataCache:
+    """
+    Process-wide read cache over the store for users, requests and offerings.
+
+    Every Streamlit session in the process shares it. Each table is loaded
+    once and kept with the store's version for that table (file stats for the
+    CSV store, write counters / SQLite data_version otherwise); a read only
+    reloads a table whose version changed. Users are also indexed by name for
+    O(1) lookups. Returned frames are shared, so treat them as read-only
+    (filtering creates a new frame and is fine).
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+        self._lock = threading.Lock()
+        self._tables: Dict[str, dict] = {}
+        self.loads = {'users': 0, 'requests': 0, 'offerings': 0}
+        # Search indexes over active requests / available offerings, the fields
+        # each indexed row had (to re-index only changed rows), the rows by id
+        # and the store version each index reflects
+        self._search = {'requests': SearchIndex(), 'offerings': SearchIndex()}
+        self._search_docs: Dict[str, dict] = {'requests': {}, 'offerings': {}}
+        self._search_rows: Dict[str, Dict[int, dict]] = {'requests': {}, 'offerings': {}}
+        self._search_synced: Dict[str, Optional[dict]] = {'requests': None, 'offerings': None}
+        # Active requests by urgency and time waiting, the (row, categories) each
+        # was queued with, and the store version the queue reflects
+        self._queue = PriorityQueue()
+        self._queued: Dict[int, tuple] = {}
+        self._queue_synced: Optional[dict] = None
+        # Stores that report their writes to _on_write
+        self._listening = weakref.WeakSet()
+        # Pages and counts fetched from the store, per table, dropped when its version changes
+        self._pages: Dict[str, dict] = {}
+
+    @property
+    def store(self):
+        return self._store or get_store()
+
+    def _load(self, table: str) -> dict:
+        """Cache entry for a table, reloading only if its version changed"""
+        store = self.store
+        version = store.version(table)
+        with self._lock:
+            entry = self._tables.get(table)
+            if entry is not None and entry['version'] == version and entry['store'] is store:
+                return entry
+            entry = {'version': version, 'store': store, 'frame': None}
+            if table == 'users':
+                rows = store.users()
+                entry['rows'] = rows
+                entry['by_name'] = {user["Name"]: user for user in rows}
+            else:
+                entry['frame'] = getattr(store, f"{table}_frame")()
+            self._tables[table] = entry
+            self.loads[table] += 1
+            return entry
+
+    def users(self):
+        """All users as a DataFrame"""
+        entry = self._load('users')
+        if entry['frame'] is None:
+            entry['frame'] = rows_to_frame(entry['rows'], USER_COLUMNS)
+        return entry['frame']
+
+    def user(self, name: str) -> Optional[dict]:
+        """One user's row (CSV column names) by name, or None"""
+        return self._load('users')['by_name'].get(name)
+
+    def user_type(self, name: str) -> Optional[str]:
+        user = self.user(name)
+        return user["User Type"] if user else None
+
+    def requests(self, status: Statuses = None, requester_name: Optional[str] = None):
+        frame = self._load('requests')['frame']
+        if status:
+            frame = frame[frame['status'].isin(status_tuple(status))]
+        if requester_name:
+            frame = frame[frame['requester_name'] == requester_name]
+        return frame
+
+    def offerings(self, available: Optional[bool] = None, donor_name: Optional[str] = None):
+        frame = self._load('offerings')['frame']
+        if available is not None:
+            frame = frame[frame['available'] == available]
+        if donor_name:
+            frame = frame[frame['donor_name'] == donor_name]
+        return frame
+
+    def _memo(self, table: str, key: tuple, fetch):
+        """fetch() result cached until the table's version changes (without loading the table)"""
+        store = self.store
+        version = store.version(table)
+        with self._lock:
+            memo = self._pages.get(table)
+            if memo is None or memo['version'] != version or memo['store'] is not store or len(memo['results']) > 256:
+                memo = self._pages[table] = {'version': version, 'store': store, 'results': {}}
+            if key in memo['results']:
+                return memo['results'][key]
+        result = fetch()
+        with self._lock:
+            memo['results'][key] = result
+        return result
+
+    def derived(self, table: str, key: tuple, compute):
+        """A value computed from a table (compute()), cached until that table's version changes"""
+        return self._memo(table, ('derived',) + tuple(key), compute)
+
+    def page_requests(self, status: Statuses = ACTIVE_STATUSES, urgency: Optional[str] = None,
+                      cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        """One page of requests, most urgent then oldest first (see SqliteStore.page_requests)"""
+        return self._memo('requests', ('page', status_tuple(status), urgency, cursor, limit),
+                          lambda: self.store.page_requests(status=status, urgency=urgency, cursor=cursor, limit=limit))
+
+    def page_offerings(self, available: Optional[bool] = True, cursor: Optional[str] = None,
+                       limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        """One page of offerings, newest first"""
+        return self._memo('offerings', ('page', available, cursor, limit),
+                          lambda: self.store.page_offerings(available=available, cursor=cursor, limit=limit))
+
+    def count_requests(self, status: Statuses = None, urgency: Optional[str] = None) -> int:
+        return self._memo('requests', ('count', status_tuple(status), urgency),
+                          lambda: self.store.count_requests(status=status, urgency=urgency))
+
+    def count_offerings(self, available: Optional[bool] = None) -> int:
+        return self._memo('offerings', ('count', available), lambda: self.store.count_offerings(available=available))
+
+    def line_items(self, parent_type: str = "request"):
+        """Typed line-item frame for requests (or offerings); shared, treat as read-only"""
+        return self._memo(f"{parent_type}s", ('line_items',), lambda: self.store.line_items_frame(parent_type))
+
+    def item_totals(self, parent_type: str = "request", by=('category',), since=None, status: Optional[str] = None,
+                    item: Optional[str] = None):
+        """Quantities grouped by `by` (see line_items.totals)"""
+        return line_items.totals(self.line_items(parent_type), by=by, since=since, status=status, item=item)
+
+    def _listen(self, store):
+        """Have store report its request and offering writes to the priority queue and search indexes"""
+        with self._lock:
+            if store in self._listening:
+                return
+            self._listening.add(store)
+        store.add_listener(lambda table, row, before, after: self._on_write(store, table, row, before, after))
+
+    def _on_write(self, store, table: str, row: dict, before, after):
+        self._search_write(store, table, row, before, after)
+        if table == 'requests':
+            self._queue_write(store, row, before, after)
+
+    def _queue_write(self, store, row: dict, before, after):
+        """
+        Push, re-rank or remove the one request just written. Applied only if
+        the queue was current right before the write; otherwise (another
+        process wrote too, or the row is not fully known) the next top_requests
+        call rebuilds the queue from the table.
+        """
+        with self._lock:
+            synced = self._queue_synced
+            if synced is None or synced['store'] is not store or synced['version'] != before:
+                return
+            doc_id = int(row['id'])
+            queued = self._queued.get(doc_id)
+            if 'line_items' in row:
+                fields = {column: row.get(column) for column in REQUEST_COLUMNS}
+                categories = tuple(sorted({item.get('category') for item in row['line_items']} - {None, ""}))
+            elif queued is not None:
+                fields = dict(queued[0], **{column: row[column] for column in REQUEST_COLUMNS if column in row})
+                categories = queued[1]
+            elif row.get('status') in ACTIVE_STATUSES:
+                # Re-opened, but we never had its row
+                return
+            else:
+                # Was not active and still is not
+                synced['version'] = after
+                return
+            if fields['status'] in ACTIVE_STATUSES:
+                self._queue.push(doc_id, fields['urgency'], datetime.fromisoformat(str(fields['created_at'])), categories)
+                self._queued[doc_id] = (fields, categories)
+            elif queued is not None:
+                self._queue.remove(doc_id)
+                del self._queued[doc_id]
+            synced['version'] = after
+
+    def _rebuild_queue(self, store):
+        """Queue every open or in-progress request of the current table (first use, or after writes we were not told about)"""
+        entry = self._load('requests')
+        items = self.line_items('request')
+        frame = entry['frame']
+        open_rows = frame[frame['status'].isin(ACTIVE_STATUSES)]
+        items = items[items['parent_id'].isin(open_rows['id'])]
+        categories = items.groupby('parent_id', observed=True)['category'].agg(
+            lambda values: tuple(sorted(set(values)))).to_dict()
+        with self._lock:
+            self._queue.clear()
+            self._queued = {}
+            for fields in open_rows.to_dict('records'):
+                doc_id = int(fields['id'])
+                cats = categories.get(fields['id'], ())
+                self._queue.push(doc_id, fields['urgency'], datetime.fromisoformat(str(fields['created_at'])), cats)
+                self._queued[doc_id] = (fields, cats)
+            self._queue_synced = {'store': store, 'version': entry['version']}
+
+    def top_requests(self, k: int = 10, category: Optional[str] = None):
+        """
+        The k most pressing open or in-progress requests (urgency, raised by time waiting) as
+        a frame, best first. Requests written through this process's store are
+        pushed to the queue as they are saved, so a read costs O(k log k)
+        instead of reloading the table after every change.
+        """
+        store = self.store
+        self._listen(store)
+        version = store.version('requests')
+        with self._lock:
+            synced = self._queue_synced
+            current = synced is not None and synced['store'] is store and synced['version'] == version
+        if not current:
+            self._rebuild_queue(store)
+        with self._lock:
+            rows = [self._queued[doc_id][0] for doc_id in self._queue.top_k(category, k)]
+        return rows_to_frame(rows, REQUEST_COLUMNS)
+
+    def _search_write(self, store, table: str, row: dict, before, after):
+        """
+        Re-index or drop the one request or offering just written, like
+        _queue_write: applied only if the index was current right before the
+        write, otherwise the next search rebuilds it from the table.
+        """
+        columns = REQUEST_COLUMNS if table == 'requests' else OFFERING_COLUMNS
+        with self._lock:
+            synced = self._search_synced[table]
+            if synced is None or synced['store'] is not store or synced['version'] != before:
+                return
+            index, indexed, rows = self._search[table], self._search_docs[table], self._search_rows[table]
+            doc_id = int(row['id'])
+            if 'line_items' in row:
+                fields = {column: row.get(column) for column in columns}
+                doc = item_fields(row['line_items']) if row['line_items'] else record_fields(fields['items'])
+            elif doc_id in rows and 'items' not in row:
+                fields = dict(rows[doc_id], **{column: row[column] for column in columns if column in row})
+                doc = indexed[doc_id]
+            elif doc_id in rows or _is_active(table, row):
+                # New items, or re-activated, without its line items
+                return
+            else:
+                # Was not active and still is not
+                synced['version'] = after
+                return
+            if _is_active(table, fields):
+                if indexed.get(doc_id) != doc:
+                    index.add(doc_id, doc)
+                    indexed[doc_id] = doc
+                rows[doc_id] = fields
+            elif doc_id in rows:
+                index.remove(doc_id)
+                del indexed[doc_id], rows[doc_id]
+            synced['version'] = after
+
+    def _rebuild_search(self, store, table: str):
+        """Index every active row of the current table (first use, or after writes we were not told about)"""
+        entry = self._load(table)
+        items = self.line_items(table[:-1])
+        frame = entry['frame']
+        if table == 'requests':
+            active = frame[frame['status'].isin(ACTIVE_STATUSES)]
+        else:
+            active = frame[frame['available'] == True]
+        items = items[items['parent_id'].isin(active['id'])].sort_values(['parent_id', 'position'])
+        line_items_by_id: Dict[int, list] = {}
+        for item in items[['parent_id', 'name', 'description', 'category']].to_dict('records'):
+            line_items_by_id.setdefault(item['parent_id'], []).append(item)
+        # Each row is indexed from its line items (names, descriptions and stored
+        # categories), or from the items text if it has none
+        rows = {int(fields['id']): fields for fields in active.to_dict('records')}
+        current = {
+            doc_id: item_fields(line_items_by_id[doc_id]) if doc_id in line_items_by_id else record_fields(fields['items'])
+            for doc_id, fields in rows.items()
+        }
+        with self._lock:
+            index, indexed = self._search[table], self._search_docs[table]
+            for doc_id in [doc_id for doc_id in indexed if doc_id not in current]:
+                index.remove(doc_id)
+                del indexed[doc_id]
+            for doc_id, doc in current.items():
+                if indexed.get(doc_id) != doc:
+                    index.add(doc_id, doc)
+                    indexed[doc_id] = doc
+            self._search_rows[table] = rows
+            self._search_synced[table] = {'store': store, 'version': entry['version']}
+
+    def _search_frame(self, table: str, query: str, limit: int):
+        """
+        Search results as a frame with a 'score' column. Rows written through
+        this process's store are re-indexed as they are saved, so a search
+        after a write does not reload the table.
+        """
+        store = self.store
+        self._listen(store)
+        version = store.version(table)
+        with self._lock:
+            synced = self._search_synced[table]
+            current = synced is not None and synced['store'] is store and synced['version'] == version
+        if not current:
+            self._rebuild_search(store, table)
+        with self._lock:
+            hits = self._search[table].search(query, limit)
+            rows = self._search_rows[table]
+            results = rows_to_frame([rows[doc_id] for doc_id, _ in hits],
+                                    REQUEST_COLUMNS if table == 'requests' else OFFERING_COLUMNS)
+        results['score'] = [score for _, score in hits]
+        return results
+
+    def search_requests(self, query: str, limit: int = 50):
+        """Open and in-progress requests matching query (typo tolerant, ranked), best first, with a 'score' column"""
+        return self._search_frame('requests', query, limit)
+
+    def search_offerings(self, query: str, limit: int = 50):
+        """Available offerings matching query (typo tolerant, ranked), best first, with a 'score' column"""
+        return self._search_frame('offerings', query, limit)
+
+    def invalidate(self, table: Optional[str] = None):
+        with self._lock:
+            if table:
+                self._tables.pop(table, None)
+                self._pages.pop(table, None)
+            else:
+                self._tables.clear()
+                self._pages.clear()
+            if table in (None, 'requests'):
+                self._queue_synced = None
+            for name in self._search_synced:
+                if table in (None, name):
+                    self._search_synced[name] = None
+
+
+def _is_active(table: str, row: dict) -> bool:
+    """Whether a request/offering row is searchable (open or in progress / available)"""
+    if table == 'requests':
+        return row.get('status') in ACTIVE_STATUSES
+    return row.get('available') in (True, "True")
+
+
+_data_cache = DataCache()
+
+
+def get_data_cache() -> DataCache:
+    """The cache shared by every page and session in this process"""
+    return _data_cache
@@ -1,20 +1,20 @@
 import streamlit as st
 import pandas as pd
 from models import CoordinationSystem, Donor, Shelter, TextParser
+from storage import get_store, ACTIVE_STATUSES
+from data_cache import get_data_cache
 import csv
 
 # Initialize coordination system
 if 'system' not in st.session_state:
     st.session_state.system = CoordinationSystem()
 
-# Load users from CSV
+# Load users from the shared data cache
 def load_user_from_csv(username):
-    """Load user information from CSV"""
-    df = pd.read_csv("user_information.csv", sep="|")
-    user_row = df[df["Name"] == username]
+    """Load user information (cached, O(1) by name)"""
+    user_data = get_data_cache().user(username)
     
-    if not user_row.empty:
-        user_data = user_row.iloc[0]
+    if user_data is not None:
         user_type = user_data["User Type"]
         name = user_data["Name"]
         location = user_data["Address"]
@@ -39,9 +39,7 @@ def donate_page():
     username = st.session_state.get("current_user")
     # user_type = st.session_state.get("user_type")
     name = st.session_state.current_user
-    df = pd.read_csv("user_information.csv", sep='|', engine="python")
-    user_row = df[df['Name'] == name]
-    user_type = user_row.iloc[0]['User Type']
+    user_type = get_data_cache().user_type(name)
     
     # Only allow Organizations and Volunteers to donate
     if user_type not in ["Organization", "Volunteer"]:
@@ -82,13 +80,8 @@ def donate_page():
         
         # Load and filter requests
         try:
-            requests_df = pd.read_csv("requests.csv")
-            
-            # Filter by search query
-            matching_requests = requests_df[
-                (requests_df['items'].str.contains(search_query, case=False, na=False)) &
-                (requests_df['status'] == 'open')
-            ]
+            # Ranked, typo-tolerant search over open requests
+            matching_requests = get_data_cache().search_requests(search_query)
             
             if not matching_requests.empty:
                 st.success(f"Found {len(matching_requests)} matching requests")
@@ -136,7 +129,7 @@ def donate_page():
                 with st.spinner("Analyzing your donation..."):
                     try:
                         # Parse the text to show preview
-                        parsed_items = TextParser.parse_text_to_items(donation_text)
+                        parsed_items = TextParser.parse_text_to_items(donation_text, backend=st.session_state.system.backend)
                         
                         st.write("**AI detected these items:**")
                         for item in parsed_items:
@@ -148,7 +141,10 @@ def donate_page():
                             with col3:
                                 st.write(f"{item.category.value}")
                         
-                        st.caption("✨ Parsed automatically using AI")
+                        if getattr(parsed_items, "tier", "llm") == "rules":
+                            st.caption("⚡ Parsed instantly with local rules")
+                        else:
+                            st.caption("✨ Parsed automatically using AI")
                     except Exception as e:
                         st.error(f"Error parsing items: {e}")
         
@@ -163,8 +159,7 @@ def donate_page():
                 with st.spinner("Creating your offering..."):
                     try:
                         # Create offering using models.py
-                        offering = user_obj.create_offering_from_text(donation_text)
-                        st.session_state.system.add_offering(offering)
+                        offering = st.session_state.system.create_offering_from_text(user_obj, donation_text)
                         
                         st.success("✅ Donation offering posted successfully!")
                         st.balloons()
@@ -189,12 +184,10 @@ def donate_page():
         st.subheader("All Open Requests")
         st.info("Browse current requests to see what's needed")
         
-        # Load requests from CSV
+        # Load one page of requests at a time (most urgent, then oldest first)
         try:
-            requests_df = pd.read_csv("requests.csv")
-            open_requests = requests_df[requests_df['status'] == 'open'].sort_values('urgency', ascending=False)
-            
-            if not open_requests.empty:
+            cache = get_data_cache()
+            if cache.count_requests(status=ACTIVE_STATUSES) > 0:
                 # Filter options
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -202,15 +195,35 @@ def donate_page():
                         "Filter by urgency",
                         ["All", "urgent", "high", "normal", "low"]
                     )
-                
-                # Apply filters
-                if urgency_filter != "All":
-                    open_requests = open_requests[open_requests['urgency'] == urgency_filter]
-                
-                st.write(f"**Showing {len(open_requests)} requests**")
-                
+                with col2:
+                    page_size = st.selectbox("Requests per page", [10, 25, 50], key="request_page_size")
+
+                # Cursors of the pages seen so far; start over when the filter or page size changes
+                urgency = None if urgency_filter == "All" else urgency_filter
+                view = (urgency, page_size)
+                if st.session_state.get("request_page_view") != view:
+                    st.session_state.request_page_view = view
+                    st.session_state.request_page_cursors = [None]
+                cursors = st.session_state.request_page_cursors
+
+                page = cache.page_requests(status=ACTIVE_STATUSES, urgency=urgency, cursor=cursors[-1], limit=page_size)
+                first = (len(cursors) - 1) * page_size
+                if page.rows:
+                    st.write(f"**Showing {first + 1}-{first + len(page.rows)} of {page.total} requests**")
+                else:
+                    st.write(f"**Showing 0 of {page.total} requests**")
+
+                # Urgency raised by time waiting, so old requests do not sink forever;
+                # only looked up when asked for, not on every page turn
+                if st.checkbox("🔥 Show the most pressing right now", key="show_top_requests"):
+                    for _, top in cache.top_requests(k=3).iterrows():
+                        st.write(f"**{top['requester_name']}** ({top['urgency']}, since {str(top['created_at'])[:10]}): {top['items']}")
+
+                # Looked up once for every row's fulfill button
+                donor_info = cache.user(name)
+
                 # Display requests in a nice format
-                for idx, row in open_requests.iterrows():
+                for row in page.rows:
                     urgency_emoji = {
                         'urgent': '🔴',
                         'high': '🟠',
@@ -224,7 +237,7 @@ def donate_page():
                         with col1:
                             st.markdown(f"### {urgency_emoji.get(row['urgency'], '⚪')} {row['requester_name']}")
                             st.write(f"**Needs:** {row['items']}")
-                            st.caption(f"📍 Posted on: {row['created_at'][:10]}")
+                            st.caption(f"📍 Posted on: {str(row['created_at'])[:10]}")
 
                         with col2:
                             st.write("")
@@ -238,35 +251,34 @@ def donate_page():
                                 st.info(f"ℹ️ {urgency_label}")
 
                         # --- Fulfill Button ---
-                        # donor_name = st.text_input(f"Your Name (for {row['requester_name']})", key=f"name_{idx}")
                         donor_name = st.session_state.current_user
-                        df = pd.read_csv("user_information.csv", sep='|', engine="python")
-                        user_row = df[df['Name'] == name]
-                        user_type = user_row.iloc[0]['User Type']
-                        donor_location = user_row.iloc[0]["Address"]
+                        donor_location = donor_info["Address"]
 
-                        donor_contact = user_row.iloc[0]["Phone Number"]
+                        donor_contact = donor_info["Phone Number"]
 
-                        if st.button(f"✅ Fulfill Request for {row['requester_name']}", key=f"fulfill_{idx}"):
+                        if st.button(f"✅ Fulfill Request for {row['requester_name']}", key=f"fulfill_{row['id']}"):
                             if not donor_name or not donor_location:
                                 st.error("Please enter your name and location before fulfilling the request.")
                             else:
-                                # Update request as fulfilled directly in the CSV
-                                open_requests.loc[idx, "status"] = "fulfilled"
-                                open_requests.loc[idx, "fulfilled_by"] = donor_name
-
-                                # Update the master file (so the change is saved)
-                                all_requests = pd.read_csv("requests.csv")
-                                all_requests.loc[all_requests['id'] == row['id'], ['status', 'fulfilled_by']] = [
-                                    "fulfilled", donor_name
-                                ]
-                                all_requests.to_csv("requests.csv", index=False)
+                                # Update just this request in the store (so the change is saved)
+                                get_store().update_request(row['id'], {'status': "fulfilled", 'fulfilled_by': donor_name})
 
                                 st.success(f"Request from {row['requester_name']} has been fulfilled by {donor_name}!")
                                 st.rerun()  # Refresh UI after fulfilling
 
                         st.divider()
 
+                # Page navigation
+                prev_col, next_col = st.columns(2)
+                with prev_col:
+                    if st.button("⬅️ Previous", key="request_page_prev", disabled=len(cursors) == 1):
+                        cursors.pop()
+                        st.rerun()
+                with next_col:
+                    if st.button("Next ➡️", key="request_page_next", disabled=page.next_cursor is None):
+                        cursors.append(page.next_cursor)
+                        st.rerun()
+
             else:
                 st.info("No open requests at this time")
         
@@ -281,8 +293,7 @@ def donate_page():
         
         # Count offerings by this user
         try:
-            offerings_df = pd.read_csv("offerings.csv")
-            user_offerings = offerings_df[offerings_df['donor_name'] == username]
+            user_offerings = get_data_cache().offerings(donor_name=username)
             
             col1, col2 = st.columns(2)
             with col1:
@@ -0,0 +1,216 @@
+import csv
+import io
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+from file_io import append_text, atomic_write, file_lock
+
+# Compact once this many events have piled up in a log
+DEFAULT_COMPACT_EVERY = 500
+
+
+def _csv_value(value) -> str:
+    """Render a value the way csv.DictWriter would store it"""
+    return "" if value is None else str(value)
+
+
+class EventLog:
+    """
+    Append-only change log with a materialized latest-state snapshot.
+
+    Every state change is appended as one JSON line (a full row upsert keyed
+    by `key`) to `<name>.log.jsonl` next to the snapshot CSV. Readers load
+    the snapshot plus the log tail and keep the result in memory, so later
+    reads only parse new log lines. compact() folds the log into the
+    snapshot: the log is first renamed aside (appends go to a fresh log), the
+    merged state is written to a temp file and swapped in, then the old log
+    is deleted. A snapshot that still contains duplicate rows (older files)
+    resolves to the last row per key.
+    """
+
+    def __init__(self, snapshot_path: str, fieldnames: List[str], key: str = "id",
+                 compact_every: int = DEFAULT_COMPACT_EVERY):
+        self.snapshot_path = snapshot_path
+        self.fieldnames = fieldnames
+        self.key = key
+        self.compact_every = compact_every
+        base, _ = os.path.splitext(snapshot_path)
+        self.log_path = base + ".log.jsonl"
+        self.compacting_path = base + ".log.compacting"
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        # Materialized state and what it was built from
+        self._rows: Dict[str, dict] = {}
+        self._source = None
+        self._log_offset = 0
+        # Events not yet folded into the snapshot
+        self._pending_events = 0
+
+    @staticmethod
+    def _stat(path: str):
+        try:
+            st = os.stat(path)
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def version(self):
+        """Stats of the snapshot and logs; equal versions mean nothing was written"""
+        return (self._stat(self.snapshot_path), self._stat(self.compacting_path), self._stat(self.log_path))
+
+    def _apply(self, rows: Dict[str, dict], record: dict):
+        row = {field: _csv_value(record.get(field)) for field in self.fieldnames}
+        rows[row[self.key]] = row
+
+    def _read_snapshot(self, rows: Dict[str, dict]):
+        try:
+            with open(self.snapshot_path, 'r', newline='', encoding='utf-8') as f:
+                for record in csv.DictReader(f):
+                    self._apply(rows, record)
+        except FileNotFoundError:
+            pass
+
+    def _read_log(self, path: str, rows: Dict[str, dict], offset: int = 0) -> (int, int):
+        """Apply complete lines from offset; returns (new offset, events applied)"""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return 0, 0
+        # A trailing partial line belongs to a writer that has not finished yet
+        end = data.rfind(b"\n") + 1
+        count = 0
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(rows, json.loads(line))
+                count += 1
+            except ValueError:
+                print(f"Skipping corrupt event in {path}")
+        return offset + end, count
+
+    def _refresh(self):
+        log_stat = self._stat(self.log_path)
+        source = (self._stat(self.snapshot_path), self._stat(self.compacting_path), log_stat[0] if log_stat else None)
+        if source == self._source:
+            # Only new log lines to read
+            if log_stat and log_stat[2] > self._log_offset:
+                self._log_offset, count = self._read_log(self.log_path, self._rows, self._log_offset)
+                self._pending_events += count
+            return
+        rows = {}
+        self._read_snapshot(rows)
+        _, compacting_count = self._read_log(self.compacting_path, rows)
+        self._log_offset, log_count = self._read_log(self.log_path, rows)
+        self._rows = rows
+        self._source = source
+        self._pending_events = compacting_count + log_count
+
+    def append(self, record: dict):
+        """Record the latest state of one row"""
+        line = json.dumps({field: record.get(field) for field in self.fieldnames}, default=str)
+        # Concurrent appends from other threads are written in one group commit
+        append_text(self.log_path, line + "\n")
+        with self._lock:
+            self._refresh()
+            if self._pending_events >= self.compact_every:
+                self.compact_in_background()
+
+    def update(self, key, changes: dict) -> Optional[dict]:
+        """Append a new version of row `key` with some fields changed; returns it (None if unknown)"""
+        # Read-modify-write under the snapshot lock so concurrent updates (from
+        # any process) do not overwrite each other's changes
+        with file_lock(self.snapshot_path):
+            current = self.get(key)
+            if current is None:
+                return None
+            row = dict(current, **{field: _csv_value(value) for field, value in changes.items()})
+            self.append(row)
+            return row
+
+    def get(self, key) -> Optional[dict]:
+        with self._lock:
+            self._refresh()
+            row = self._rows.get(_csv_value(key))
+            return dict(row) if row else None
+
+    def rows(self) -> List[dict]:
+        """Latest version of every row (values as CSV strings), in first-seen order"""
+        with self._lock:
+            self._refresh()
+            return [dict(row) for row in self._rows.values()]
+
+    def to_csv_text(self) -> str:
+        """The materialized state as CSV text (e.g. for pandas.read_csv)"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fieldnames)
+        writer.writeheader()
+        with self._lock:
+            self._refresh()
+            writer.writerows(self._rows.values())
+        return buffer.getvalue()
+
+    def read_dataframe(self):
+        """Materialized state as a pandas DataFrame with the same dtypes as reading the CSV directly"""
+        import pandas as pd
+        return pd.read_csv(io.StringIO(self.to_csv_text()))
+
+    def compact(self):
+        """Fold the log into the snapshot; appends and reads continue meanwhile"""
+        with self._compact_lock, file_lock(self.snapshot_path):
+            if not os.path.exists(self.compacting_path):
+                if not os.path.exists(self.log_path):
+                    return
+                # New appends land in a fresh log from here on; the log lock
+                # keeps the rename from splitting an in-flight group commit
+                with file_lock(self.log_path):
+                    os.replace(self.log_path, self.compacting_path)
+            # Readers see snapshot + compacting + log during the merge and
+            # snapshot (+ compacting again, which is idempotent) right after it
+            rows = {}
+            self._read_snapshot(rows)
+            self._read_log(self.compacting_path, rows)
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=self.fieldnames)
+            writer.writeheader()
+            writer.writerows(rows.values())
+            atomic_write(self.snapshot_path, buffer.getvalue())
+            os.remove(self.compacting_path)
+
+    def compact_in_background(self):
+        """Start compaction on a daemon thread unless one is already running"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self._compact_quietly, daemon=True)
+        self._compaction_thread.start()
+
+    def _compact_quietly(self):
+        try:
+            self.compact()
+        except Exception as e:
+            print(f"Error compacting {self.snapshot_path}: {e}")
+
+
+_logs: Dict[str, EventLog] = {}
+_logs_lock = threading.Lock()
+
+
+def get_event_log(snapshot_path: str, fieldnames: List[str], key: str = "id") -> EventLog:
+    """One shared EventLog per snapshot file in this process"""
+    with _logs_lock:
+        log = _logs.get(snapshot_path)
+        if log is None:
+            log = _logs[snapshot_path] = EventLog(snapshot_path, fieldnames, key)
+        return log
+
+
+if __name__ == "__main__":
+    # Compact the request/offering logs by hand (e.g. from cron)
+    from models import Request, Offering
+    for cls in (Request, Offering):
+        get_event_log(cls.CSV_FILE, cls.CSV_FIELDS).compact()
+        print(f"Compacted {cls.CSV_FILE}")
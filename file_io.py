@@ -0,0 +1,157 @@
+import contextlib
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+_thread_locks: Dict[str, threading.RLock] = {}
+_held = threading.local()
+_registry_lock = threading.Lock()
+
+
+def _lock_key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+@contextlib.contextmanager
+def file_lock(path: str):
+    """
+    Exclusive advisory lock for `path` (held on `path + ".lock"`).
+
+    Serializes writers across threads and processes. Re-entrant within a
+    thread, so a locked helper can call another helper that locks the same
+    path.
+    """
+    key = _lock_key(path)
+    with _registry_lock:
+        thread_lock = _thread_locks.setdefault(key, threading.RLock())
+    held = getattr(_held, "counts", None)
+    if held is None:
+        held = _held.counts = {}
+    with thread_lock:
+        if held.get(key):
+            held[key] += 1
+            try:
+                yield
+            finally:
+                held[key] -= 1
+            return
+        lock_file = open(key + ".lock", "a")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            held[key] = 1
+            try:
+                yield
+            finally:
+                held[key] = 0
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        finally:
+            lock_file.close()
+
+
+def atomic_write(path: str, data: str, encoding: str = "utf-8", fsync: bool = True):
+    """Replace `path` with `data` via temp file + rename, so readers never see a partial file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding, newline="") as f:
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+class GroupCommitAppender:
+    """
+    Appends to one file with group commit.
+
+    Threads that append while a write is in flight queue their data; when the
+    write finishes, one of them becomes the leader and writes everything
+    queued in a single locked open/write/fsync, then wakes the others. Every
+    append() returns only once its data is on disk (or raises the write
+    error). `header` is written first when the file is missing or empty.
+    Do not append while holding file_lock() on the same path: the leader
+    may be another thread that needs that lock.
+    """
+
+    def __init__(self, path: str, header: str = "", fsync: bool = True, encoding: str = "utf-8"):
+        self.path = path
+        self.header = header
+        self.fsync = fsync
+        self.encoding = encoding
+        self.batches = 0
+        self._cond = threading.Condition()
+        self._pending = []
+        self._collecting = 0
+        self._committed = -1
+        self._writing = False
+        self._errors: Dict[int, BaseException] = {}
+
+    def append(self, data: str):
+        with self._cond:
+            batch = self._collecting
+            self._pending.append(data)
+            while self._writing and self._committed < batch:
+                self._cond.wait()
+            if self._committed >= batch:
+                error = self._errors.get(batch)
+                if error is not None:
+                    raise error
+                return
+            # Leader: take everything queued so far
+            chunks, self._pending = self._pending, []
+            self._collecting += 1
+            self._writing = True
+        error = None
+        try:
+            self._write("".join(chunks))
+        except BaseException as e:
+            error = e
+        with self._cond:
+            self._committed = batch
+            self._writing = False
+            self.batches += 1
+            if error is not None:
+                self._errors = {batch: error}
+            self._cond.notify_all()
+        if error is not None:
+            raise error
+
+    def _write(self, data: str):
+        with file_lock(self.path):
+            with open(self.path, "a", encoding=self.encoding, newline="") as f:
+                if self.header and f.tell() == 0:
+                    f.write(self.header)
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+
+_appenders: Dict[str, GroupCommitAppender] = {}
+
+
+def get_appender(path: str, header: str = "") -> GroupCommitAppender:
+    """Shared appender per file, so all writers in the process commit together"""
+    key = _lock_key(path)
+    with _registry_lock:
+        appender = _appenders.get(key)
+        if appender is None:
+            appender = _appenders[key] = GroupCommitAppender(path, header=header)
+        return appender
+
+
+def append_text(path: str, data: str, header: str = ""):
+    get_appender(path, header).append(data)
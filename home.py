@@ -7,14 +7,11 @@ import os
 import folium
 from geopy.geocoders import Nominatim
 import streamlit.components.v1 as components
+from data_cache import get_data_cache
 
 USERS_FILE = "user_information.csv"
 def load_users():
-    if os.path.exists(USERS_FILE):
-        df = pd.read_csv(USERS_FILE, sep="|")
-        return df
-    else:
-        return pd.DataFrame(columns=["Name", "Password", "Description", "Address", "Link", "Phone Number", "Categories", "User Type"])
+    return get_data_cache().users()
 
 def home_page():
     st.title("Dashboard")
@@ -0,0 +1,129 @@
+from typing import Callable, Dict, Iterable, List
+
+
+class AttributeIndex:
+    """
+    Secondary indexes over a collection of objects.
+
+    Each field has an extractor returning the object's value(s) for that
+    field (a single value or an iterable for multi-valued fields such as item
+    categories). Buckets map value -> {object id: object}, so a query walks
+    only the smallest matching bucket and checks the other fields with dict
+    lookups. Call update() whenever an indexed attribute changes.
+    """
+
+    def __init__(self, extractors: Dict[str, Callable]):
+        self.extractors = extractors
+        self._buckets: Dict[str, Dict[object, dict]] = {field: {} for field in extractors}
+        # Object id -> {field: set of values currently indexed}
+        self._keys: Dict[int, Dict[str, set]] = {}
+        # Indexed objects in insertion order, and their insertion sequence for sorting results
+        self._objects: Dict[int, object] = {}
+        self._order: Dict[int, int] = {}
+        self._next = 0
+
+    @staticmethod
+    def _as_set(value) -> set:
+        if isinstance(value, (set, frozenset, list, tuple)):
+            return set(value)
+        return {value}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, obj) -> bool:
+        return obj.id in self._keys
+
+    def get(self, obj_id):
+        """Indexed object by id, or None"""
+        return self._objects.get(obj_id)
+
+    def update(self, obj):
+        """Add obj or move it to the buckets matching its current attributes"""
+        if obj.id not in self._order:
+            self._objects[obj.id] = obj
+            self._order[obj.id] = self._next
+            self._next += 1
+        old = self._keys.get(obj.id, {})
+        new = {}
+        for field, extract in self.extractors.items():
+            values = self._as_set(extract(obj))
+            new[field] = values
+            buckets = self._buckets[field]
+            for value in old.get(field, set()) - values:
+                bucket = buckets[value]
+                bucket.pop(obj.id, None)
+                if not bucket:
+                    del buckets[value]
+            for value in values - old.get(field, set()):
+                buckets.setdefault(value, {})[obj.id] = obj
+        self._keys[obj.id] = new
+
+    def remove(self, obj):
+        old = self._keys.pop(obj.id, None)
+        self._objects.pop(obj.id, None)
+        self._order.pop(obj.id, None)
+        if old is None:
+            return
+        for field, values in old.items():
+            buckets = self._buckets[field]
+            for value in values:
+                bucket = buckets[value]
+                bucket.pop(obj.id, None)
+                if not bucket:
+                    del buckets[value]
+
+    def _matching(self, field: str, values) -> List[dict]:
+        """Buckets for the requested values (an object is in at most one bucket per value)"""
+        buckets = self._buckets[field]
+        return [buckets[value] for value in self._as_set(values) if value in buckets]
+
+    def query(self, **criteria) -> List:
+        """
+        Objects matching every given field (None means "any"); a set/tuple/list
+        of values matches any of them. Results are in insertion order.
+        """
+        criteria = {field: values for field, values in criteria.items() if values is not None}
+        for field in criteria:
+            if field not in self.extractors:
+                raise KeyError(f"Unknown index field: {field}")
+        if not criteria:
+            return list(self._objects.values())
+
+        groups = sorted((self._matching(field, values) for field, values in criteria.items()),
+                        key=lambda group: sum(len(bucket) for bucket in group))
+        driver, others = groups[0], groups[1:]
+        if not driver:
+            return []
+        # Candidates from the smallest group, then narrowed one field at a time
+        candidates = dict(driver[0]) if len(driver) == 1 else {k: v for bucket in driver for k, v in bucket.items()}
+        for group in others:
+            if len(group) == 1:
+                bucket = group[0]
+                candidates = {k: v for k, v in candidates.items() if k in bucket}
+            else:
+                candidates = {k: v for k, v in candidates.items() if any(k in bucket for bucket in group)}
+            if not candidates:
+                return []
+        results = list(candidates.values())
+        results.sort(key=lambda obj: self._order[obj.id])
+        return results
+
+    def count(self, **criteria) -> int:
+        criteria = {field: values for field, values in criteria.items() if values is not None}
+        if len(criteria) == 1:
+            field, values = next(iter(criteria.items()))
+            group = self._matching(field, values)
+            if len(group) <= 1:
+                return sum(len(bucket) for bucket in group)
+        return len(self.query(**criteria))
+
+    def values(self, field: str) -> Iterable:
+        """Distinct values currently present for a field"""
+        return list(self._buckets[field])
+
+    def clear(self):
+        self._buckets = {field: {} for field in self.extractors}
+        self._keys.clear()
+        self._objects.clear()
+        self._order.clear()
@@ -0,0 +1,115 @@
+import re
+import sys
+from typing import Iterable, List, Optional
+from categorizer import classify_local
+
+# One row per item of a request/offering; parent_type is "request" or "offering"
+# allocated: units already promised to/from another party (Item.allocated)
+LINE_ITEM_COLUMNS = ['parent_type', 'parent_id', 'position', 'name', 'quantity', 'unit', 'category', 'description',
+                     'allocated']
+# Columns joined from the parent row when reading line items back
+PARENT_COLUMNS = ['status', 'created_at']
+
+# Per-column types for frames and the Parquet export
+LINE_ITEM_DTYPES = {
+    'parent_type': 'category',
+    'parent_id': 'int64',
+    'position': 'int16',
+    'name': 'string',
+    'quantity': 'int64',
+    'unit': 'category',
+    'category': 'category',
+    'description': 'string',
+    'allocated': 'int64',
+    'status': 'category',
+}
+
+_ITEM_RE = re.compile(r"^(.*?)\s*\((\d+)\)\s*$")
+
+
+def line_item_rows(items: Iterable[dict]) -> List[dict]:
+    """Line items from Item.to_dict() dicts, numbered in order"""
+    return [{
+        'position': position,
+        'name': item['name'],
+        'quantity': int(item.get('quantity') or 0),
+        'unit': item.get('unit') or "",
+        'category': item.get('category') or "other",
+        'description': item.get('description') or "",
+        'allocated': int(item.get('allocated') or 0),
+    } for position, item in enumerate(items)]
+
+
+def parse_items_text(items_text: str) -> List[dict]:
+    """
+    Line items recovered from a flattened items column ("Warm Blanket (9); Canned Soup (5)"),
+    for rows stored before line items existed. Categories come from the local lexicon.
+    """
+    items = []
+    for part in str(items_text or "").split(";"):
+        part = part.strip()
+        if not part or part == "nan":
+            continue
+        match = _ITEM_RE.match(part)
+        name, quantity = (match.group(1), int(match.group(2))) if match else (part, 1)
+        items.append({'name': name, 'quantity': quantity, 'category': classify_local(name)[0] or "other"})
+    return line_item_rows(items)
+
+
+def row_line_items(row: dict) -> List[dict]:
+    """A stored request/offering row's line items: its 'line_items' if present, else parsed from 'items'"""
+    if row.get('line_items') is not None:
+        return line_item_rows(row['line_items'])
+    return parse_items_text(row.get('items'))
+
+
+def to_frame(rows: List[dict]):
+    """Typed DataFrame of line-item rows (categoricals for the low-cardinality columns)"""
+    import pandas as pd
+    frame = pd.DataFrame(rows, columns=LINE_ITEM_COLUMNS + PARENT_COLUMNS)
+    frame = frame.astype(LINE_ITEM_DTYPES)
+    frame['created_at'] = pd.to_datetime(frame['created_at'], errors='coerce')
+    return frame
+
+
+def totals(frame, by=('category',), since=None, status: Optional[str] = None, item: Optional[str] = None):
+    """
+    Total quantity grouped by `by` columns, e.g. blankets requested per
+    category this week: totals(frame, since=week_start, item="blanket").
+    `item` matches item names case-insensitively.
+    """
+    mask = None
+    if since is not None:
+        import pandas as pd
+        mask = frame['created_at'] >= pd.Timestamp(since)
+    if status:
+        condition = frame['status'] == status
+        mask = condition if mask is None else mask & condition
+    if item:
+        condition = frame['name'].str.contains(item, case=False, regex=False).fillna(False)
+        mask = condition if mask is None else mask & condition
+    if mask is not None:
+        frame = frame[mask]
+    return frame.groupby(list(by), observed=True)['quantity'].sum().reset_index()
+
+
+def write_parquet(frame, path: str) -> bool:
+    """Write a line-item frame to Parquet (needs pyarrow); returns False if it is not installed"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("pyarrow is not installed; cannot write Parquet")
+        return False
+    frame.to_parquet(path, index=False)
+    return True
+
+
+if __name__ == "__main__":
+    # Export line items for analysis: python line_items.py [request_items.parquet] [offering_items.parquet]
+    from storage import get_store
+    store = get_store()
+    for parent_type, path in zip(("request", "offering"),
+                                 sys.argv[1:] or ["request_items.parquet", "offering_items.parquet"]):
+        frame = store.line_items_frame(parent_type)
+        if write_parquet(frame, path):
+            print(f"Wrote {len(frame)} {parent_type} line items to {path}")
@@ -0,0 +1,266 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Callable, Dict, Optional, Union
+from categorizer import classify_local
+from file_io import atomic_write, file_lock
+from rule_parser import parse_quantities, detect_urgency, whole_units
+from text_utils import normalize_tokens
+
+DEFAULT_MODEL_NAME = "gemini-2.0-flash-lite"
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a prompt was never recorded"""
+
+
+class LLMBackend:
+    """
+    Interface every LLM backend implements.
+
+    `task` names the kind of prompt ("parse", "category", "categorize_batch",
+    "match", "message") so offline backends can answer without understanding
+    free text. Real backends ignore it.
+    """
+    model_name = "base"
+
+    def generate(self, prompt: str, task: str = "") -> str:
+        raise NotImplementedError
+
+    async def generate_async(self, prompt: str, task: str = "") -> str:
+        return await asyncio.to_thread(self.generate, prompt, task)
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini backend; the SDK is configured on first use, not at import"""
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, api_key: Optional[str] = None):
+        self.model_name = model_name
+        self.api_key = api_key or os.environ.get("GEMINI_API_KEY", "API_KEY")
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt: str, task: str = "") -> str:
+        return self._get_model().generate_content(prompt).text
+
+    async def generate_async(self, prompt: str, task: str = "") -> str:
+        response = await self._get_model().generate_content_async(prompt)
+        return response.text
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic local backend for offline runs, benchmarks and load tests.
+
+    Answers are computed from the prompt with the rule parser and category
+    lexicon, so the same prompt always yields the same response. `latency`
+    adds a fixed sleep per call to model a remote round trip, and `responses`
+    overrides individual tasks with a fixed string or a callable(prompt).
+    """
+    model_name = "local-stub"
+
+    def __init__(self, latency: float = 0.0, responses: Optional[Dict[str, Union[str, Callable[[str], str]]]] = None):
+        self.latency = latency
+        self.responses = responses or {}
+        self.calls = 0
+
+    def generate(self, prompt: str, task: str = "") -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(prompt, task)
+
+    async def generate_async(self, prompt: str, task: str = "") -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(prompt, task)
+
+    def _respond(self, prompt: str, task: str) -> str:
+        override = self.responses.get(task)
+        if override is not None:
+            return override(prompt) if callable(override) else override
+        handler = getattr(self, f"_task_{task}", None)
+        return handler(prompt) if handler else ""
+
+    @staticmethod
+    def _quoted(prompt: str, label: str) -> str:
+        match = re.search(label + r': "(.*?)"\n', prompt, re.DOTALL)
+        return match.group(1) if match else prompt
+
+    def _task_parse(self, prompt: str) -> str:
+        text = self._quoted(prompt, "USER TEXT")
+        parsed, _ = parse_quantities(text)
+        items = [{
+            'name': p.item.title(),
+            'quantity': whole_units(p.quantity),
+            'description': p.source,
+            'category': classify_local(p.item)[0] or 'other',
+            'unit': p.unit
+        } for p in parsed]
+        if not items:
+            name = text[:50] + "..." if len(text) > 50 else text
+            items = [{'name': name, 'quantity': 1, 'description': "Stub parse", 'category': classify_local(text)[0] or 'other'}]
+        return json.dumps({'items': items, 'urgency': detect_urgency(text)})
+
+    def _task_category(self, prompt: str) -> str:
+        name = re.search(r"^Item: (.*)$", prompt, re.MULTILINE)
+        description = re.search(r"^Description: (.*)$", prompt, re.MULTILINE)
+        category, _ = classify_local(name.group(1) if name else "", description.group(1) if description else "")
+        return category or 'other'
+
+    def _task_categorize_batch(self, prompt: str) -> str:
+        section = prompt.split("ITEMS:", 1)[1].split("\n\n", 1)[0] if "ITEMS:" in prompt else ""
+        categories = []
+        for line in section.splitlines():
+            match = re.match(r"\s*\d+\.\s*(.*)", line)
+            if match:
+                categories.append(classify_local(match.group(1))[0] or 'other')
+        return json.dumps(categories)
+
+    def _task_match(self, prompt: str) -> str:
+        # Request/offering lines look like "<label>. <name> in <location> needs|offers: <items>"
+        requests, offerings = [], []
+        for line in prompt.splitlines():
+            match = re.match(r"\s*(\S+)\. .*? (needs|offers): (.*?)(?: \[Urgency: .*\])?$", line)
+            if not match:
+                continue
+            items = [set(normalize_tokens(re.sub(r"\(qty: \d+\)", "", item))) for item in match.group(3).split(", ")]
+            (requests if match.group(2) == "needs" else offerings).append((match.group(1), items))
+
+        lines = []
+        for req_label, req_items in requests:
+            for off_label, off_items in offerings:
+                offered = set().union(*off_items) if off_items else set()
+                covered = [tokens & offered for tokens in req_items if tokens & offered]
+                if not covered:
+                    continue
+                score = max(0.5, round(len(covered) / len(req_items), 2))
+                shared = sorted(set().union(*covered))
+                lines.append(f"{req_label},{off_label},{score},Shared items: {' '.join(shared)}")
+        return "\n".join(lines)
+
+    def _task_message(self, prompt: str) -> str:
+        recipient = re.search(r"^TO: (.*?) \(", prompt, re.MULTILINE)
+        context = re.search(r"^CONTEXT: (.*)$", prompt, re.MULTILINE)
+        name = recipient.group(1) if recipient else "there"
+        about = context.group(1) if context else "your post"
+        return f"Hi {name}, I'd like to help with {about}. When would be a good time to coordinate?"
+
+
+class CassetteBackend(LLMBackend):
+    """
+    Record/replay backend.
+
+    mode="record" calls the inner backend and stores every response,
+    mode="replay" serves only recorded responses (raising CassetteMiss
+    otherwise) and mode="auto" replays when possible and records the rest.
+    With replay_latency=True replays sleep for the recorded call time, which
+    gives reproducible latency numbers without network access.
+    """
+
+    def __init__(self, path: str, inner: Optional[LLMBackend] = None, mode: str = "auto", replay_latency: bool = False):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode != "replay" and inner is None:
+            raise ValueError("Recording needs an inner backend")
+        self.path = path
+        self.inner = inner
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._entries = data.get('entries', {})
+            self._recorded_model = data.get('model_name')
+        else:
+            self._recorded_model = None
+
+    @property
+    def model_name(self):
+        if self.inner is not None:
+            return self.inner.model_name
+        return self._recorded_model or "cassette"
+
+    def _key(self, prompt: str, task: str) -> str:
+        return hashlib.sha256(f"{task}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _save(self):
+        with file_lock(self.path):
+            atomic_write(self.path, json.dumps({'model_name': self.model_name, 'entries': self._entries}, indent=1), fsync=False)
+
+    def _lookup(self, prompt: str, task: str):
+        key = self._key(prompt, task)
+        entry = self._entries.get(key) if self.mode != "record" else None
+        if entry is not None:
+            self.hits += 1
+            return key, entry
+        self.misses += 1
+        if self.mode == "replay":
+            raise CassetteMiss(f"No recorded response for {task or 'prompt'} {key[:12]}")
+        return key, None
+
+    def _record(self, key: str, task: str, response: str, elapsed: float):
+        self._entries[key] = {'task': task, 'response': response, 'latency': round(elapsed, 4)}
+        self._save()
+
+    def generate(self, prompt: str, task: str = "") -> str:
+        key, entry = self._lookup(prompt, task)
+        if entry is not None:
+            if self.replay_latency:
+                time.sleep(entry.get('latency', 0.0))
+            return entry['response']
+        start = time.perf_counter()
+        response = self.inner.generate(prompt, task)
+        self._record(key, task, response, time.perf_counter() - start)
+        return response
+
+    async def generate_async(self, prompt: str, task: str = "") -> str:
+        key, entry = self._lookup(prompt, task)
+        if entry is not None:
+            if self.replay_latency:
+                await asyncio.sleep(entry.get('latency', 0.0))
+            return entry['response']
+        start = time.perf_counter()
+        response = await self.inner.generate_async(prompt, task)
+        self._record(key, task, response, time.perf_counter() - start)
+        return response
+
+
+_default_backend = None
+
+
+def backend_from_env() -> LLMBackend:
+    """
+    Build a backend from LLM_BACKEND: "gemini" (default), "stub", or
+    "cassette:<path>" (replays, recording misses through Gemini)
+    """
+    spec = os.environ.get("LLM_BACKEND", "gemini")
+    if spec == "stub":
+        return StubBackend()
+    if spec.startswith("cassette:"):
+        return CassetteBackend(spec.split(":", 1)[1], inner=GeminiBackend(), mode="auto")
+    return GeminiBackend()
+
+
+def get_default_backend() -> LLMBackend:
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = backend_from_env()
+    return _default_backend
+
+
+def set_default_backend(backend: LLMBackend):
+    global _default_backend
+    _default_backend = backend
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class LLMCache:
+    """Persistent, content-addressed cache for LLM responses.
+
+    Entries are keyed by a hash of the normalized input text, the prompt
+    version and the model name, so editing a prompt or switching models
+    never serves stale answers. A small in-memory LRU sits in front of the
+    SQLite file so repeated Streamlit reruns are served without disk I/O.
+    """
+
+    def __init__(self, path: str = "llm_cache.sqlite3", max_entries: int = 5000,
+                 ttl_seconds: Optional[float] = 30 * 24 * 3600, memory_entries: int = 256,
+                 enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        # LLM_CACHE_BYPASS=1 turns the cache off without touching code
+        self.enabled = enabled and os.environ.get("LLM_CACHE_BYPASS", "") not in ("1", "true", "yes")
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Collapse whitespace and case so trivially different inputs share an entry"""
+        return " ".join(str(text).lower().split())
+
+    @classmethod
+    def make_key(cls, kind: str, text: str, prompt_version: str, model_name: str) -> str:
+        raw = "\x00".join([kind, prompt_version, model_name, cls.normalize(text)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, value: Any, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, kind: str, text: str, prompt_version: str, model_name: str) -> Optional[Any]:
+        """Return the cached value or None (and count a miss)"""
+        if not self.enabled:
+            return None
+        key = self.make_key(kind, text, prompt_version, model_name)
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None and not self._expired(cached[1], now):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                if self._expired(row[1], now):
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    conn.commit()
+                    self._memory.pop(key, None)
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+                value = json.loads(row[0])
+            except sqlite3.Error as e:
+                print(f"LLM cache read error: {e}")
+                self.misses += 1
+                return None
+
+            self._remember(key, value, row[1])
+            self.hits += 1
+            return value
+
+    def put(self, kind: str, text: str, prompt_version: str, model_name: str, value: Any):
+        """Store a JSON-serializable value, evicting least recently used entries past max_entries"""
+        if not self.enabled:
+            return
+        key = self.make_key(kind, text, prompt_version, model_name)
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"LLM cache write error: {e}")
+
+    def _evict(self, conn, now: float):
+        if self.ttl_seconds is not None:
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"LLM cache clear error: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'memory_entries': len(self._memory),
+            'enabled': self.enabled
+        }
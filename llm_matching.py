@@ -0,0 +1,177 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Set
+
+# Rough size of the fixed instructions in a chunk prompt, in tokens
+PROMPT_OVERHEAD_TOKENS = 250
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token is close enough for budgeting prompts"""
+    return len(text) // 4 + 1
+
+
+def request_line(request) -> str:
+    items = ", ".join([f"{item.name} (qty: {item.remaining})" for item in request.items if item.remaining > 0])
+    return f"R{request.id}. {request.requester.name} in {request.requester.location} needs: {items} [Urgency: {request.urgency}]"
+
+
+def offering_line(offering) -> str:
+    items = ", ".join([f"{item.name} (qty: {item.remaining})" for item in offering.items if item.remaining > 0])
+    return f"O{offering.id}. {offering.donor.name} in {offering.donor.location} offers: {items}"
+
+
+def candidate_pairs(matcher, requests) -> Dict[int, List[int]]:
+    """Request id -> offering ids that share an item or category with it (from the local index)"""
+    pairs = {}
+    for request in requests:
+        candidates = sorted(matcher.candidates(request))
+        if candidates:
+            pairs[request.id] = candidates
+    return pairs
+
+
+def pack_chunks(requests_by_id: dict, offerings_by_id: dict, pairs: Dict[int, List[int]],
+                token_budget: int = 3000) -> List[Dict[int, List[int]]]:
+    """
+    Greedily pack request -> candidate-offerings groups into chunks whose prompt
+    stays under token_budget. A request whose candidates alone exceed the
+    budget is split across several chunks.
+    """
+    budget = max(1, token_budget - PROMPT_OVERHEAD_TOKENS)
+    line_tokens = {}
+
+    def cost(kind, obj_id):
+        key = (kind, obj_id)
+        if key not in line_tokens:
+            line = request_line(requests_by_id[obj_id]) if kind == "R" else offering_line(offerings_by_id[obj_id])
+            # Offering lines also appear once more in the candidate list
+            line_tokens[key] = estimate_tokens(line) + 4
+        return line_tokens[key]
+
+    chunks = []
+    current: Dict[int, List[int]] = {}
+    used = 0
+    seen_offerings: Set[int] = set()
+    for request_id, offering_ids in pairs.items():
+        pending = list(offering_ids)
+        while pending:
+            request_cost = cost("R", request_id)
+            added = []
+            for offering_id in pending:
+                extra = 0 if offering_id in seen_offerings else cost("O", offering_id)
+                needed = extra + (request_cost if not added else 0) + 4
+                if used + needed > budget and (current or added):
+                    break
+                used += needed
+                seen_offerings.add(offering_id)
+                added.append(offering_id)
+            if added:
+                current.setdefault(request_id, []).extend(added)
+                pending = pending[len(added):]
+            if pending:
+                # Chunk is full: start a new one
+                chunks.append(current)
+                current, used, seen_offerings = {}, 0, set()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_chunk_prompt(chunk: Dict[int, List[int]], requests_by_id: dict, offerings_by_id: dict) -> str:
+    offering_ids = sorted({offering_id for ids in chunk.values() for offering_id in ids})
+    requests_info = "\n".join(request_line(requests_by_id[request_id]) for request_id in chunk)
+    offerings_info = "\n".join(offering_line(offerings_by_id[offering_id]) for offering_id in offering_ids)
+    pairs_info = "\n".join(f"R{request_id}: {', '.join(f'O{o}' for o in ids)}" for request_id, ids in chunk.items())
+    return f"""You are a smart matching system for a donation coordination platform.
+
+REQUESTS:
+{requests_info}
+
+OFFERINGS:
+{offerings_info}
+
+CANDIDATE PAIRS (only consider these):
+{pairs_info}
+
+Analyze these candidate pairs. Find the best matches considering:
+1. Item compatibility (similar or matching items)
+2. Quantity availability
+3. Urgency level (prioritize urgent/high requests)
+4. Location proximity
+
+Return matches in this exact format (one per line), using the R/O ids above:
+REQUEST_ID,OFFERING_ID,CONFIDENCE_SCORE,REASON
+
+Example: R12,O34,0.9,Exact match on blankets with sufficient quantity and close location
+
+Only return matches with confidence >= 0.5"""
+
+
+def _parse_id(raw: str, prefix: str) -> int:
+    raw = raw.strip()
+    if raw[:1].upper() == prefix:
+        raw = raw[1:]
+    return int(raw)
+
+
+def parse_chunk_response(response_text: str, chunk: Dict[int, List[int]]) -> List[tuple]:
+    """Return (request_id, offering_id, confidence, reason) for valid candidate pairs only"""
+    allowed = {(request_id, offering_id) for request_id, ids in chunk.items() for offering_id in ids}
+    results = []
+    for line in response_text.strip().split('\n'):
+        if ',' not in line:
+            continue
+        try:
+            parts = line.split(',', 3)
+            request_id = _parse_id(parts[0], "R")
+            offering_id = _parse_id(parts[1], "O")
+            confidence = float(parts[2].strip())
+            reason = parts[3].strip() if len(parts) > 3 else ""
+        except (ValueError, IndexError):
+            continue
+        if (request_id, offering_id) in allowed and confidence >= 0.5:
+            results.append((request_id, offering_id, confidence, reason))
+    return results
+
+
+def chunked_llm_match(backend, matcher, requests, offerings, token_budget: int = 3000, max_workers: int = 4) -> List[dict]:
+    """
+    Pre-filter pairs with the local index, pack them into token-budgeted
+    prompts and send the prompts in parallel. Results are merged by stable
+    request/offering id, keeping the highest confidence per pair.
+    """
+    requests_by_id = {request.id: request for request in requests}
+    offerings_by_id = {offering.id: offering for offering in offerings}
+    pairs = candidate_pairs(matcher, requests)
+    # Drop candidates that are no longer available
+    pairs = {r: [o for o in ids if o in offerings_by_id] for r, ids in pairs.items()}
+    pairs = {r: ids for r, ids in pairs.items() if ids}
+    chunks = pack_chunks(requests_by_id, offerings_by_id, pairs, token_budget)
+    if not chunks:
+        return []
+
+    def run(chunk):
+        try:
+            prompt = build_chunk_prompt(chunk, requests_by_id, offerings_by_id)
+            return parse_chunk_response(backend.generate(prompt, task="match"), chunk)
+        except Exception as e:
+            print(f"AI matching chunk error: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        chunk_results = list(pool.map(run, chunks))
+
+    merged = {}
+    for results in chunk_results:
+        for request_id, offering_id, confidence, reason in results:
+            key = (request_id, offering_id)
+            if key not in merged or confidence > merged[key]['confidence']:
+                merged[key] = {
+                    'request': requests_by_id[request_id],
+                    'offering': offerings_by_id[offering_id],
+                    'request_id': request_id,
+                    'offering_id': offering_id,
+                    'confidence': confidence,
+                    'reason': reason
+                }
+    return sorted(merged.values(), key=lambda m: (-m['confidence'], m['request_id'], m['offering_id']))
@@ -9,6 +9,7 @@ import os
 import folium
 from geopy.geocoders import Nominatim
 import streamlit.components.v1 as components
+from data_cache import get_data_cache
 
 
 # Set page config
@@ -34,9 +35,7 @@ if not st.session_state.logged_in:
 else:
 
     name = st.session_state.current_user
-    df = pd.read_csv("user_information.csv", sep='|', engine="python")
-    user_row = df[df['Name'] == name]
-    user_type = user_row.iloc[0]['User Type']
+    user_type = get_data_cache().user_type(name)
     print(user_type)
     
     with st.sidebar:
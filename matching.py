@@ -0,0 +1,385 @@
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from text_utils import normalize_tokens
+
+URGENCY_WEIGHTS = {'low': 0.25, 'normal': 0.5, 'high': 0.75, 'urgent': 1.0}
+
+# Words that say nothing about what the item is
+STOP_TOKENS = {"of", "and", "for", "the", "a", "an", "with", "some", "assorted", "misc", "item", "supply"}
+
+DEFAULT_WEIGHTS = {'item': 0.55, 'quantity': 0.2, 'urgency': 0.15, 'age': 0.1}
+
+
+class ItemSignature:
+    """Normalized view of an Item used for indexing and scoring"""
+    __slots__ = ("tokens", "head", "category", "quantity")
+
+    def __init__(self, item):
+        tokens = [t for t in normalize_tokens(item.name) if t not in STOP_TOKENS]
+        self.tokens = set(tokens)
+        # In English noun phrases the last word is usually the thing itself ("Warm Blanket")
+        self.head = tokens[-1] if tokens else ""
+        self.category = item.category.value
+        # Leftover quantity after partial allocations
+        self.quantity = max(1, int(item.remaining or 1))
+
+
+def signatures_for(items) -> List[ItemSignature]:
+    """Signatures for the items that still have quantity left"""
+    return [ItemSignature(item) for item in items if item.remaining > 0]
+
+
+def item_similarity(a: ItemSignature, b: ItemSignature) -> float:
+    """1.0 for the same head noun, partial credit for shared words or the same category"""
+    if a.head and a.head == b.head:
+        return 1.0
+    shared = a.tokens & b.tokens
+    if shared:
+        return 0.8 * len(shared) / len(a.tokens | b.tokens)
+    if a.category == b.category and a.category != "other":
+        return 0.3
+    return 0.0
+
+
+class MatchingEngine:
+    """
+    Local, deterministic replacement for the all-in-one matching prompt.
+
+    Offerings are kept in inverted indexes keyed by normalized head noun,
+    item token and category, so a request only scores the offerings that
+    share a word with one of its items (falling back to the best-stocked of
+    the same category) instead of the whole dataset. Pairs are scored on item similarity, quantity coverage,
+    request urgency and request age and returned in the same dict shape as
+    ai_match_requests_with_offerings.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, min_confidence: float = 0.5,
+                 max_age_days: float = 14.0, candidates_per_item: int = 10):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.min_confidence = min_confidence
+        self.max_age_days = max_age_days
+        self.candidates_per_item = candidates_per_item
+        self._offerings = {}
+        self._signatures = {}
+        # "h:<head>", "t:<token>" and "c:<category>" -> [(-quantity, offering_id), ...] sorted
+        self._postings: Dict[str, list] = {}
+        self._entries: Dict[int, list] = {}
+
+    @staticmethod
+    def _keys(sig: ItemSignature):
+        keys = [f"t:{token}" for token in sig.tokens if token != sig.head]
+        if sig.head:
+            keys.append(f"h:{sig.head}")
+        if sig.category != "other":
+            keys.append(f"c:{sig.category}")
+        return keys
+
+    def add_offering(self, offering):
+        if offering.id in self._offerings:
+            self.remove_offering(offering)
+        signatures = signatures_for(offering.items)
+        self._offerings[offering.id] = offering
+        self._signatures[offering.id] = signatures
+        entries = []
+        for sig in signatures:
+            for key in self._keys(sig):
+                entry = (-sig.quantity, offering.id)
+                insort(self._postings.setdefault(key, []), entry)
+                entries.append((key, entry))
+        self._entries[offering.id] = entries
+
+    def remove_offering(self, offering):
+        self._offerings.pop(offering.id, None)
+        self._signatures.pop(offering.id, None)
+        for key, entry in self._entries.pop(offering.id, []):
+            postings = self._postings.get(key)
+            if not postings:
+                continue
+            i = bisect_left(postings, entry)
+            if i < len(postings) and postings[i] == entry:
+                postings.pop(i)
+            if not postings:
+                del self._postings[key]
+
+    def __contains__(self, offering_id) -> bool:
+        return offering_id in self._offerings
+
+    @staticmethod
+    def _probe_tiers(sig: ItemSignature) -> List[List[str]]:
+        """Posting keys a request item looks up, in the order candidates() tries them"""
+        return [[f"h:{sig.head}"] if sig.head else [],
+                [f"t:{token}" for token in sig.tokens] + [f"h:{token}" for token in sig.tokens if token != sig.head],
+                [f"c:{sig.category}"] if sig.category != "other" else []]
+
+    def candidates(self, request, signatures: Optional[List[ItemSignature]] = None) -> Set[int]:
+        """
+        Offering ids worth scoring for a request: per item, every offering that
+        shares its head noun or another word, or if fewer than
+        candidates_per_item do, also the best-stocked ones of the same
+        (non-other) category.
+
+        Word matches are never cut off, since an offering that covers several
+        of the request's items can outscore better-stocked single matches.
+        Category-only matches all have the same similarity, so the
+        best-stocked are the best-covered; the cutoff there is an
+        approximation only for requests whose word matches score below a
+        category match.
+        """
+        signatures = signatures or signatures_for(request.items)
+        limit = self.candidates_per_item
+        found = set()
+        for sig in signatures:
+            head_keys, word_keys, category_keys = self._probe_tiers(sig)
+            picked = set()
+            for key in head_keys + word_keys:
+                picked.update(offering_id for _, offering_id in self._postings.get(key, ()))
+            if len(picked) < limit:
+                for key in category_keys:
+                    picked.update(offering_id for _, offering_id in self._postings.get(key, ())[:limit])
+            found |= picked
+        return found
+
+    def _request_terms(self, request, now: datetime) -> float:
+        """Weighted urgency + age part of the score, shared by every pair of a request"""
+        urgency_score = URGENCY_WEIGHTS.get(request.urgency, 0.5)
+        age_days = (now - request.created_at).total_seconds() / 86400
+        age_score = min(1.0, max(0.0, age_days / self.max_age_days))
+        return self.weights['urgency'] * urgency_score + self.weights['age'] * age_score
+
+    def _item_terms(self, req_sigs: List[ItemSignature], off_sigs: List[ItemSignature]):
+        """Weighted item + quantity part of the score and the best offering item per request item"""
+        sim_total = cov_total = sim_best = cov_best = 0.0
+        best_items = []
+        for req_sig in req_sigs:
+            best_sim, best_off = 0.0, None
+            for off_sig in off_sigs:
+                sim = item_similarity(req_sig, off_sig)
+                if sim > best_sim:
+                    best_sim, best_off = sim, off_sig
+                    if sim == 1.0:
+                        break
+            best_items.append((best_sim, best_off))
+            if best_off is None:
+                continue
+            coverage = min(1.0, best_off.quantity / req_sig.quantity)
+            sim_total += best_sim
+            cov_total += coverage
+            sim_best = max(sim_best, best_sim)
+            cov_best = max(cov_best, coverage)
+
+        if sim_best == 0.0:
+            return 0.0, best_items
+        n = len(req_sigs)
+        # Blend best and mean so one strong item match counts even in a long request
+        item_score = 0.5 * sim_best + 0.5 * sim_total / n
+        quantity_score = 0.5 * cov_best + 0.5 * cov_total / n
+        return self.weights['item'] * item_score + self.weights['quantity'] * quantity_score, best_items
+
+    @staticmethod
+    def _reason(request, req_sigs, best_items) -> str:
+        matched = [
+            f"{req_sig.head or 'item'} ({best_off.quantity}/{req_sig.quantity})"
+            for req_sig, (sim, best_off) in zip(req_sigs, best_items) if best_off is not None and sim >= 0.5
+        ]
+        reason = f"Matches {', '.join(matched)}" if matched else "Same item category"
+        return reason + f"; {request.urgency} urgency"
+
+    def score(self, request, offering, request_signatures: Optional[List[ItemSignature]] = None,
+              now: Optional[datetime] = None):
+        """Return (confidence, reason) for a request/offering pair"""
+        req_sigs = request_signatures or signatures_for(request.items)
+        off_sigs = self._signatures.get(offering.id) or signatures_for(offering.items)
+        if not req_sigs or not off_sigs:
+            return 0.0, ""
+        item_terms, best_items = self._item_terms(req_sigs, off_sigs)
+        if item_terms == 0.0:
+            return 0.0, ""
+        confidence = item_terms + self._request_terms(request, now or datetime.now())
+        return round(confidence, 3), self._reason(request, req_sigs, best_items)
+
+    def match_request(self, request, now: Optional[datetime] = None) -> List[dict]:
+        """All offerings that match one request above min_confidence, best first"""
+        req_sigs = signatures_for(request.items)
+        if not req_sigs:
+            return []
+        request_terms = self._request_terms(request, now or datetime.now())
+        matches = []
+        for offering_id in self.candidates(request, req_sigs):
+            item_terms, best_items = self._item_terms(req_sigs, self._signatures[offering_id])
+            if item_terms == 0.0:
+                continue
+            confidence = round(item_terms + request_terms, 3)
+            if confidence >= self.min_confidence:
+                matches.append({
+                    'request': request,
+                    'offering': self._offerings[offering_id],
+                    'confidence': confidence,
+                    'reason': self._reason(request, req_sigs, best_items)
+                })
+        matches.sort(key=lambda m: (-m['confidence'], m['offering'].id))
+        return matches
+
+    def match(self, requests, offerings=None, top_per_request: Optional[int] = None) -> List[dict]:
+        """
+        Match requests against the indexed offerings (re-indexing `offerings` first if given).
+
+        Returns match dicts sorted by confidence.
+        """
+        if offerings is not None:
+            self.clear()
+            for offering in offerings:
+                self.add_offering(offering)
+        now = datetime.now()
+        matches = []
+        for request in requests:
+            request_matches = self.match_request(request, now)
+            if top_per_request:
+                request_matches = request_matches[:top_per_request]
+            matches.extend(request_matches)
+        matches.sort(key=lambda m: (-m['confidence'], m['request'].id, m['offering'].id))
+        return matches
+
+    def clear(self):
+        self._offerings.clear()
+        self._signatures.clear()
+        self._postings.clear()
+        self._entries.clear()
+
+
+class IncrementalMatcher(MatchingEngine):
+    """
+    MatchingEngine that keeps a live best-matches table up to date.
+
+    Each open request remembers its best `matches_per_request` offerings.
+    Requests are indexed under the same posting keys candidates() reads, so
+    adding or removing an offering rescores exactly the requests whose
+    candidates it can change, and the table always equals a full recompute;
+    adding or removing a request only touches that request. Urgency and age are
+    the same for every pair of a request, so pairs store the item part of
+    the score and the request part is added when matches are read.
+    """
+
+    def __init__(self, matches_per_request: int = 5, **kwargs):
+        super().__init__(**kwargs)
+        self.matches_per_request = matches_per_request
+        self._requests = {}
+        self._request_sigs = {}
+        self._request_keys: Dict[str, Set[int]] = {}
+        # request id -> [(-item_terms, offering_id), ...] best first
+        self._best: Dict[int, list] = {}
+        # offering id -> request ids that currently list it
+        self._listed_by: Dict[int, Set[int]] = {}
+        self.rescored_pairs = 0
+
+    def _request_index_keys(self, sigs: List[ItemSignature]) -> Set[str]:
+        """Every posting key candidates() reads for these items"""
+        keys = set()
+        for sig in sigs:
+            for tier in self._probe_tiers(sig):
+                keys.update(tier)
+        return keys
+
+    def _requests_reading(self, offering_id) -> Set[int]:
+        """Requests whose candidates() reads a posting list this offering is in"""
+        affected = set()
+        for key, _ in self._entries.get(offering_id, ()):
+            affected |= self._request_keys.get(key, set())
+        return affected
+
+    def _set_best(self, request_id: int, best: list):
+        for _, offering_id in self._best.get(request_id, ()):
+            listed = self._listed_by.get(offering_id)
+            if listed is not None:
+                listed.discard(request_id)
+                if not listed:
+                    del self._listed_by[offering_id]
+        best.sort()
+        best = best[:self.matches_per_request]
+        self._best[request_id] = best
+        for _, offering_id in best:
+            self._listed_by.setdefault(offering_id, set()).add(request_id)
+
+    def _rescore_request(self, request_id: int):
+        sigs = self._request_sigs[request_id]
+        best = []
+        for offering_id in self.candidates(self._requests[request_id], sigs):
+            item_terms, _ = self._item_terms(sigs, self._signatures[offering_id])
+            self.rescored_pairs += 1
+            if item_terms > 0.0:
+                best.append((-item_terms, offering_id))
+        self._set_best(request_id, best)
+
+    def add_request(self, request):
+        if request.id in self._requests:
+            self.remove_request(request)
+        sigs = signatures_for(request.items)
+        self._requests[request.id] = request
+        self._request_sigs[request.id] = sigs
+        for key in self._request_index_keys(sigs):
+            self._request_keys.setdefault(key, set()).add(request.id)
+        self._rescore_request(request.id)
+
+    def remove_request(self, request):
+        if request.id not in self._requests:
+            return
+        self._set_best(request.id, [])
+        del self._best[request.id]
+        for key in self._request_index_keys(self._request_sigs.pop(request.id)):
+            ids = self._request_keys.get(key)
+            if ids is not None:
+                ids.discard(request.id)
+                if not ids:
+                    del self._request_keys[key]
+        del self._requests[request.id]
+
+    def update_request(self, request):
+        """Re-index a request whose items or quantities changed"""
+        self.add_request(request)
+
+    def add_offering(self, offering):
+        # Re-adding an indexed offering goes through remove_offering first
+        super().add_offering(offering)
+        # The new posting entries can change candidates() (and its per-key
+        # cutoffs) only for requests that read those keys
+        for request_id in self._requests_reading(offering.id):
+            self._rescore_request(request_id)
+
+    def remove_offering(self, offering):
+        affected = self._requests_reading(offering.id) | self._listed_by.get(offering.id, set())
+        super().remove_offering(offering)
+        for request_id in affected:
+            self._rescore_request(request_id)
+
+    def current_matches(self, min_confidence: Optional[float] = None, top_per_request: Optional[int] = None,
+                        now: Optional[datetime] = None) -> List[dict]:
+        """Read the maintained best matches; cost is linear in the number of stored matches"""
+        min_confidence = self.min_confidence if min_confidence is None else min_confidence
+        now = now or datetime.now()
+        matches = []
+        for request_id, best in self._best.items():
+            request = self._requests[request_id]
+            request_terms = self._request_terms(request, now)
+            sigs = self._request_sigs[request_id]
+            for neg_terms, offering_id in best[:top_per_request] if top_per_request else best:
+                confidence = round(-neg_terms + request_terms, 3)
+                if confidence < min_confidence:
+                    # Lists are sorted, so the rest of this request is weaker
+                    break
+                _, best_items = self._item_terms(sigs, self._signatures[offering_id])
+                matches.append({
+                    'request': request,
+                    'offering': self._offerings[offering_id],
+                    'confidence': confidence,
+                    'reason': self._reason(request, sigs, best_items)
+                })
+        matches.sort(key=lambda m: (-m['confidence'], m['request'].id, m['offering'].id))
+        return matches
+
+    def clear(self):
+        super().clear()
+        self._requests.clear()
+        self._request_sigs.clear()
+        self._request_keys.clear()
+        self._best.clear()
+        self._listed_by.clear()
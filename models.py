@@ -1,28 +1,30 @@
 from datetime import datetime
 from typing import List, Optional
 from enum import Enum
-import google.generativeai as genai
 import json
+from llm_cache import LLMCache
+from llm_backends import LLMBackend, get_default_backend
+from categorizer import classify_local
+from rule_parser import parse_quantities, detect_urgency, whole_units
+from matching import IncrementalMatcher
+from allocation import AllocationEngine, apply_allocations
+from llm_matching import chunked_llm_match
+from indexes import AttributeIndex
+from search_index import SearchIndex, item_fields
+from priority_queue import PriorityQueue
+from storage import get_store, new_id
 
 
-# Configure Gemini API
-genai.configure(api_key="API_KEY")
-model = genai.GenerativeModel("gemini-2.0-flash-lite")
+# The LLM backend (Gemini by default) is chosen by llm_backends and can be
+# injected per CoordinationSystem; nothing talks to the network at import time.
 
+# Bump this whenever the parse prompt changes so cached answers are not reused
+PARSE_PROMPT_VERSION = "parse-request-v1"
+CATEGORY_PROMPT_VERSION = "category-v1"
+URGENCY_LEVELS = ['low', 'normal', 'high', 'urgent']
 
-import csv
-from pathlib import Path
-
-def append_to_csv(file_path: str, data: dict, fieldnames: list):
-    """Append a dictionary as a row to a CSV file. Create file with headers if it doesn't exist."""
-    file = Path(file_path)
-    write_header = not file.exists()
-    
-    with open(file_path, 'a', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if write_header:
-            writer.writeheader()
-        writer.writerow(data)
+# Shared on-disk cache for TextParser responses
+llm_cache = LLMCache()
 
 
 class ItemCategory(Enum):
@@ -41,15 +43,49 @@ class RequestStatus(Enum):
 
 class Item:
     """Represents an item that can be requested or donated"""
-    def __init__(self, name: str, quantity: int, description: str = "", category: str = ""):
+    # When True, items the local lexicon cannot classify defer the Gemini call
+    # until the category is first read (or until Item.categorize_many runs)
+    LAZY_CATEGORIES = False
+
+    def __init__(self, name: str, quantity: int, description: str = "", category: str = "", lazy: Optional[bool] = None,
+                 unit: str = "", backend: Optional[LLMBackend] = None):
         self.name = name
         self.quantity = quantity
         self.description = description
-        # If category is provided, use it; otherwise auto-categorize
+        self.unit = unit
+        # Units already promised to/from another party (see allocation.py)
+        self.allocated = 0
+        self._backend = backend
+        self._category = None
+        # If category is provided, use it; otherwise try the local lexicon before Gemini
         if category:
-            self.category = self._string_to_category(category)
+            self._category = self._string_to_category(category)
         else:
-            self.category = self._auto_categorize()
+            local_category, _ = classify_local(name, description)
+            if local_category:
+                self._category = self._string_to_category(local_category)
+            elif not (self.LAZY_CATEGORIES if lazy is None else lazy):
+                self._category = self._auto_categorize()
+
+    @property
+    def category(self):
+        if self._category is None:
+            self._category = self._auto_categorize()
+        return self._category
+
+    @category.setter
+    def category(self, value):
+        self._category = value
+
+    @property
+    def remaining(self) -> int:
+        """Quantity not yet allocated"""
+        return max(0, int(self.quantity or 0) - self.allocated)
+
+    @property
+    def category_pending(self) -> bool:
+        """True while a lazy item is still waiting for its category"""
+        return self._category is None
     
     def _string_to_category(self, category_str: str):
         """Convert string to ItemCategory enum"""
@@ -58,9 +94,21 @@ class Item:
             if category.value == category_str:
                 return category
         return ItemCategory.OTHER
+
+    def _cache_text(self) -> str:
+        return f"{self.name}\n{self.description}"
     
     def _auto_categorize(self):
         """Use Gemini to automatically categorize items"""
+        local_category, _ = classify_local(self.name, self.description)
+        if local_category:
+            return self._string_to_category(local_category)
+
+        backend = self._backend or get_default_backend()
+        cached = llm_cache.get("category", self._cache_text(), CATEGORY_PROMPT_VERSION, backend.model_name)
+        if cached is not None:
+            return self._string_to_category(cached)
+
         try:
             prompt = f"""Categorize this item into ONE of these categories: food, clothing, shelter, medical, hygiene, other.
 Item: {self.name}
@@ -68,124 +116,282 @@ Description: {self.description}
 
 Respond with ONLY the category word, nothing else."""
             
-            response = model.generate_content(prompt)
-            category_str = response.text.strip().lower()
+            response_text = backend.generate(prompt, task="category")
+            category_str = response_text.strip().lower()
             
             # Map response to enum
             for category in ItemCategory:
                 if category.value == category_str:
+                    llm_cache.put("category", self._cache_text(), CATEGORY_PROMPT_VERSION, backend.model_name, category.value)
                     return category
             return ItemCategory.OTHER
         except:
             return ItemCategory.OTHER
+
+    @staticmethod
+    def categorize_many(items: List["Item"], backend: Optional[LLMBackend] = None) -> List["Item"]:
+        """
+        Resolve categories for many items at once.
+
+        Items are answered from the local lexicon or the cache where possible;
+        everything left over is classified with a single batched Gemini prompt.
+        """
+        backend = backend or get_default_backend()
+        pending = []
+        for item in items:
+            if not item.category_pending:
+                continue
+            local_category, _ = classify_local(item.name, item.description)
+            if local_category:
+                item._category = item._string_to_category(local_category)
+                continue
+            cached = llm_cache.get("category", item._cache_text(), CATEGORY_PROMPT_VERSION, backend.model_name)
+            if cached is not None:
+                item._category = item._string_to_category(cached)
+                continue
+            pending.append(item)
+
+        if not pending:
+            return items
+
+        items_info = "\n".join(
+            f"{i}. {item.name} - {item.description}" if item.description else f"{i}. {item.name}"
+            for i, item in enumerate(pending)
+        )
+        prompt = f"""Categorize each item into ONE of these categories: food, clothing, shelter, medical, hygiene, other.
+
+ITEMS:
+{items_info}
+
+Return ONLY a JSON array of category words, one per item, in the same order.
+Example: ["food", "clothing"]"""
+
+        try:
+            response_text = backend.generate(prompt, task="categorize_batch").strip()
+            if "```" in response_text:
+                response_text = response_text.split("```")[1].replace("json", "", 1).strip()
+            categories = json.loads(response_text)
+        except Exception as e:
+            print(f"Batch categorization error: {e}")
+            categories = []
+
+        for i, item in enumerate(pending):
+            category_str = str(categories[i]).strip().lower() if i < len(categories) else ""
+            item._category = item._string_to_category(category_str) if category_str else ItemCategory.OTHER
+            if category_str:
+                llm_cache.put("category", item._cache_text(), CATEGORY_PROMPT_VERSION, backend.model_name, item._category.value)
+        return items
     
     def to_dict(self):
         return {
             'name': self.name,
             'quantity': self.quantity,
             'description': self.description,
-            'category': self.category.value
+            'category': self.category.value,
+            'unit': self.unit,
+            'allocated': self.allocated
         }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Item":
+        """Item from to_dict() output or a stored line-item row, keeping its allocated units"""
+        item = cls(data['name'], int(data.get('quantity') or 0), description=data.get('description') or "",
+                   category=data.get('category') or "other", unit=data.get('unit') or "")
+        item.allocated = int(data.get('allocated') or 0)
+        return item
+
+    @classmethod
+    def load(cls, parent_type: str, parent_id) -> List["Item"]:
+        """A saved request's (or offering's) items as stored, allocated units included"""
+        return [cls.from_dict(row) for row in get_store().line_items(parent_type, parent_id)]
     
     def __str__(self):
         return f"{self.name} ({self.category.value}) - Qty: {self.quantity}"
 
+class ParsedItems(list):
+    """List of parsed Items that remembers which parser tier produced it"""
+    def __init__(self, items=(), tier: str = "llm", confidence: float = 1.0, cached: bool = False):
+        super().__init__(items)
+        self.tier = tier
+        self.confidence = confidence
+        self.cached = cached
+
 class TextParser:
     """Parse free-form text into structured Item objects using Gemini AI"""
+    # Rule-based parses at or above this confidence skip Gemini entirely
+    RULE_CONFIDENCE_THRESHOLD = 0.8
+    # How many parses each tier ("rules", "llm", "fallback") has served
+    tier_counts = {'rules': 0, 'llm': 0, 'fallback': 0}
     
     @staticmethod
-    def parse_text_to_items(text: str) -> List[Item]:
+    def _items_from_data(items_data: list, backend: Optional[LLMBackend] = None) -> List[Item]:
+        """Build Item objects from parsed JSON dictionaries"""
+        items = []
+        for item_data in items_data:
+            item = Item(
+                name=item_data.get('name', 'Unknown Item'),
+                quantity=item_data.get('quantity', 1),
+                description=item_data.get('description', ''),
+                category=item_data.get('category', 'other'),
+                unit=item_data.get('unit', ''),
+                backend=backend
+            )
+            items.append(item)
+        return items
+
+    @staticmethod
+    def parse_with_rules(text: str, backend: Optional[LLMBackend] = None):
         """
-        Parse user's free-form text into a list of Item objects
-        
-        Examples:
-        - "I need 10 blankets and 5 cans of soup"
-        - "Looking for winter clothes, maybe 3 jackets and some gloves"
-        - "We have 20 boxes of food to donate"
+        Deterministic tier: extract quantities, units and item nouns without a model.
+
+        Returns (ParsedItems, urgency). Check items.confidence before trusting the result.
         """
-        try:
-            prompt = f"""You are parsing donation/request text into structured items.
+        parsed, confidence = parse_quantities(text)
+        items = ParsedItems([
+            Item(
+                name=p.item.title(),
+                quantity=whole_units(p.quantity),
+                description=p.source,
+                unit=p.unit,
+                backend=backend
+            )
+            for p in parsed
+        ], tier="rules", confidence=confidence)
+        return items, detect_urgency(text)
+
+    @staticmethod
+    def _fast_path(text: str, backend: LLMBackend, use_cache: bool = True, use_rules: bool = True):
+        """Answer from the rule tier or the cache; returns None when Gemini is needed"""
+        if use_rules:
+            items, urgency = TextParser.parse_with_rules(text, backend=backend)
+            if items and items.confidence >= TextParser.RULE_CONFIDENCE_THRESHOLD:
+                TextParser.tier_counts['rules'] += 1
+                return items, urgency
+
+        if use_cache:
+            cached = llm_cache.get("request", text, PARSE_PROMPT_VERSION, backend.model_name)
+            if cached is not None:
+                TextParser.tier_counts['llm'] += 1
+                items = ParsedItems(TextParser._items_from_data(cached['items'], backend), tier="llm", cached=True)
+                return items, cached['urgency']
+        return None
+
+    @staticmethod
+    def _build_parse_prompt(text: str) -> str:
+        return f"""You are parsing donation/request text into structured items and an urgency level.
 
 USER TEXT: "{text}"
 
-Extract all items mentioned and return them as a JSON array. For each item:
+Extract all items mentioned. For each item:
 1. Determine the item name (be specific but concise)
 2. Extract or estimate the quantity (default to 1 if not specified)
 3. Create a brief description
-4. Categorize into either food or shelter
+4. Categorize into one of: food, clothing, shelter, medical, hygiene, other
+
+Then determine the urgency of the text as one of: low, normal, high, urgent.
+Consider words like: urgent, emergency, ASAP, desperate, critical, immediate, soon, needed
+Also consider context like: cold weather, children, elderly, medical needs
 
-Return ONLY a valid JSON array in this exact format:
-[
-  {{"name": "Item Name", "quantity": 10, "description": "Brief description", "category": "food"}},
-  {{"name": "Another Item", "quantity": 5, "description": "Brief description", "category": "clothing"}}
-]
+Return ONLY a valid JSON object in this exact format:
+{{
+  "items": [
+    {{"name": "Item Name", "quantity": 10, "description": "Brief description", "category": "food"}},
+    {{"name": "Another Item", "quantity": 5, "description": "Brief description", "category": "clothing"}}
+  ],
+  "urgency": "normal"
+}}
 
 Rules:
 - If quantity is vague, use 3-10 as estimate based off key words
 - If no quantity mentioned, use 1
 - Be specific with item names (e.g., "Winter blankets" not just "blankets")
 - Keep descriptions under 15 words
-- Return empty array [] if no items found"""
+- Use an empty "items" array if no items found"""
 
-            response = model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            # Extract JSON from potential markdown code blocks
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-            
-            # Parse JSON
-            items_data = json.loads(response_text)
-            
-            # Convert to Item objects
-            items = []
-            for item_data in items_data:
-                item = Item(
-                    name=item_data.get('name', 'Unknown Item'),
-                    quantity=item_data.get('quantity', 1),
-                    description=item_data.get('description', ''),
-                    category=item_data.get('category', 'other')
-                )
-                items.append(item)
-            
-            return items
-            
+    @staticmethod
+    def _parse_response(text: str, response_text: str, backend: LLMBackend):
+        """Turn a raw model response into (items, urgency) and cache it; raises on malformed output"""
+        response_text = response_text.strip()
+
+        # Extract JSON from potential markdown code blocks
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0].strip()
+
+        # Parse JSON
+        data = json.loads(response_text)
+        if isinstance(data, list):
+            # Tolerate a bare item array
+            data = {'items': data}
+
+        # Convert to Item objects
+        items = ParsedItems(TextParser._items_from_data(data.get('items', []), backend), tier="llm")
+        urgency = str(data.get('urgency', 'normal')).strip().lower()
+        if urgency not in URGENCY_LEVELS:
+            urgency = 'normal'
+
+        # Cache the normalized item dicts rather than the raw response
+        llm_cache.put("request", text, PARSE_PROMPT_VERSION, backend.model_name, {
+            'items': [item.to_dict() for item in items],
+            'urgency': urgency
+        })
+
+        TextParser.tier_counts['llm'] += 1
+        return items, urgency
+
+    @staticmethod
+    def _fallback(text: str):
+        """Single generic item used when the model call fails"""
+        TextParser.tier_counts['fallback'] += 1
+        return ParsedItems([Item(
+            name=text[:50] + "..." if len(text) > 50 else text,
+            quantity=1,
+            description="Auto-parsed from user input",
+            category="other"
+        )], tier="fallback", confidence=0.0), 'normal'
+
+    @staticmethod
+    def parse_request(text: str, use_cache: bool = True, use_rules: bool = True, backend: Optional[LLMBackend] = None):
+        """
+        Parse free-form text into (items, urgency) with at most one Gemini call
+
+        Examples:
+        - "I need 10 blankets and 5 cans of soup"
+        - "Looking for winter clothes, maybe 3 jackets and some gloves"
+        - "We have 20 boxes of food to donate"
+
+        The rule-based tier is tried first and Gemini is only called when its
+        confidence is below RULE_CONFIDENCE_THRESHOLD. The returned items are a
+        ParsedItems list whose .tier records which tier answered.
+        Successful parses are cached on disk; pass use_cache=False to force a fresh model call.
+        """
+        backend = backend or get_default_backend()
+        result = TextParser._fast_path(text, backend, use_cache=use_cache, use_rules=use_rules)
+        if result is not None:
+            return result
+
+        try:
+            response_text = backend.generate(TextParser._build_parse_prompt(text), task="parse")
+            return TextParser._parse_response(text, response_text, backend)
         except Exception as e:
             print(f"Error parsing text: {e}")
             # Fallback: create a single generic item from the text
-            return [Item(
-                name=text[:50] + "..." if len(text) > 50 else text,
-                quantity=1,
-                description="Auto-parsed from user input",
-                category="other"
-            )]
+            return TextParser._fallback(text)
+
+    @staticmethod
+    def parse_text_to_items(text: str, use_cache: bool = True, backend: Optional[LLMBackend] = None) -> List[Item]:
+        """Parse user's free-form text into a list of Item objects"""
+        items, _ = TextParser.parse_request(text, use_cache=use_cache, backend=backend)
+        return items
     
     @staticmethod
-    def analyze_urgency(text: str) -> str:
+    def analyze_urgency(text: str, use_cache: bool = True, backend: Optional[LLMBackend] = None) -> str:
         """
         Analyze text to determine urgency level: low, normal, high, urgent
         """
-        try:
-            prompt = f"""Analyze this text and determine the urgency level.
-
-TEXT: "{text}"
-
-Consider words like: urgent, emergency, ASAP, desperate, critical, immediate, soon, needed
-Also consider context like: cold weather, children, elderly, medical needs
-
-Return ONLY one word: low, normal, high, or urgent"""
-
-            response = model.generate_content(prompt)
-            urgency = response.text.strip().lower()
-            
-            if urgency in ['low', 'normal', 'high', 'urgent']:
-                return urgency
-            return 'normal'
-            
-        except:
-            return 'normal'
+        _, urgency = TextParser.parse_request(text, use_cache=use_cache, backend=backend)
+        return urgency
 
 class Request:
     """Represents a request for items"""
@@ -193,23 +399,52 @@ class Request:
     CSV_FIELDS = ['id', 'requester_id', 'requester_name', 'items', 'urgency', 'status', 'created_at', 'fulfilled_by']
 
     def __init__(self, requester, items: list, urgency: str = "normal"):
-        self.id = id(self)
+        # Assigned by the store on the first save below
+        self.id = None
         self.requester = requester
         self.items = items
         self.urgency = urgency
         self.status = RequestStatus.OPEN
         self.created_at = datetime.now()
         self.fulfilled_by = None
+        # Callbacks run after every state change (used by CoordinationSystem indexes)
+        self._listeners = []
         
         # Log to CSV
         self.log_to_csv()
+
+    def add_listener(self, callback):
+        """Register callback(request) to run whenever this request changes"""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback(self)
     
     def fulfill(self, donor):
         """Mark request as fulfilled by a donor"""
         self.status = RequestStatus.FULFILLED
         self.fulfilled_by = donor
+        for item in self.items:
+            item.allocated = item.quantity
         self.log_to_csv()  # Update CSV when fulfilled
+        self._notify()
         return True
+
+    def record_allocation(self, item: Item, quantity: int, donor=None):
+        """Record a partial delivery; the request is fulfilled once nothing is left"""
+        item.allocated += quantity
+        if all(i.remaining == 0 for i in self.items):
+            self.status = RequestStatus.FULFILLED
+            self.fulfilled_by = donor
+        else:
+            self.status = RequestStatus.IN_PROGRESS
+        self.log_to_csv()
+        self._notify()
+
+    def remaining_items(self) -> List[Item]:
+        """Items that still need some quantity"""
+        return [item for item in self.items if item.remaining > 0]
     
     def to_dict(self):
         return {
@@ -217,6 +452,7 @@ class Request:
             'requester_id': self.requester.id,
             'requester_name': self.requester.name,
             'items': "; ".join([f"{item.name} ({item.quantity})" for item in self.items]),
+            'line_items': [item.to_dict() for item in self.items],
             'urgency': self.urgency,
             'status': self.status.value,
             'created_at': self.created_at.isoformat(),
@@ -224,7 +460,9 @@ class Request:
         }
     
     def log_to_csv(self):
-        append_to_csv(self.CSV_FILE, self.to_dict(), self.CSV_FIELDS)
+        # Upserts this request's row in the configured store (SQLite by default);
+        # the first save assigns the id
+        self.id = get_store().save_request(self.to_dict())
 
     
     def __str__(self):
@@ -237,19 +475,43 @@ class Offering:
     CSV_FIELDS = ['id', 'donor_id', 'donor_name', 'items', 'available', 'created_at']
 
     def __init__(self, donor, items: list):
-        self.id = id(self)
+        # Assigned by the store on the first save below
+        self.id = None
         self.donor = donor
         self.items = items
         self.available = True
         self.created_at = datetime.now()
+        # Callbacks run after every state change (used by CoordinationSystem indexes)
+        self._listeners = []
         
         # Log to CSV
         self.log_to_csv()
+
+    def add_listener(self, callback):
+        """Register callback(offering) to run whenever this offering changes"""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback(self)
     
     def mark_donated(self):
         """Mark offering as no longer available"""
         self.available = False
         self.log_to_csv()  # Update CSV when marked donated
+        self._notify()
+
+    def record_allocation(self, item: Item, quantity: int):
+        """Take quantity out of an offered item; the offering is used up once nothing is left"""
+        item.allocated += quantity
+        if all(i.remaining == 0 for i in self.items):
+            self.available = False
+        self.log_to_csv()
+        self._notify()
+
+    def remaining_items(self) -> List[Item]:
+        """Items with leftover quantity"""
+        return [item for item in self.items if item.remaining > 0]
     
     def to_dict(self):
         return {
@@ -257,12 +519,15 @@ class Offering:
             'donor_id': self.donor.id,
             'donor_name': self.donor.name,
             'items': "; ".join([f"{item.name} ({item.quantity})" for item in self.items]),
+            'line_items': [item.to_dict() for item in self.items],
             'available': self.available,
             'created_at': self.created_at.isoformat()
         }
     
     def log_to_csv(self):
-        append_to_csv(self.CSV_FILE, self.to_dict(), self.CSV_FIELDS)
+        # Upserts this offering's row in the configured store (SQLite by default);
+        # the first save assigns the id
+        self.id = get_store().save_offering(self.to_dict())
 
     
     def __str__(self):
@@ -273,7 +538,8 @@ class Offering:
 class User:
     """Base class for all users in the system"""
     def __init__(self, name: str, location: str, contact: str = ""):
-        self.id = id(self)
+        # Users are stored by name; this id only has to be unique (id(self) is reused after GC)
+        self.id = new_id()
         self.name = name
         self.location = location
         self.contact = contact
@@ -300,10 +566,9 @@ class Shelter(User):
         self.requests: List[Request] = []
         self.offerings: List[Offering] = []
     
-    def create_request_from_text(self, text: str):
+    def create_request_from_text(self, text: str, backend: Optional[LLMBackend] = None):
         """Create a request from free-form text"""
-        items = TextParser.parse_text_to_items(text)
-        urgency = TextParser.analyze_urgency(text)
+        items, urgency = TextParser.parse_request(text, backend=backend)
         request = Request(self, items, urgency)
         self.requests.append(request)
         return request
@@ -314,9 +579,9 @@ class Shelter(User):
         self.requests.append(request)
         return request
     
-    def create_offering_from_text(self, text: str):
+    def create_offering_from_text(self, text: str, backend: Optional[LLMBackend] = None):
         """Create an offering from free-form text"""
-        items = TextParser.parse_text_to_items(text)
+        items, _ = TextParser.parse_request(text, backend=backend)
         offering = Offering(self, items)
         self.offerings.append(offering)
         return offering
@@ -346,9 +611,9 @@ class Donor(User):
         self.offerings: List[Offering] = []
         self.fulfilled_requests: List[Request] = []
     
-    def create_offering_from_text(self, text: str):
+    def create_offering_from_text(self, text: str, backend: Optional[LLMBackend] = None):
         """Create an offering from free-form text"""
-        items = TextParser.parse_text_to_items(text)
+        items, _ = TextParser.parse_request(text, backend=backend)
         offering = Offering(self, items)
         self.offerings.append(offering)
         return offering
@@ -360,8 +625,8 @@ class Donor(User):
         return offering
     
     def fulfill_request(self, request: Request):
-        """Fulfill a request from a shelter or requester"""
-        if request.status == RequestStatus.OPEN:
+        """Fulfill a request from a shelter or requester (also one that is already partly allocated)"""
+        if request.status in (RequestStatus.OPEN, RequestStatus.IN_PROGRESS):
             request.fulfill(self)
             self.fulfilled_requests.append(request)
             return True
@@ -373,10 +638,9 @@ class Needers(User):
         super().__init__(name, location, contact)
         self.requests: List[Request] = []
     
-    def create_request_from_text(self, text: str):
+    def create_request_from_text(self, text: str, backend: Optional[LLMBackend] = None):
         """Create a request from free-form text"""
-        items = TextParser.parse_text_to_items(text)
-        urgency = TextParser.analyze_urgency(text)
+        items, urgency = TextParser.parse_request(text, backend=backend)
         request = Request(self, items, urgency)
         self.requests.append(request)
         return request
@@ -389,12 +653,34 @@ class Needers(User):
 
 class CoordinationSystem:
     """Main system to coordinate between all users using Gemini AI"""
-    def __init__(self):
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        # LLM backend used for parsing and matching; defaults to Gemini
+        self.backend = backend or get_default_backend()
         self.shelters: List[Shelter] = []
         self.donors: List[Donor] = []
         self.needers: List[Needers] = []
         self.all_requests: List[Request] = []
         self.all_offerings: List[Offering] = []
+        # Secondary indexes, kept current by the request/offering listeners
+        self.request_index = AttributeIndex({
+            'status': lambda r: r.status,
+            'category': lambda r: {item.category for item in r.items},
+            'requester': lambda r: r.requester.id,
+            'urgency': lambda r: r.urgency,
+        })
+        self.offering_index = AttributeIndex({
+            'available': lambda o: o.available,
+            'category': lambda o: {item.category for item in o.items},
+            'donor': lambda o: o.donor.id,
+        })
+        # Full-text search over open requests / available offerings
+        self.request_search = SearchIndex()
+        self.offering_search = SearchIndex()
+        # Open requests by urgency and time waiting, for top_requests()
+        self.request_queue = PriorityQueue()
+        # Live best-match table, updated as requests and offerings change
+        self.matcher = IncrementalMatcher()
+        self.allocator = AllocationEngine()
     
     def register_shelter(self, shelter: Shelter):
         """Register a new shelter"""
@@ -411,32 +697,113 @@ class CoordinationSystem:
     def add_request(self, request: Request):
         """Add a request to the system"""
         self.all_requests.append(request)
+        request.add_listener(self._on_request_changed)
+        self._on_request_changed(request)
     
     def add_offering(self, offering: Offering):
         """Add an offering to the system"""
         self.all_offerings.append(offering)
+        offering.add_listener(self._on_offering_changed)
+        self._on_offering_changed(offering)
+
+    def _on_request_changed(self, request: Request):
+        """Keep the indexes and match table in sync with a request's status"""
+        self.request_index.update(request)
+        if request.status in (RequestStatus.OPEN, RequestStatus.IN_PROGRESS):
+            self.matcher.update_request(request)
+            if request.id not in self.request_search:
+                self.request_search.add(request.id, item_fields(request.items))
+            self.request_queue.push(request.id, request.urgency, request.created_at,
+                                    {item.category for item in request.items})
+        else:
+            self.matcher.remove_request(request)
+            self.request_search.remove(request.id)
+            self.request_queue.remove(request.id)
+
+    def _on_offering_changed(self, offering: Offering):
+        """Keep the indexes and match table in sync with an offering's availability"""
+        self.offering_index.update(offering)
+        if offering.available:
+            self.matcher.add_offering(offering)
+            if offering.id not in self.offering_search:
+                self.offering_search.add(offering.id, item_fields(offering.items))
+        else:
+            self.matcher.remove_offering(offering)
+            self.offering_search.remove(offering.id)
+
+    def create_request_from_text(self, user, text: str):
+        """Parse text with this system's backend into a request and add it"""
+        request = user.create_request_from_text(text, backend=self.backend)
+        self.add_request(request)
+        return request
+
+    def create_offering_from_text(self, user, text: str):
+        """Parse text with this system's backend into an offering and add it"""
+        offering = user.create_offering_from_text(text, backend=self.backend)
+        self.add_offering(offering)
+        return offering
     
-    def get_open_requests(self, category: Optional[ItemCategory] = None):
-        """Get all open requests, optionally filtered by category"""
-        open_requests = [r for r in self.all_requests if r.status == RequestStatus.OPEN]
-        if category:
-            return [r for r in open_requests if any(item.category == category for item in r.items)]
-        return open_requests
+    def get_requests(self, status=None, category: Optional[ItemCategory] = None, urgency=None, requester=None):
+        """
+        Requests matching every given filter, in the order they were added.
+        status and urgency also accept a collection of allowed values.
+        """
+        return self.request_index.query(status=status, category=category, urgency=urgency,
+                                        requester=requester.id if requester is not None else None)
+
+    def get_open_requests(self, category: Optional[ItemCategory] = None, urgency=None, requester=None):
+        """Get all open (including partially fulfilled) requests, optionally filtered by category, urgency or requester"""
+        return self.get_requests((RequestStatus.OPEN, RequestStatus.IN_PROGRESS), category, urgency, requester)
     
-    def get_available_offerings(self, category: Optional[ItemCategory] = None):
-        """Get all available offerings, optionally filtered by category"""
-        available = [o for o in self.all_offerings if o.available]
-        if category:
-            return [o for o in available if any(item.category == category for item in o.items)]
-        return available
+    def get_available_offerings(self, category: Optional[ItemCategory] = None, donor=None):
+        """Get all available offerings, optionally filtered by category or donor"""
+        return self.offering_index.query(available=True, category=category,
+                                         donor=donor.id if donor is not None else None)
     
-    def ai_match_requests_with_offerings(self):
-        """Use Gemini AI to intelligently match requests with offerings"""
+    def top_requests(self, category: Optional[ItemCategory] = None, k: int = 10) -> List[Request]:
+        """The k most pressing open requests (urgency, raised by time waiting), optionally in one category"""
+        return [self.request_index.get(request_id) for request_id in self.request_queue.top_k(category, k)]
+
+    def search_requests(self, query: str, limit: int = 20) -> List[Request]:
+        """Open requests ranked by relevance to query (item names, descriptions, categories)"""
+        return [self.request_index.get(request_id) for request_id, _ in self.request_search.search(query, limit)]
+
+    def search_offerings(self, query: str, limit: int = 20) -> List[Offering]:
+        """Available offerings ranked by relevance to query"""
+        return [self.offering_index.get(offering_id) for offering_id, _ in self.offering_search.search(query, limit)]
+
+    def match_requests_with_offerings(self, min_confidence: float = 0.5, top_per_request: Optional[int] = None):
+        """Current best local matches between open requests and available offerings (no LLM call)"""
+        return self.matcher.current_matches(min_confidence, top_per_request)
+
+    def allocate_offerings(self, apply: bool = True):
+        """
+        Split available offering quantities across open requests to maximize
+        urgency-weighted coverage. With apply=True the allocations are recorded
+        on the requests and offerings (partial fulfillment and leftovers).
+        """
+        allocations = self.allocator.allocate(self.get_open_requests(), self.get_available_offerings())
+        if apply:
+            apply_allocations(allocations)
+        return allocations
+
+    def ai_match_requests_with_offerings(self, chunked: bool = False, token_budget: int = 3000, max_workers: int = 4):
+        """
+        Use Gemini AI to intelligently match requests with offerings.
+
+        With chunked=True only locally pre-filtered candidate pairs are sent,
+        split into token-budgeted prompts that run in parallel; results carry
+        'request_id'/'offering_id' so they stay stable across chunks.
+        """
         open_requests = self.get_open_requests()
         available_offerings = self.get_available_offerings()
         
         if not open_requests or not available_offerings:
             return []
+
+        if chunked:
+            return chunked_llm_match(self.backend, self.matcher, open_requests, available_offerings,
+                                     token_budget=token_budget, max_workers=max_workers)
         
         # Build context for Gemini
         requests_info = ""
@@ -471,10 +838,10 @@ Example: 0,1,0.9,Exact match on blankets with sufficient quantity and close loca
 Only return matches with confidence >= 0.5"""
         
         try:
-            response = model.generate_content(prompt)
+            response_text = self.backend.generate(prompt, task="match")
             matches = []
             
-            for line in response.text.strip().split('\n'):
+            for line in response_text.strip().split('\n'):
                 if ',' in line:
                     try:
                         parts = line.split(',', 3)
@@ -509,8 +876,7 @@ CONTEXT: {context}
 Write a warm, helpful message (2-3 sentences) that {sender.name} can send to {recipient.name}. Be specific and actionable."""
         
         try:
-            response = model.generate_content(prompt)
-            return response.text.strip()
+            return self.backend.generate(prompt, task="message").strip()
         except Exception as e:
             return f"Hi {recipient.name}, I'd like to connect regarding {context}. Please let me know if you're available to coordinate."
 
@@ -537,8 +903,7 @@ if __name__ == "__main__":
     print("\n=== SHELTER REQUEST (from text) ===")
     shelter_text = "We urgently need 20 warm blankets and about 50 cans of soup for the winter. Also need some hygiene supplies."
     print(f"Input text: \"{shelter_text}\"")
-    shelter_request = shelter1.create_request_from_text(shelter_text)
-    system.add_request(shelter_request)
+    shelter_request = system.create_request_from_text(shelter1, shelter_text)
     print(f"Parsed items:")
     for item in shelter_request.items:
         print(f"  - {item}")
@@ -547,8 +912,7 @@ if __name__ == "__main__":
     print("\n=== DONOR OFFERING (from text) ===")
     donor_text = "I have 25 fleece blankets and 15 winter jackets I'd like to donate"
     print(f"Input text: \"{donor_text}\"")
-    donor_offering = donor1.create_offering_from_text(donor_text)
-    system.add_offering(donor_offering)
+    donor_offering = system.create_offering_from_text(donor1, donor_text)
     print(f"Parsed items:")
     for item in donor_offering.items:
         print(f"  - {item}")
@@ -556,8 +920,7 @@ if __name__ == "__main__":
     print("\n=== NEEDER REQUEST (from text) ===")
     needer_text = "Need groceries for my family of 4 ASAP, especially food for the kids"
     print(f"Input text: \"{needer_text}\"")
-    needer_request = needer1.create_request_from_text(needer_text)
-    system.add_request(needer_request)
+    needer_request = system.create_request_from_text(needer1, needer_text)
     print(f"Parsed items:")
     for item in needer_request.items:
         print(f"  - {item}")
@@ -572,6 +935,12 @@ if __name__ == "__main__":
     for off in system.get_available_offerings():
         print(off)
     
+    # Local indexed matching
+    print("\n=== LOCAL MATCHES ===")
+    for match in system.match_requests_with_offerings():
+        print(f"  {match['request'].requester.name} <- {match['offering'].donor.name} "
+              f"({match['confidence']}): {match['reason']}")
+
     # AI-powered matching
     print("\n=== AI-POWERED MATCHES ===")
     matches = system.ai_match_requests_with_offerings()
@@ -0,0 +1,100 @@
+import heapq
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+from storage import URGENCY_RANK
+
+# Urgency levels a request gains per day of waiting, so old requests are not starved
+AGING_PER_DAY = 0.25
+
+
+def priority_key(urgency: str, created_at: datetime, aging_per_day: float = AGING_PER_DAY) -> float:
+    """
+    Heap key (smaller = more pressing). The priority at time t is
+    level + aging * (t - created); t is shared by every request, so ordering
+    by level - aging * created gives the same order at any t and keys never
+    need refreshing as requests age.
+    """
+    return aging_per_day * created_at.timestamp() / 86400 - URGENCY_RANK.get(urgency, 1)
+
+
+class PriorityQueue:
+    """
+    Open requests by urgency with aging, overall and per category.
+
+    push()/remove() are O(log n): removal is lazy (the heap entry is left
+    behind and skipped), and a heap is rebuilt once more than half of it is
+    stale. top_k() reads the k best entries without popping them by walking
+    the heap from the root, which costs O(k log k) plus any stale entries on
+    the way.
+    """
+
+    def __init__(self, aging_per_day: float = AGING_PER_DAY):
+        self.aging_per_day = aging_per_day
+        self._heaps: Dict[Optional[Hashable], List[Tuple[float, int, Hashable]]] = {None: []}
+        # Item id -> (key, sequence number, categories) of its live entries
+        self._live: Dict[Hashable, Tuple[float, int, tuple]] = {}
+        self._stale: Dict[Optional[Hashable], int] = {}
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self._live
+
+    def push(self, item_id, urgency: str, created_at: datetime, categories: Iterable = ()):
+        """Add an item, or re-rank it if its urgency or categories changed"""
+        key = priority_key(urgency, created_at, self.aging_per_day)
+        categories = tuple(sorted(set(categories), key=str))
+        current = self._live.get(item_id)
+        if current is not None:
+            if current[0] == key and current[2] == categories:
+                return
+            self.remove(item_id)
+        self._seq += 1
+        self._live[item_id] = (key, self._seq, categories)
+        for group in (None,) + categories:
+            heapq.heappush(self._heaps.setdefault(group, []), (key, self._seq, item_id))
+
+    def remove(self, item_id):
+        current = self._live.pop(item_id, None)
+        if current is None:
+            return
+        for group in (None,) + current[2]:
+            self._stale[group] = self._stale.get(group, 0) + 1
+            if self._stale[group] * 2 > len(self._heaps[group]):
+                self._compact(group)
+
+    def _is_live(self, entry) -> bool:
+        current = self._live.get(entry[2])
+        return current is not None and current[1] == entry[1]
+
+    def _compact(self, group):
+        heap = [entry for entry in self._heaps[group] if self._is_live(entry)]
+        heapq.heapify(heap)
+        if heap or group is None:
+            self._heaps[group] = heap
+        else:
+            del self._heaps[group]
+        self._stale[group] = 0
+
+    def top_k(self, category=None, k: int = 10) -> List[Hashable]:
+        """Ids of the k most pressing items (in one category if given), best first"""
+        heap = self._heaps.get(category)
+        if not heap:
+            return []
+        result = []
+        frontier = [(heap[0], 0)]
+        while frontier and len(result) < k:
+            entry, position = heapq.heappop(frontier)
+            if self._is_live(entry):
+                result.append(entry[2])
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return result
+
+    def clear(self):
+        self._heaps = {None: []}
+        self._live.clear()
+        self._stale.clear()
@@ -1,19 +1,19 @@
 import streamlit as st
 import pandas as pd
 from models import CoordinationSystem, Needers, Shelter, TextParser
+from data_cache import get_data_cache
+from storage import ACTIVE_STATUSES
 
 # Initialize coordination system
 if 'system' not in st.session_state:
     st.session_state.system = CoordinationSystem()
 
-# Load users from CSV
+# Load users from the shared data cache
 def load_user_from_csv(username):
-    """Load user information from CSV"""
-    df = pd.read_csv("user_information.csv", sep="|")
-    user_row = df[df["Name"] == username]
+    """Load user information (cached, O(1) by name)"""
+    user_data = get_data_cache().user(username)
     
-    if not user_row.empty:
-        user_data = user_row.iloc[0]
+    if user_data is not None:
         user_type = user_data["User Type"]
         name = user_data["Name"]
         location = user_data["Address"]
@@ -37,9 +37,7 @@ def request_page():
     
     username = st.session_state.get("current_user")
     name = st.session_state.current_user
-    df = pd.read_csv("user_information.csv", sep='|', engine="python")
-    user_row = df[df['Name'] == name]
-    user_type = user_row.iloc[0]['User Type']
+    user_type = get_data_cache().user_type(name)
     print(user_type)
     
     # Only allow Organizations and Person in Need to request
@@ -81,13 +79,8 @@ def request_page():
         
         # Load and filter offerings
         try:
-            offerings_df = pd.read_csv("offerings.csv")
-            
-            # Filter by search query
-            matching_offerings = offerings_df[
-                (offerings_df['items'].str.contains(search_query, case=False, na=False)) &
-                (offerings_df['available'] == True)
-            ]
+            # Ranked, typo-tolerant search over available offerings
+            matching_offerings = get_data_cache().search_offerings(search_query)
             
             if not matching_offerings.empty:
                 st.success(f"Found {len(matching_offerings)} matching offerings")
@@ -129,8 +122,7 @@ def request_page():
                 with st.spinner("Analyzing your request..."):
                     try:
                         # Parse the text to show preview
-                        parsed_items = TextParser.parse_text_to_items(request_text)
-                        urgency = TextParser.analyze_urgency(request_text)
+                        parsed_items, urgency = TextParser.parse_request(request_text, backend=st.session_state.system.backend)
                         
                         st.write("**AI detected these items:**")
                         for item in parsed_items:
@@ -150,7 +142,10 @@ def request_page():
                             'low': '🟢'
                         }
                         st.write(f"**Detected Urgency:** {urgency_colors.get(urgency, '⚪')} **{urgency.upper()}**")
-                        st.caption("✨ Parsed automatically using AI")
+                        if getattr(parsed_items, "tier", "llm") == "rules":
+                            st.caption("⚡ Parsed instantly with local rules")
+                        else:
+                            st.caption("✨ Parsed automatically using AI")
                     except Exception as e:
                         st.error(f"Error parsing items: {e}")
         
@@ -165,8 +160,7 @@ def request_page():
                 with st.spinner("Creating your request..."):
                     try:
                         # Create request using models.py
-                        request = user_obj.create_request_from_text(request_text)
-                        st.session_state.system.add_request(request)
+                        request = st.session_state.system.create_request_from_text(user_obj, request_text)
                         
                         st.success("✅ Request posted successfully!")
                         st.balloons()
@@ -191,34 +185,42 @@ def request_page():
         st.subheader("All Available Offerings")
         st.info("Browse current donations to see what's available")
         
-        # Load offerings from CSV
+        # Load one page of offerings at a time (newest first)
         try:
-            offerings_df = pd.read_csv("offerings.csv")
-            available_offerings = offerings_df[offerings_df['available'] == True]
-            
-            if not available_offerings.empty:
-                # Category filter
-                st.write(f"**Showing {len(available_offerings)} available offerings**")
+            cache = get_data_cache()
+            if cache.count_offerings(available=True) > 0:
+                page_size = st.selectbox("Offerings per page", [10, 25, 50], key="offering_page_size")
+
+                # Cursors of the pages seen so far; start over when the page size changes
+                if st.session_state.get("offering_page_view") != page_size:
+                    st.session_state.offering_page_view = page_size
+                    st.session_state.offering_page_cursors = [None]
+                cursors = st.session_state.offering_page_cursors
+
+                page = cache.page_offerings(available=True, cursor=cursors[-1], limit=page_size)
+                first = (len(cursors) - 1) * page_size
+                if page.rows:
+                    st.write(f"**Showing {first + 1}-{first + len(page.rows)} of {page.total} available offerings**")
+                else:
+                    st.write(f"**Showing 0 of {page.total} available offerings**")
                 
                 # Display offerings in a nice format
-                for idx, row in available_offerings.iterrows():
+                for row in page.rows:
                     with st.container():
                         col1, col2 = st.columns([3, 1])
                         
                         with col1:
                             st.markdown(f"### 🎁 {row['donor_name']}")
                             st.write(f"**Offering:** {row['items']}")
-                            st.caption(f"📍 Posted on: {row['created_at'][:10]}")
+                            st.caption(f"📍 Posted on: {str(row['created_at'])[:10]}")
                         
                         with col2:
                             st.write("")
                             st.write("")
-                            if st.button("📞 Contact Donor", key=f"contact_offer_{idx}", use_container_width=True):
-                                df = pd.read_csv("user_information.csv", sep='|', engine="python")
-                                user_row = df[df['Name'] == name]
-                                user_type = user_row.iloc[0]['User Type']
-                                link = user_row.iloc[0]['Link']
-                                phone = user_row.iloc[0]["Phone Number"]
+                            if st.button("📞 Contact Donor", key=f"contact_offer_{row['id']}", use_container_width=True):
+                                user_row = cache.user(name)
+                                link = user_row['Link']
+                                phone = user_row["Phone Number"]
                                 st.markdown(f"""
 **Contact information for {row['donor_name']}**
 
@@ -227,6 +229,17 @@ def request_page():
 """)
 
                         st.divider()
+
+                # Page navigation
+                prev_col, next_col = st.columns(2)
+                with prev_col:
+                    if st.button("⬅️ Previous", key="offering_page_prev", disabled=len(cursors) == 1):
+                        cursors.pop()
+                        st.rerun()
+                with next_col:
+                    if st.button("Next ➡️", key="offering_page_next", disabled=page.next_cursor is None):
+                        cursors.append(page.next_cursor)
+                        st.rerun()
             else:
                 st.info("No available offerings at this time")
         
@@ -241,14 +254,13 @@ def request_page():
         
         # Count requests by this user
         try:
-            requests_df = pd.read_csv("requests.csv")
-            user_requests = requests_df[requests_df['requester_name'] == username]
+            user_requests = get_data_cache().requests(requester_name=username)
             
             col1, col2 = st.columns(2)
             with col1:
                 st.metric("Total Requests", len(user_requests))
             with col2:
-                open_reqs = len(user_requests[user_requests['status'] == 'open'])
+                open_reqs = len(user_requests[user_requests['status'].isin(ACTIVE_STATUSES)])
                 st.metric("Open", open_reqs)
             
             if not user_requests.empty:
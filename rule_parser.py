@@ -0,0 +1,153 @@
+import math
+import re
+from collections import namedtuple
+from typing import List, Tuple
+from categorizer import classify_local, category_scores
+from text_utils import normalize_tokens
+
+# One extracted line item, e.g. "50 cans of soup" -> (50, "can", "soup")
+ParsedQuantity = namedtuple("ParsedQuantity", ["quantity", "unit", "item", "source"])
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20,
+    "thirty": 30, "forty": 40, "fifty": 50, "hundred": 100, "a hundred": 100, "a dozen": 12,
+    "dozen": 12, "a couple of": 2, "a couple": 2, "a pair of": 2,
+}
+
+# Vague quantities get the same 3-10 style estimate the Gemini prompt asks for
+VAGUE_QUANTITIES = {
+    "some": 3, "a few": 3, "few": 3, "several": 5, "many": 10, "a lot of": 10, "lots of": 10,
+    "dozens of": 24, "plenty of": 10,
+}
+
+UNITS = [
+    "can", "box", "bag", "bottle", "pack", "package", "case", "carton", "jar", "kg", "kilogram",
+    "lb", "pound", "gallon", "liter", "litre", "loaf", "loaves", "pair", "set", "roll", "tube", "bar",
+    "bundle", "pallet", "crate", "tray", "bunch", "unit", "piece", "kit", "bucket", "sack", "tub",
+]
+
+URGENCY_KEYWORDS = [
+    # Checked in order; the first level with a hit wins
+    ('low', ["no rush", "not urgent", "whenever", "eventually", "no hurry", "when possible"]),
+    ('urgent', ["urgent", "urgently", "emergency", "asap", "immediately", "immediate", "critical",
+                "desperate", "desperately", "right now", "tonight"]),
+    ('high', ["soon", "quickly", "freezing", "cold weather", "children", "kids", "elderly", "infant",
+              "baby", "sick", "running out", "badly"]),
+]
+
+# Words that end an item phrase ("20 blankets for the winter", "10 blankets not urgent")
+_STOP_WORDS = (r"and|or|for|to|that|which|i|we|you|they|us|from|with|in|at|by|please|but|also|plus|if|as|so|this|our|my"
+               r"|asap|need|needs|needed|because|not|no|is|are|was|were|will|would|should|urgent|urgently|soon"
+               r"|now|today|tonight|thanks|thank|each|per")
+
+# Credit kept for each unknown word in front of an item ("warm wool blankets") and for
+# an item that had unknown words after its last known noun ("blankets whenever-ish")
+LEADING_WORD_CREDIT = 0.9
+TRAILING_WORDS_CREDIT = 0.5
+
+_UNIT_PATTERN = "|".join(sorted({u for unit in UNITS for u in (unit, unit + "s", unit + "es")}, key=len, reverse=True))
+_QTY_WORDS = sorted(list(NUMBER_WORDS) + list(VAGUE_QUANTITIES), key=len, reverse=True)
+_QTY_PATTERN = r"\d+(?:\.\d+)?|" + "|".join(re.escape(w) for w in _QTY_WORDS)
+
+_ITEM_RE = re.compile(
+    r"\b(?P<qty>" + _QTY_PATTERN + r")\s+"
+    r"(?:(?P<unit>" + _UNIT_PATTERN + r")\s+(?:of\s+)?)?"
+    # "5 of us": without a unit, "of" starts a partitive, not an item
+    r"(?P<item>(?!of\b)[a-z][a-z\-']*(?:\s+(?!(?:" + _STOP_WORDS + r")\b)[a-z][a-z\-']*){0,3})",
+    re.IGNORECASE
+)
+
+
+def _quantity_value(raw: str) -> Tuple[float, bool]:
+    """Return (quantity, is_vague) for a matched quantity token; "1.5" stays 1.5"""
+    raw = raw.lower()
+    if raw in VAGUE_QUANTITIES:
+        return VAGUE_QUANTITIES[raw], True
+    if raw in NUMBER_WORDS:
+        return NUMBER_WORDS[raw], False
+    value = float(raw)
+    if value.is_integer():
+        return max(1, int(value)), False
+    return value, False
+
+
+def whole_units(quantity: float) -> int:
+    """Items are counted in whole units: 1.5 kg asks for 2 one-kg units"""
+    return max(1, math.ceil(quantity))
+
+
+def _trim_item(item_text: str) -> Tuple[str, float]:
+    """
+    (item, credit): unknown words after the last lexicon noun are dropped and
+    halve the credit; each unknown word in front of the first one costs a little.
+    Phrases the lexicon only knows as a whole ("sleeping bags") are kept as is.
+    """
+    words = item_text.split()
+    known = [i for i, word in enumerate(words) if category_scores(word)]
+    if not known:
+        return item_text, 1.0
+    credit = LEADING_WORD_CREDIT ** known[0]
+    if known[-1] < len(words) - 1:
+        words = words[:known[-1] + 1]
+        credit *= TRAILING_WORDS_CREDIT
+    return " ".join(words), credit
+
+
+def _normalize_unit(unit: str) -> str:
+    if not unit:
+        return ""
+    unit = unit.lower()
+    if unit == "loaves":
+        return "loaf"
+    tokens = normalize_tokens(unit)
+    return tokens[0] if tokens else unit
+
+
+def parse_quantities(text: str) -> Tuple[List[ParsedQuantity], float]:
+    """
+    Extract (quantity, unit, item) tuples from free-form text.
+
+    The confidence score is the share of item-like mentions that the rules
+    could attribute to a recognised item: unknown nouns after a quantity
+    ("family of 4 ASAP"), unknown words around an item ("10 blankets
+    whenever-ish") and lexicon items with no quantity ("need groceries") all
+    pull it down, so the caller knows to fall back to Gemini.
+    """
+    parsed = []
+    recognised = 0.0
+    unrecognised = 0
+    covered = set()
+
+    for match in _ITEM_RE.finditer(text):
+        item_text, credit = _trim_item(match.group("item").strip(" -'"))
+        quantity, vague = _quantity_value(match.group("qty"))
+        category, _ = classify_local(item_text)
+        covered.update(range(match.start(), match.end()))
+        if category is None:
+            unrecognised += 1
+            continue
+        recognised += (0.75 if vague else 1.0) * credit
+        parsed.append(ParsedQuantity(quantity, _normalize_unit(match.group("unit")), item_text, match.group(0).strip()))
+
+    # Lexicon nouns that appear outside any quantity phrase were missed by the rules
+    uncovered = 0
+    for word in re.finditer(r"[a-zA-Z]+", text):
+        if word.start() in covered:
+            continue
+        if category_scores(word.group(0)):
+            uncovered += 1
+
+    total = len(parsed) + unrecognised + uncovered
+    if total == 0:
+        return [], 0.0
+    return parsed, recognised / total
+
+
+def detect_urgency(text: str) -> str:
+    """Keyword-based urgency level: low, normal, high or urgent"""
+    lowered = " " + " ".join(re.findall(r"[a-z]+", text.lower())) + " "
+    for level, keywords in URGENCY_KEYWORDS:
+        if any(f" {keyword} " in lowered for keyword in keywords):
+            return level
+    return 'normal'
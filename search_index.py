@@ -0,0 +1,245 @@
+import bisect
+import heapq
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from categorizer import classify_local
+from text_utils import stem, tokenize
+
+STOP_WORDS = {"a", "an", "and", "the", "of", "for", "with", "to", "in", "on", "some", "any", "or"}
+DEFAULT_FIELD_WEIGHTS = {'name': 2.0, 'description': 1.0, 'category': 1.0}
+
+# Score multipliers for inexact term matches
+FUZZY_FACTOR = 0.7
+PREFIX_FACTOR = 0.8
+MAX_EXPANSIONS = 20
+
+_QTY_RE = re.compile(r"\(\d+\)")
+
+
+def analyze(text: str) -> List[str]:
+    """Tokens as indexed: lowercase, stop words dropped, stemmed"""
+    return [stem(token) for token in tokenize(text) if token not in STOP_WORDS]
+
+
+def _deletes(term: str) -> Set[str]:
+    """The term with each single character removed"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Damerau-Levenshtein distance <= 1 (insert, delete, substitute or swap)"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    i = 0
+    while i < min(la, lb) and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    if la > lb:
+        return a[i + 1:] == b[i:]
+    return a[i:] == b[i + 1:]
+
+
+class SearchIndex:
+    """
+    Incremental inverted index with BM25 ranking.
+
+    Documents are dicts of field -> text; a term's frequency in a document is
+    weighted by the field it appears in (item names count double by default).
+    Query terms that are not in the vocabulary are matched to terms within
+    one edit (typo tolerance, via a single-deletion index), and the last
+    query term also matches as a prefix so partial words work while typing.
+    add() replaces a document and remove() drops it, touching only that
+    document's postings.
+
+    Terms with more than max_postings documents are scored from their
+    highest-impact postings only (sorted by BM25 term weight, re-sorted
+    lazily after the term changes), so query time stays bounded as the
+    index grows.
+    """
+
+    def __init__(self, field_weights: Optional[Dict[str, float]] = None, k1: float = 1.2, b: float = 0.75,
+                 max_postings: int = 2000):
+        self.field_weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        self.k1 = k1
+        self.b = b
+        self.max_postings = max_postings
+        # Term -> [(doc_id, tf)] best first, for terms with more than max_postings documents
+        self._impact: Dict[str, List[Tuple[object, float]]] = {}
+        self._postings: Dict[str, Dict[object, float]] = {}
+        self._doc_terms: Dict[object, Dict[str, float]] = {}
+        self._doc_len: Dict[object, float] = {}
+        self._total_len = 0.0
+        # Single-deletion variant -> vocabulary terms producing it
+        self._variants: Dict[str, Set[str]] = {}
+        self._sorted_vocab: Optional[List[str]] = None
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._doc_terms
+
+    def _add_term(self, term: str):
+        self._sorted_vocab = None
+        for variant in _deletes(term):
+            self._variants.setdefault(variant, set()).add(term)
+
+    def _drop_term(self, term: str):
+        self._sorted_vocab = None
+        for variant in _deletes(term):
+            terms = self._variants.get(variant)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._variants[variant]
+
+    def add(self, doc_id, fields: Dict[str, str]):
+        """Index (or re-index) a document"""
+        if doc_id in self._doc_terms:
+            self.remove(doc_id)
+        weights: Dict[str, float] = {}
+        for field, text in fields.items():
+            field_weight = self.field_weights.get(field, 1.0)
+            for term in analyze(text or ""):
+                weights[term] = weights.get(term, 0.0) + field_weight
+        self._doc_terms[doc_id] = weights
+        length = sum(weights.values())
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        for term, weight in weights.items():
+            self._impact.pop(term, None)
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._add_term(term)
+            postings[doc_id] = weight
+
+    def remove(self, doc_id):
+        weights = self._doc_terms.pop(doc_id, None)
+        if weights is None:
+            return
+        self._total_len -= self._doc_len.pop(doc_id)
+        for term in weights:
+            self._impact.pop(term, None)
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                self._drop_term(term)
+
+    def _expand(self, token: str, allow_prefix: bool) -> List[Tuple[str, float]]:
+        """Vocabulary terms a query token stands for, with a score factor"""
+        if token in self._postings:
+            expansions = {token: 1.0}
+        else:
+            expansions = {}
+            candidates = set(self._variants.get(token, ()))
+            for variant in _deletes(token) | {token}:
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates.update(self._variants.get(variant, ()))
+            for term in candidates:
+                if _within_one_edit(token, term):
+                    expansions[term] = FUZZY_FACTOR
+        if allow_prefix and len(token) >= 3:
+            if self._sorted_vocab is None:
+                self._sorted_vocab = sorted(self._postings)
+            start = bisect.bisect_left(self._sorted_vocab, token)
+            for term in self._sorted_vocab[start:start + MAX_EXPANSIONS]:
+                if not term.startswith(token):
+                    break
+                expansions.setdefault(term, PREFIX_FACTOR)
+        return list(expansions.items())[:MAX_EXPANSIONS]
+
+    def _top_postings(self, term: str, avg_len: float):
+        postings = self._postings[term]
+        if len(postings) <= self.max_postings:
+            return postings.items()
+        impact = self._impact.get(term)
+        if impact is None:
+            k1, b, doc_len = self.k1, self.b, self._doc_len
+            impact = sorted(postings.items(),
+                            key=lambda posting: -posting[1] / (posting[1] + k1 * (1 - b + b * doc_len[posting[0]] / avg_len)))
+            self._impact[term] = impact = impact[:self.max_postings]
+        return impact
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[object, float]]:
+        """(doc_id, score) pairs, best first; documents matching more query terms rank higher"""
+        # Stem for lookups, but keep the raw last token too for prefix matching
+        raw = [token for token in tokenize(query) if token not in STOP_WORDS]
+        if not raw or not self._doc_terms:
+            return []
+        n_docs = len(self._doc_terms)
+        avg_len = self._total_len / n_docs if n_docs else 1.0
+        scores: Dict[object, float] = {}
+        matched: Dict[object, int] = {}
+        for position, token in enumerate(raw):
+            last = position == len(raw) - 1
+            expansions = self._expand(stem(token), allow_prefix=False)
+            if last:
+                seen = {term for term, _ in expansions}
+                expansions += [(term, factor) for term, factor in self._expand(token, allow_prefix=True) if term not in seen]
+            token_docs: Dict[object, float] = {}
+            for term, factor in expansions:
+                postings = self._postings[term]
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in self._top_postings(term, avg_len):
+                    norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len))
+                    score = factor * idf * norm
+                    # A token counts once per document, via its best-scoring expansion
+                    if score > token_docs.get(doc_id, 0.0):
+                        token_docs[doc_id] = score
+            for doc_id, score in token_docs.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+                matched[doc_id] = matched.get(doc_id, 0) + 1
+        coverage = len(raw)
+        return heapq.nlargest(limit, ((doc_id, score * matched[doc_id] / coverage) for doc_id, score in scores.items()),
+                              key=lambda pair: pair[1])
+
+    def clear(self):
+        self._postings.clear()
+        self._impact.clear()
+        self._doc_terms.clear()
+        self._doc_len.clear()
+        self._variants.clear()
+        self._total_len = 0.0
+        self._sorted_vocab = None
+
+
+def item_names(items_text: str) -> List[str]:
+    """Item names from a stored items column ("Warm Blanket (9); Canned Soup (5)")"""
+    return [_QTY_RE.sub("", part).strip() for part in str(items_text or "").split(";") if part.strip()]
+
+
+def record_fields(items_text: str) -> Dict[str, str]:
+    """Searchable fields for a stored request/offering row; categories come from the local lexicon"""
+    names = item_names(items_text)
+    categories = {classify_local(name)[0] for name in names}
+    return {'name': " ".join(names), 'category': " ".join(sorted(c for c in categories if c))}
+
+
+def _item_values(item) -> Tuple[str, str, str]:
+    """(name, description, category) of an Item or a stored line-item row"""
+    if isinstance(item, dict):
+        values = (item.get('name'), item.get('description'), item.get('category'))
+    else:
+        values = (item.name, item.description, item.category.value)
+    # Line-item frames hold pandas NA for missing text
+    return tuple(value if isinstance(value, str) else "" for value in values)
+
+
+def item_fields(items: Iterable) -> Dict[str, str]:
+    """Searchable fields (names, descriptions and stored categories) for Item objects or line-item rows"""
+    values = [_item_values(item) for item in items]
+    return {
+        'name': " ".join(name for name, _, _ in values),
+        'description': " ".join(description for _, description, _ in values),
+        'category': " ".join(sorted({category for _, _, category in values if category})),
+    }
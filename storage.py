@@ -0,0 +1,789 @@
+import base64
+import bisect
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple, Union
+from event_log import get_event_log
+from file_io import atomic_write, file_lock
+from line_items import LINE_ITEM_COLUMNS, row_line_items, to_frame as line_items_to_frame
+
+# Column names as they appear in user_information.csv (pipe separated)
+USER_COLUMNS = ["Name", "Password", "Description", "Address", "Link", "Phone Number", "Categories", "User Type"]
+REQUEST_COLUMNS = ['id', 'requester_id', 'requester_name', 'items', 'urgency', 'status', 'created_at', 'fulfilled_by']
+OFFERING_COLUMNS = ['id', 'donor_id', 'donor_name', 'items', 'available', 'created_at']
+
+# Sort key for request pages: most urgent first, then oldest first
+URGENCY_RANK = {'urgent': 3, 'high': 2, 'normal': 1, 'low': 0}
+REQUEST_SQL_COLUMNS = REQUEST_COLUMNS + ['urgency_rank']
+
+DEFAULT_PAGE_SIZE = 20
+
+# Requests that still need items: partly allocated ones are still waiting for the rest
+ACTIVE_STATUSES = ('open', 'in_progress')
+# A status filter: one status, several, or None for all
+Statuses = Union[str, Tuple[str, ...], None]
+
+USERS_CSV = "user_information.csv"
+REQUESTS_CSV = "requests.csv"
+OFFERINGS_CSV = "offerings.csv"
+
+# SQL column for each user CSV column
+_USER_SQL = {
+    "Name": "name", "Password": "password", "Description": "description", "Address": "address",
+    "Link": "link", "Phone Number": "phone", "Categories": "categories", "User Type": "user_type",
+}
+
+
+def rows_to_frame(rows: List[dict], columns: List[str]):
+    import pandas as pd
+    return pd.DataFrame(rows, columns=columns)
+
+
+# One page of rows; pass next_cursor back to get the following page (None on the last page)
+Page = namedtuple("Page", ["rows", "next_cursor", "total"])
+
+
+def encode_cursor(key: tuple) -> str:
+    """Opaque, URL-safe cursor for a sort key"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    if not cursor:
+        return None
+    return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii"))))
+
+
+def request_sort_key(row: dict) -> tuple:
+    """(-urgency rank, created_at, id) - request pages ascend by this (most urgent, then oldest first)"""
+    return (-URGENCY_RANK.get(row.get('urgency'), 1), str(row.get('created_at') or ""), int(row['id']))
+
+
+def offering_sort_key(row: dict) -> tuple:
+    """(created_at, id) - offering pages descend by this (newest first)"""
+    return (str(row.get('created_at') or ""), int(row['id']))
+
+
+def status_tuple(status: Statuses) -> Tuple[str, ...]:
+    """The statuses a filter matches, () for no filter"""
+    if not status:
+        return ()
+    return (status,) if isinstance(status, str) else tuple(status)
+
+
+def _status_clause(column: str, status: Statuses, clauses: list, params: list):
+    statuses = status_tuple(status)
+    if statuses:
+        clauses.append(f"{column} IN ({', '.join('?' * len(statuses))})")
+        params.extend(statuses)
+
+
+def new_id() -> int:
+    """Random 63-bit id, for rows created where no database assigns one"""
+    return uuid.uuid4().int >> 65
+
+
+def page_rows(rows: List[dict], sort_key, cursor: Optional[str], limit: int, descending: bool = False) -> Page:
+    """In-memory version of the SQL keyset pages, for stores without an index to seek"""
+    keyed = sorted(((sort_key(row), row) for row in rows), key=lambda pair: pair[0], reverse=descending)
+    keys = [key for key, _ in keyed]
+    after = decode_cursor(cursor)
+    start = 0
+    if after:
+        if descending:
+            start = len(keys) - bisect.bisect_left(keys[::-1], after)
+        else:
+            start = bisect.bisect_right(keys, after)
+    page = keyed[start:start + limit]
+    next_cursor = encode_cursor(page[-1][0]) if start + limit < len(keyed) else None
+    return Page([row for _, row in page], next_cursor, len(rows))
+
+
+class WriteListeners:
+    """add_listener() for stores: callbacks run after each request or offering write"""
+
+    def add_listener(self, callback):
+        """
+        Register callback(table, row, before, after). row holds the id and the
+        written fields (every column for save_*, only the changes for update_*);
+        before/after are version(table) around the write, so a listener can tell
+        whether anything else changed the table in between.
+        """
+        self.__dict__.setdefault('_listeners', []).append(callback)
+
+    def _written(self, table: str, row: dict, before, after):
+        # Called once the store's lock is released, so callbacks may take their own locks
+        for callback in self.__dict__.get('_listeners', ()):
+            callback(table, row, before, after)
+
+
+class SqliteStore(WriteListeners):
+    """
+    SQLite storage for users, requests and offerings.
+
+    Runs in WAL mode so page reads never wait on writers, keeps indexes on
+    the columns the pages filter by, and changes single rows in place
+    (upserts) instead of rewriting files. On first use the existing CSV files
+    are imported once; import_csv() can be run again to merge newer CSVs.
+    Rows go in and come out as dicts with the CSV column names.
+    """
+
+    def __init__(self, path: str = "donations.sqlite3", import_existing: bool = True, timeout: float = 30.0):
+        self.path = path
+        self.import_existing = import_existing
+        # How long a writer waits for another process's transaction before failing
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._conn = None
+        # Bumped on every write through this store (see version())
+        self._versions = {'users': 0, 'requests': 0, 'offerings': 0}
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                """CREATE TABLE IF NOT EXISTS users (
+                    name TEXT PRIMARY KEY,
+                    password TEXT,
+                    description TEXT,
+                    address TEXT,
+                    link TEXT,
+                    phone TEXT,
+                    categories TEXT,
+                    user_type TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_users_type ON users(user_type);
+                CREATE TABLE IF NOT EXISTS requests (
+                    id INTEGER PRIMARY KEY,
+                    requester_id INTEGER,
+                    requester_name TEXT,
+                    items TEXT,
+                    urgency TEXT,
+                    status TEXT,
+                    created_at TEXT,
+                    fulfilled_by TEXT,
+                    urgency_rank INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_requests_status ON requests(status, urgency);
+                CREATE INDEX IF NOT EXISTS idx_requests_requester ON requests(requester_name);
+                CREATE TABLE IF NOT EXISTS offerings (
+                    id INTEGER PRIMARY KEY,
+                    donor_id INTEGER,
+                    donor_name TEXT,
+                    items TEXT,
+                    available INTEGER,
+                    created_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_offerings_available ON offerings(available);
+                CREATE INDEX IF NOT EXISTS idx_offerings_donor ON offerings(donor_name);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"""
+            )
+            self._migrate(conn)
+            conn.commit()
+            self._conn = conn
+            if self.import_existing and self._meta("csv_imported") is None:
+                self.import_csv()
+                self._set_meta("csv_imported", "1")
+        return self._conn
+
+    @staticmethod
+    def _migrate(conn):
+        """Schema additions for pagination: sort column, page indexes and trigger-maintained counts"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(requests)")}
+        if 'urgency_rank' not in columns:
+            conn.execute("ALTER TABLE requests ADD COLUMN urgency_rank INTEGER")
+        ranks = " ".join(f"WHEN '{urgency}' THEN {rank}" for urgency, rank in URGENCY_RANK.items())
+        conn.execute(f"UPDATE requests SET urgency_rank = CASE urgency {ranks} ELSE 1 END WHERE urgency_rank IS NULL")
+        line_items_exist = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'line_items'").fetchone()
+        conn.executescript(
+            """CREATE TABLE IF NOT EXISTS line_items (
+                parent_type TEXT NOT NULL,
+                parent_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                unit TEXT,
+                category TEXT,
+                description TEXT,
+                allocated INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (parent_type, parent_id, position)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_line_items_category ON line_items(parent_type, category);"""
+        )
+        if 'allocated' not in {row[1] for row in conn.execute("PRAGMA table_info(line_items)")}:
+            conn.execute("ALTER TABLE line_items ADD COLUMN allocated INTEGER NOT NULL DEFAULT 0")
+        if not line_items_exist:
+            # Rows stored before line items existed only have the flattened text
+            for table, parent_type in (("requests", "request"), ("offerings", "offering")):
+                for row in conn.execute(f"SELECT id, items FROM {table}").fetchall():
+                    SqliteStore._save_line_items(conn, parent_type, {'id': row[0], 'items': row[1]})
+        counts_exist = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'row_counts'").fetchone()
+        conn.executescript(
+            """CREATE INDEX IF NOT EXISTS idx_requests_page ON requests(status, urgency_rank DESC, created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_offerings_page ON offerings(available, created_at DESC, id DESC);
+            CREATE TABLE IF NOT EXISTS row_counts (
+                name TEXT NOT NULL,
+                k1 TEXT NOT NULL,
+                k2 TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                PRIMARY KEY (name, k1, k2)
+            );
+            CREATE TRIGGER IF NOT EXISTS trg_requests_count_ins AFTER INSERT ON requests BEGIN
+                INSERT INTO row_counts VALUES ('requests', COALESCE(NEW.status, ''), COALESCE(NEW.urgency, ''), 1)
+                ON CONFLICT(name, k1, k2) DO UPDATE SET n = n + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_requests_count_del AFTER DELETE ON requests BEGIN
+                UPDATE row_counts SET n = n - 1
+                WHERE name = 'requests' AND k1 = COALESCE(OLD.status, '') AND k2 = COALESCE(OLD.urgency, '');
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_requests_count_upd AFTER UPDATE OF status, urgency ON requests BEGIN
+                UPDATE row_counts SET n = n - 1
+                WHERE name = 'requests' AND k1 = COALESCE(OLD.status, '') AND k2 = COALESCE(OLD.urgency, '');
+                INSERT INTO row_counts VALUES ('requests', COALESCE(NEW.status, ''), COALESCE(NEW.urgency, ''), 1)
+                ON CONFLICT(name, k1, k2) DO UPDATE SET n = n + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_offerings_count_ins AFTER INSERT ON offerings BEGIN
+                INSERT INTO row_counts VALUES ('offerings', COALESCE(NEW.available, ''), '', 1)
+                ON CONFLICT(name, k1, k2) DO UPDATE SET n = n + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_offerings_count_del AFTER DELETE ON offerings BEGIN
+                UPDATE row_counts SET n = n - 1 WHERE name = 'offerings' AND k1 = COALESCE(OLD.available, '') AND k2 = '';
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_offerings_count_upd AFTER UPDATE OF available ON offerings BEGIN
+                UPDATE row_counts SET n = n - 1 WHERE name = 'offerings' AND k1 = COALESCE(OLD.available, '') AND k2 = '';
+                INSERT INTO row_counts VALUES ('offerings', COALESCE(NEW.available, ''), '', 1)
+                ON CONFLICT(name, k1, k2) DO UPDATE SET n = n + 1;
+            END;"""
+        )
+        if not counts_exist:
+            # Databases created before the counters existed: count once
+            conn.execute("""INSERT INTO row_counts SELECT 'requests', COALESCE(status, ''), COALESCE(urgency, ''), COUNT(*)
+                            FROM requests GROUP BY 1, 2, 3""")
+            conn.execute("""INSERT INTO row_counts SELECT 'offerings', COALESCE(available, ''), '', COUNT(*)
+                            FROM offerings GROUP BY 1, 2, 3""")
+
+    @staticmethod
+    def _save_line_items(conn, parent_type: str, row: dict):
+        """Replace one request/offering's line items (call inside the row's transaction)"""
+        conn.execute("DELETE FROM line_items WHERE parent_type = ? AND parent_id = ?", (parent_type, row['id']))
+        conn.executemany(
+            f"INSERT INTO line_items ({', '.join(LINE_ITEM_COLUMNS)}) VALUES ({', '.join('?' for _ in LINE_ITEM_COLUMNS)})",
+            [[parent_type, row['id']] + [item[column] for column in LINE_ITEM_COLUMNS[2:]] for item in row_line_items(row)])
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def _bump(self, *tables):
+        for table in tables:
+            self._versions[table] += 1
+
+    def version(self, table: str):
+        """
+        Changes whenever `table` may have changed: our own writes bump a
+        counter, and SQLite's data_version moves when another process commits
+        """
+        with self._lock:
+            data_version = self._connect().execute("PRAGMA data_version").fetchone()[0]
+            return (self._versions[table], data_version)
+
+    # --- Migration ---
+
+    def import_csv(self, users_csv: str = USERS_CSV, requests_csv: str = REQUESTS_CSV,
+                   offerings_csv: str = OFFERINGS_CSV) -> Dict[str, int]:
+        """Import the CSV files (plus any pending request/offering log events); existing users are kept"""
+        counts = {'users': 0, 'requests': 0, 'offerings': 0}
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                if os.path.exists(users_csv):
+                    with open(users_csv, 'r', newline='', encoding='utf-8') as f:
+                        for row in csv.DictReader(f, delimiter='|'):
+                            if row.get("Name"):
+                                counts['users'] += self._insert_user(conn, row)
+                for row in get_event_log(requests_csv, REQUEST_COLUMNS).rows():
+                    self._upsert(conn, "requests", REQUEST_SQL_COLUMNS, self._request_values(row))
+                    self._save_line_items(conn, "request", row)
+                    counts['requests'] += 1
+                for row in get_event_log(offerings_csv, OFFERING_COLUMNS).rows():
+                    self._upsert(conn, "offerings", OFFERING_COLUMNS, self._offering_values(row))
+                    self._save_line_items(conn, "offering", row)
+                    counts['offerings'] += 1
+            self._bump('users', 'requests', 'offerings')
+        return counts
+
+    # --- Users ---
+
+    @staticmethod
+    def _insert_user(conn, user: dict) -> int:
+        columns = [_USER_SQL[c] for c in USER_COLUMNS]
+        values = [user.get(c) if user.get(c) not in (None, "") else None for c in USER_COLUMNS]
+        cursor = conn.execute(
+            f"INSERT OR IGNORE INTO users ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", values)
+        return cursor.rowcount
+
+    @staticmethod
+    def _user_row(row: sqlite3.Row) -> dict:
+        return {column: row[_USER_SQL[column]] for column in USER_COLUMNS}
+
+    def add_user(self, user: dict) -> bool:
+        """Insert a user (CSV column names); False if the name is taken"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                added = self._insert_user(conn, user) == 1
+            self._bump('users')
+            return added
+
+    def get_user(self, name: str) -> Optional[dict]:
+        rows = self._query("SELECT * FROM users WHERE name = ?", (name,))
+        return self._user_row(rows[0]) if rows else None
+
+    def update_user(self, name: str, changes: dict) -> bool:
+        assignments = ", ".join(f"{_USER_SQL[column]} = ?" for column in changes)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(f"UPDATE users SET {assignments} WHERE name = ?", list(changes.values()) + [name])
+            self._bump('users')
+            return cursor.rowcount == 1
+
+    def users(self, user_type: Optional[str] = None) -> List[dict]:
+        if user_type:
+            rows = self._query("SELECT * FROM users WHERE user_type = ? ORDER BY rowid", (user_type,))
+        else:
+            rows = self._query("SELECT * FROM users ORDER BY rowid")
+        return [self._user_row(row) for row in rows]
+
+    def users_frame(self, user_type: Optional[str] = None):
+        return rows_to_frame(self.users(user_type), USER_COLUMNS)
+
+    # --- Requests and offerings ---
+
+    @staticmethod
+    def _upsert(conn, table: str, columns: List[str], values: list) -> int:
+        """Insert or update by id; a None id makes SQLite assign the next one. Returns the row's id"""
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+        cursor = conn.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}", values)
+        return values[0] if values[0] is not None else cursor.lastrowid
+
+    @staticmethod
+    def _blank_to_none(value):
+        return None if value == "" else value
+
+    def _request_values(self, row: dict) -> list:
+        values = [self._blank_to_none(row.get(column)) for column in REQUEST_COLUMNS]
+        return values + [URGENCY_RANK.get(row.get('urgency'), 1)]
+
+    @staticmethod
+    def _request_row(row: sqlite3.Row) -> dict:
+        data = dict(row)
+        del data['urgency_rank']
+        return data
+
+    def _offering_values(self, row: dict) -> list:
+        values = [self._blank_to_none(row.get(column)) for column in OFFERING_COLUMNS]
+        available = row.get('available')
+        values[OFFERING_COLUMNS.index('available')] = int(available in (True, 1, "True", "true", "1"))
+        return values
+
+    @staticmethod
+    def _offering_row(row: sqlite3.Row) -> dict:
+        data = dict(row)
+        data['available'] = bool(data['available'])
+        return data
+
+    def save_request(self, row: dict) -> int:
+        """
+        Insert or replace one request row and its line items (row['line_items'],
+        else parsed from 'items'). A row without an id gets a new one; returns the id.
+        """
+        with self._lock:
+            before = self.version('requests')
+            conn = self._connect()
+            with conn:
+                row = dict(row, id=self._upsert(conn, "requests", REQUEST_SQL_COLUMNS, self._request_values(row)))
+                self._save_line_items(conn, "request", row)
+            self._bump('requests')
+            after = self.version('requests')
+        self._written('requests', row, before, after)
+        return row['id']
+
+    def update_request(self, request_id, changes: dict) -> bool:
+        """Change some fields of one request in a single transaction"""
+        changes = dict(changes)
+        if 'urgency' in changes:
+            changes['urgency_rank'] = URGENCY_RANK.get(changes['urgency'], 1)
+        assignments = ", ".join(f"{column} = ?" for column in changes if column in REQUEST_SQL_COLUMNS[1:])
+        values = [changes[column] for column in changes if column in REQUEST_SQL_COLUMNS[1:]]
+        with self._lock:
+            before = self.version('requests')
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(f"UPDATE requests SET {assignments} WHERE id = ?", values + [int(request_id)])
+            self._bump('requests')
+            after = self.version('requests')
+        if cursor.rowcount == 1:
+            self._written('requests', dict(changes, id=int(request_id)), before, after)
+        return cursor.rowcount == 1
+
+    def requests(self, status: Statuses = None, requester_name: Optional[str] = None) -> List[dict]:
+        clauses, params = [], []
+        _status_clause("status", status, clauses, params)
+        if requester_name:
+            clauses.append("requester_name = ?")
+            params.append(requester_name)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [self._request_row(row) for row in self._query(f"SELECT * FROM requests{where} ORDER BY created_at, id", params)]
+
+    def requests_frame(self, status: Statuses = None, requester_name: Optional[str] = None):
+        return rows_to_frame(self.requests(status, requester_name), REQUEST_COLUMNS)
+
+    def count_requests(self, status: Statuses = None, urgency: Optional[str] = None) -> int:
+        """Row count from the trigger-maintained counters (no table scan)"""
+        clauses, params = ["name = 'requests'"], []
+        _status_clause("k1", status, clauses, params)
+        if urgency:
+            clauses.append("k2 = ?")
+            params.append(urgency)
+        return self._query(f"SELECT COALESCE(SUM(n), 0) FROM row_counts WHERE {' AND '.join(clauses)}", params)[0][0]
+
+    def page_requests(self, status: Statuses = ACTIVE_STATUSES, urgency: Optional[str] = None,
+                      cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        """
+        One page of requests, most urgent then oldest first. Keyset pagination
+        on (urgency rank, created_at, id): a page costs O(limit) whatever the
+        backlog size, and rows added meanwhile never shift later pages.
+        """
+        clauses, params = [], []
+        _status_clause("status", status, clauses, params)
+        if urgency:
+            clauses.append("urgency = ?")
+            params.append(urgency)
+        after = decode_cursor(cursor)
+        if after:
+            neg_rank, created_at, last_id = after
+            clauses.append("(urgency_rank < ? OR (urgency_rank = ? AND (created_at > ? OR (created_at = ? AND id > ?))))")
+            params += [-neg_rank, -neg_rank, created_at, created_at, last_id]
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(f"SELECT * FROM requests{where} ORDER BY urgency_rank DESC, created_at, id LIMIT ?",
+                           params + [limit + 1])
+        rows = [self._request_row(row) for row in rows]
+        next_cursor = encode_cursor(request_sort_key(rows[limit - 1])) if len(rows) > limit else None
+        return Page(rows[:limit], next_cursor, self.count_requests(status, urgency))
+
+    def save_offering(self, row: dict) -> int:
+        """Insert or replace one offering row and its line items; returns the id (assigned if missing)"""
+        with self._lock:
+            before = self.version('offerings')
+            conn = self._connect()
+            with conn:
+                row = dict(row, id=self._upsert(conn, "offerings", OFFERING_COLUMNS, self._offering_values(row)))
+                self._save_line_items(conn, "offering", row)
+            self._bump('offerings')
+            after = self.version('offerings')
+        self._written('offerings', row, before, after)
+        return row['id']
+
+    def update_offering(self, offering_id, changes: dict) -> bool:
+        changes = dict(changes)
+        if 'available' in changes:
+            changes['available'] = int(bool(changes['available']))
+        assignments = ", ".join(f"{column} = ?" for column in changes if column in OFFERING_COLUMNS[1:])
+        values = [changes[column] for column in changes if column in OFFERING_COLUMNS[1:]]
+        with self._lock:
+            before = self.version('offerings')
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(f"UPDATE offerings SET {assignments} WHERE id = ?", values + [int(offering_id)])
+            self._bump('offerings')
+            after = self.version('offerings')
+        if cursor.rowcount == 1:
+            self._written('offerings', dict(changes, id=int(offering_id)), before, after)
+        return cursor.rowcount == 1
+
+    def offerings(self, available: Optional[bool] = None, donor_name: Optional[str] = None) -> List[dict]:
+        clauses, params = [], []
+        if available is not None:
+            clauses.append("available = ?")
+            params.append(int(available))
+        if donor_name:
+            clauses.append("donor_name = ?")
+            params.append(donor_name)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(f"SELECT * FROM offerings{where} ORDER BY created_at, id", params)
+        return [self._offering_row(row) for row in rows]
+
+    def offerings_frame(self, available: Optional[bool] = None, donor_name: Optional[str] = None):
+        return rows_to_frame(self.offerings(available, donor_name), OFFERING_COLUMNS)
+
+    def count_offerings(self, available: Optional[bool] = None) -> int:
+        """Row count from the trigger-maintained counters (no table scan)"""
+        clauses, params = ["name = 'offerings'"], []
+        if available is not None:
+            clauses.append("k1 = ?")
+            params.append(str(int(available)))
+        return self._query(f"SELECT COALESCE(SUM(n), 0) FROM row_counts WHERE {' AND '.join(clauses)}", params)[0][0]
+
+    def page_offerings(self, available: Optional[bool] = True, cursor: Optional[str] = None,
+                       limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        """One page of offerings, newest first (keyset pagination on created_at, id)"""
+        clauses, params = [], []
+        if available is not None:
+            clauses.append("available = ?")
+            params.append(int(available))
+        after = decode_cursor(cursor)
+        if after:
+            created_at, last_id = after
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params += [created_at, created_at, last_id]
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(f"SELECT * FROM offerings{where} ORDER BY created_at DESC, id DESC LIMIT ?", params + [limit + 1])
+        rows = [self._offering_row(row) for row in rows]
+        next_cursor = encode_cursor(offering_sort_key(rows[limit - 1])) if len(rows) > limit else None
+        return Page(rows[:limit], next_cursor, self.count_offerings(available))
+
+    def line_items(self, parent_type: str = "request", parent_id: Optional[int] = None) -> List[dict]:
+        """Every line item of requests (or offerings, or just one of them), with the parent's status and created_at"""
+        if parent_type == "request":
+            sql = """SELECT li.*, r.status, r.created_at FROM line_items li
+                     JOIN requests r ON r.id = li.parent_id WHERE li.parent_type = 'request'"""
+        else:
+            sql = """SELECT li.*, CASE o.available WHEN 1 THEN 'available' ELSE 'taken' END AS status, o.created_at
+                     FROM line_items li JOIN offerings o ON o.id = li.parent_id WHERE li.parent_type = 'offering'"""
+        if parent_id is not None:
+            return [dict(row) for row in self._query(sql + " AND li.parent_id = ? ORDER BY li.position", [int(parent_id)])]
+        return [dict(row) for row in self._query(sql)]
+
+    def line_items_frame(self, parent_type: str = "request"):
+        return line_items_to_frame(self.line_items(parent_type))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CsvStore(WriteListeners):
+    """
+    The same interface on top of the original files: users in the pipe
+    separated user_information.csv (appended, never rewritten, on signup) and
+    requests/offerings in their event logs (see event_log.py).
+    """
+
+    def __init__(self, users_csv: str = USERS_CSV, requests_csv: str = REQUESTS_CSV, offerings_csv: str = OFFERINGS_CSV):
+        self.users_csv = users_csv
+        self.request_log = get_event_log(requests_csv, REQUEST_COLUMNS)
+        self.offering_log = get_event_log(offerings_csv, OFFERING_COLUMNS)
+        self._write_lock = threading.Lock()
+
+    def version(self, table: str):
+        """File stats of everything backing `table` (changes with every write)"""
+        if table == 'users':
+            try:
+                st = os.stat(self.users_csv)
+                return (st.st_ino, st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                return None
+        return (self.request_log if table == 'requests' else self.offering_log).version()
+
+    def add_user(self, user: dict) -> bool:
+        # The check and the append happen under one lock so two signups cannot both take a name
+        with file_lock(self.users_csv):
+            if self.get_user(user.get("Name")) is not None:
+                return False
+            with open(self.users_csv, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=USER_COLUMNS, delimiter='|')
+                if f.tell() == 0:
+                    writer.writeheader()
+                writer.writerow({column: user.get(column, "") for column in USER_COLUMNS})
+                f.flush()
+                os.fsync(f.fileno())
+            return True
+
+    def get_user(self, name: str) -> Optional[dict]:
+        for user in self.users():
+            if user["Name"] == name:
+                return user
+        return None
+
+    def update_user(self, name: str, changes: dict) -> bool:
+        with file_lock(self.users_csv):
+            users = self.users()
+            found = False
+            for user in users:
+                if user["Name"] == name:
+                    user.update(changes)
+                    found = True
+            if found:
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=USER_COLUMNS, delimiter='|')
+                writer.writeheader()
+                writer.writerows(users)
+                atomic_write(self.users_csv, buffer.getvalue())
+            return found
+
+    def users(self, user_type: Optional[str] = None) -> List[dict]:
+        if not os.path.exists(self.users_csv):
+            return []
+        with open(self.users_csv, 'r', newline='', encoding='utf-8') as f:
+            users = [{column: row.get(column) or None for column in USER_COLUMNS} for row in csv.DictReader(f, delimiter='|')]
+        return [user for user in users if not user_type or user["User Type"] == user_type]
+
+    def users_frame(self, user_type: Optional[str] = None):
+        return rows_to_frame(self.users(user_type), USER_COLUMNS)
+
+    def save_request(self, row: dict) -> int:
+        row = dict(row, id=row.get('id') or new_id())
+        # Versions read around the write under one lock, so listeners see this write alone
+        with self._write_lock:
+            before = self.version('requests')
+            self.request_log.append(row)
+            after = self.version('requests')
+        self._written('requests', row, before, after)
+        return row['id']
+
+    def update_request(self, request_id, changes: dict) -> bool:
+        with self._write_lock:
+            before = self.version('requests')
+            if self.request_log.update(request_id, changes) is None:
+                return False
+            after = self.version('requests')
+        self._written('requests', dict(changes, id=request_id), before, after)
+        return True
+
+    def requests(self, status: Statuses = None, requester_name: Optional[str] = None) -> List[dict]:
+        statuses = status_tuple(status)
+        return [row for row in self.request_log.rows()
+                if (not statuses or row['status'] in statuses) and (not requester_name or row['requester_name'] == requester_name)]
+
+    def requests_frame(self, status: Statuses = None, requester_name: Optional[str] = None):
+        frame = self.request_log.read_dataframe()
+        if status:
+            frame = frame[frame['status'].isin(status_tuple(status))]
+        if requester_name:
+            frame = frame[frame['requester_name'] == requester_name]
+        return frame
+
+    def count_requests(self, status: Statuses = None, urgency: Optional[str] = None) -> int:
+        return len(self._filter_requests(status, urgency))
+
+    def _filter_requests(self, status: Statuses, urgency: Optional[str]) -> List[dict]:
+        statuses = status_tuple(status)
+        return [row for row in self.request_log.rows()
+                if (not statuses or row['status'] in statuses) and (not urgency or row['urgency'] == urgency)]
+
+    def page_requests(self, status: Statuses = ACTIVE_STATUSES, urgency: Optional[str] = None,
+                      cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        return page_rows(self._filter_requests(status, urgency), request_sort_key, cursor, limit)
+
+    def save_offering(self, row: dict) -> int:
+        row = dict(row, id=row.get('id') or new_id())
+        with self._write_lock:
+            before = self.version('offerings')
+            self.offering_log.append(row)
+            after = self.version('offerings')
+        self._written('offerings', row, before, after)
+        return row['id']
+
+    def update_offering(self, offering_id, changes: dict) -> bool:
+        with self._write_lock:
+            before = self.version('offerings')
+            if self.offering_log.update(offering_id, changes) is None:
+                return False
+            after = self.version('offerings')
+        self._written('offerings', dict(changes, id=offering_id), before, after)
+        return True
+
+    def offerings(self, available: Optional[bool] = None, donor_name: Optional[str] = None) -> List[dict]:
+        rows = self.offering_log.rows()
+        for row in rows:
+            row['available'] = row['available'] == "True"
+        return [row for row in rows
+                if (available is None or row['available'] == available) and (not donor_name or row['donor_name'] == donor_name)]
+
+    def offerings_frame(self, available: Optional[bool] = None, donor_name: Optional[str] = None):
+        frame = self.offering_log.read_dataframe()
+        if available is not None:
+            frame = frame[frame['available'] == available]
+        if donor_name:
+            frame = frame[frame['donor_name'] == donor_name]
+        return frame
+
+    def count_offerings(self, available: Optional[bool] = None) -> int:
+        return len(self.offerings(available))
+
+    def page_offerings(self, available: Optional[bool] = True, cursor: Optional[str] = None,
+                       limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        return page_rows(self.offerings(available), offering_sort_key, cursor, limit, descending=True)
+
+    def line_items(self, parent_type: str = "request", parent_id: Optional[int] = None) -> List[dict]:
+        """
+        Line items parsed from the items text. The CSV files only keep the
+        flattened form, so allocated quantities are not kept (always 0).
+        """
+        if parent_type == "request":
+            parents = [(row, row['status']) for row in self.request_log.rows()]
+        else:
+            parents = [(row, "available" if row['available'] else "taken") for row in self.offerings()]
+        return [dict(item, parent_type=parent_type, parent_id=int(row['id']), status=status, created_at=row['created_at'])
+                for row, status in parents if parent_id is None or int(row['id']) == int(parent_id)
+                for item in row_line_items(row)]
+
+    def line_items_frame(self, parent_type: str = "request"):
+        return line_items_to_frame(self.line_items(parent_type))
+
+    def close(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store_from_env():
+    """STORAGE_BACKEND=sqlite (default, file from STORAGE_PATH) or csv"""
+    kind = os.environ.get("STORAGE_BACKEND", "sqlite")
+    if kind == "csv":
+        return CsvStore()
+    return SqliteStore(os.environ.get("STORAGE_PATH", "donations.sqlite3"))
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = store_from_env()
+        return _store
+
+
+def set_store(store):
+    global _store
+    with _store_lock:
+        _store = store
+
+
+if __name__ == "__main__":
+    # Re-import the CSV files into the SQLite database
+    counts = SqliteStore(os.environ.get("STORAGE_PATH", "donations.sqlite3")).import_csv()
+    print(f"Imported {counts['users']} new users, {counts['requests']} requests, {counts['offerings']} offerings")
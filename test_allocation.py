@@ -0,0 +1,134 @@
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from allocation import COST_SCALE, AllocationEngine, MinCostFlow, apply_allocations
+from matching import ItemSignature, URGENCY_WEIGHTS, item_similarity
+from models import Donor, Item, Needers, Offering, Request, RequestStatus
+
+
+def _best_by_brute_force(supplies, demands, benefit):
+    best = 0
+    pairs = list(itertools.product(range(len(supplies)), range(len(demands))))
+    for amounts in itertools.product(range(4), repeat=len(pairs)):
+        sent = dict(zip(pairs, amounts))
+        if all(sum(sent[i, j] for j in range(len(demands))) <= s for i, s in enumerate(supplies)) and \
+                all(sum(sent[i, j] for i in range(len(supplies))) <= d for j, d in enumerate(demands)):
+            best = max(best, sum(benefit[i][j] * x for (i, j), x in sent.items()))
+    return best
+
+
+def test_min_cost_flow_maximizes_benefit():
+    rng = random.Random(5)
+    for _ in range(30):
+        supplies = [rng.randint(0, 3) for _ in range(2)]
+        demands = [rng.randint(0, 3) for _ in range(2)]
+        benefit = [[rng.choice([0, 1, 3, 5]) for _ in demands] for _ in supplies]
+        flow = MinCostFlow(6)
+        for i, s in enumerate(supplies):
+            flow.add_edge(0, 1 + i, s, 0)
+        for j, d in enumerate(demands):
+            flow.add_edge(3 + j, 5, d, 0)
+            for i in range(len(supplies)):
+                if benefit[i][j]:
+                    flow.add_edge(1 + i, 3 + j, 3, -benefit[i][j])
+        _, cost = flow.solve(0, 5)
+        assert -cost == _best_by_brute_force(supplies, demands, benefit)
+
+
+def _request(name, quantity, urgency, days_ago):
+    request = Request(Needers(name, "Seattle"), [Item("Wool Blanket", quantity, category="shelter")], urgency)
+    request.created_at = datetime(2025, 10, 18) - timedelta(days=days_ago)
+    return request
+
+
+def test_scarce_units_go_to_urgent_then_oldest_requests():
+    donor = Donor("Ana", "Seattle")
+    offering = Offering(donor, [Item("Blankets", 5, category="shelter"), Item("Canned Soup", 9, category="food")])
+    urgent = _request("urgent", 3, "urgent", 0)
+    old = _request("old", 3, "normal", 5)
+    new = _request("new", 3, "normal", 1)
+
+    allocations = AllocationEngine().allocate([new, old, urgent], [offering])
+    given = {}
+    for allocation in allocations:
+        assert allocation.offering_item.name == "Blankets"
+        given[allocation.request.requester.name] = given.get(allocation.request.requester.name, 0) + allocation.quantity
+    assert given == {"urgent": 3, "old": 2}
+
+    apply_allocations(allocations)
+    assert urgent.status == RequestStatus.FULFILLED and urgent.fulfilled_by is donor
+    assert old.status == RequestStatus.IN_PROGRESS and old.items[0].remaining == 1
+    assert new.status == RequestStatus.OPEN
+    assert offering.items[0].remaining == 0 and offering.items[1].remaining == 9
+
+
+WORDS = ["warm", "wool", "fleece", "winter", "canned", "baby", "large", "thermal", "kids", "organic", "socks", "soup"]
+HEADS = [("blanket", "shelter"), ("jacket", "clothing"), ("socks", "clothing"), ("soup", "food"),
+         ("beans", "food"), ("tent", "shelter"), ("soap", "hygiene"), ("gloves", "clothing")]
+
+
+def _diverse_lines(rng, n_names, n_lines):
+    names = set()
+    while len(names) < n_names:
+        head, category = rng.choice(HEADS)
+        names.add((" ".join(rng.sample(WORDS, rng.randint(0, 3)) + [head]), category))
+    names = sorted(names)
+    now = datetime(2025, 10, 18)
+
+    def line(i):
+        name, category = rng.choice(names)
+        return SimpleNamespace(id=i, items=[Item(name, rng.randint(1, 20), category=category)],
+                               urgency=rng.choice(["low", "normal", "high", "urgent"]),
+                               created_at=now - timedelta(hours=rng.randint(0, 500)))
+    return [line(i) for i in range(n_lines // 2)], [line(i) for i in range(n_lines // 2)]
+
+
+def _benefit(allocations):
+    return sum(round(COST_SCALE * allocation.score) * allocation.quantity for allocation in allocations)
+
+
+def _best_benefit(requests, offerings, min_similarity=0.5):
+    """One node per line item and an edge for every pair that matches well enough"""
+    off_items = [item for offering in offerings for item in offering.items]
+    req_items = [(URGENCY_WEIGHTS[request.urgency], item) for request in requests for item in request.items]
+    flow = MinCostFlow(2 + len(off_items) + len(req_items))
+    for i, item in enumerate(off_items):
+        flow.add_edge(0, 2 + i, item.remaining, 0)
+    for j, (weight, item) in enumerate(req_items):
+        node = 2 + len(off_items) + j
+        flow.add_edge(node, 1, item.remaining, 0)
+        for i, off_item in enumerate(off_items):
+            sim = item_similarity(ItemSignature(item), ItemSignature(off_item))
+            if sim >= min_similarity:
+                flow.add_edge(2 + i, node, item.remaining, -int(round(COST_SCALE * weight * sim)))
+    _, cost = flow.solve(0, 1)
+    return -cost
+
+
+def _check_feasible(allocations):
+    given = {}
+    for allocation in allocations:
+        for item in (allocation.request_item, allocation.offering_item):
+            given[id(item)] = given.get(id(item), 0) + allocation.quantity
+            assert given[id(item)] <= item.remaining
+
+
+def test_pooled_classes_find_the_best_allocation():
+    rng = random.Random(8)
+    for _ in range(5):
+        requests, offerings = _diverse_lines(rng, 40, 120)
+        allocations = AllocationEngine().allocate(requests, offerings)
+        _check_feasible(allocations)
+        assert _benefit(allocations) == _best_benefit(requests, offerings)
+
+
+def test_diverse_names_allocate_quickly():
+    # 3k line items over 300 names took about 10 s when every distinct name was its own class pair
+    requests, offerings = _diverse_lines(random.Random(9), 300, 3000)
+    start = time.perf_counter()
+    allocations = AllocationEngine().allocate(requests, offerings)
+    assert time.perf_counter() - start < 2.0
+    _check_feasible(allocations)
+    assert allocations
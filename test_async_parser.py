@@ -0,0 +1,46 @@
+import asyncio
+import json
+from async_parser import AsyncTextParser
+from llm_backends import LLMBackend
+
+
+class SlowBackend(LLMBackend):
+    """Answers each parse with the text's number after a short wait, failing the first `failures` calls"""
+    model_name = "slow-test"
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = self.in_flight = self.max_in_flight = 0
+
+    async def generate_async(self, prompt: str, task: str = "") -> str:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.calls <= self.failures:
+                raise ConnectionError("try again")
+            number = prompt.split('USER TEXT: "request ')[1].split('"')[0]
+            return json.dumps({'items': [{'name': f"Item {number}", 'quantity': 1, 'category': "other"}]})
+        finally:
+            self.in_flight -= 1
+
+
+def test_parse_many_is_bounded_and_keeps_input_order():
+    backend = SlowBackend()
+    parser = AsyncTextParser(concurrency=3, backend=backend)
+    texts = [f"request {i}" for i in range(10)]
+    results = parser.run_many(texts, use_cache=False)
+    assert [items[0].name for items, _ in results] == [f"Item {i}" for i in range(10)]
+    assert backend.calls == 10 and backend.max_in_flight == 3
+
+
+def test_failed_calls_are_retried_then_fall_back():
+    backend = SlowBackend(failures=2)
+    parser = AsyncTextParser(max_retries=2, backoff_base=0.001, backend=backend)
+    items, _ = asyncio.run(parser.parse_request("request 7", use_rules=False))
+    assert items[0].name == "Item 7" and backend.calls == 3
+
+    parser = AsyncTextParser(max_retries=1, backoff_base=0.001, backend=SlowBackend(failures=5))
+    items, urgency = asyncio.run(parser.parse_request("request 8", use_rules=False))
+    assert items.tier == "fallback" and urgency == "normal"
@@ -0,0 +1,28 @@
+import json
+from categorizer import classify_local
+from llm_backends import StubBackend
+from models import Item, ItemCategory
+
+
+def test_lexicon_prefers_phrases_and_needs_a_name_hit():
+    assert classify_local("Sleeping Bags")[0] == "shelter"
+    assert classify_local("Baby Formula")[0] == "food"
+    assert classify_local("Gift", "comes with soap")[0] is None
+    # Evenly split evidence is not confident enough
+    assert classify_local("soap and soup")[0] is None
+
+
+def test_unknown_items_are_categorized_in_one_batched_call():
+    backend = StubBackend(responses={'categorize_batch': json.dumps(["medical", "other"])})
+    items = [Item("Wool Socks", 2, lazy=True, backend=backend), Item("Nebulizer", 1, lazy=True, backend=backend),
+             Item("Puzzle", 1, lazy=True, backend=backend)]
+    assert [item.category_pending for item in items] == [False, True, True]
+
+    Item.categorize_many(items, backend=backend)
+    assert backend.calls == 1
+    assert [item.category for item in items] == [ItemCategory.CLOTHING, ItemCategory.MEDICAL, ItemCategory.OTHER]
+
+    # The answers are cached: the same items need no further call
+    again = [Item("Nebulizer", 1, lazy=True, backend=backend)]
+    Item.categorize_many(again, backend=backend)
+    assert backend.calls == 1 and again[0].category == ItemCategory.MEDICAL
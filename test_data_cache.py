@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from data_cache import DataCache
+from models import Donor, Item, Needers, Offering, Request
+from storage import CsvStore, get_store, set_store
+
+
+def _request(name, urgency, items=("blankets",), days_ago=0):
+    request = Request(Needers(name, "Seattle"), [Item(item, 2, category="shelter") for item in items], urgency)
+    request.created_at = datetime(2025, 10, 1) - timedelta(days=days_ago)
+    request.log_to_csv()
+    return request
+
+
+def _names(frame):
+    return list(frame['requester_name'])
+
+
+def test_top_requests_follow_writes_without_reloading():
+    cache = DataCache()
+    _request("low", "low")
+    _request("urgent", "urgent")
+    assert _names(cache.top_requests(k=5)) == ["urgent", "low"]
+    loads = cache.loads['requests']
+
+    high = _request("high", "high")
+    old = _request("old", "normal", days_ago=10)
+    assert _names(cache.top_requests(k=5)) == ["old", "urgent", "high", "low"]
+
+    get_store().update_request(high.id, {'status': "fulfilled"})
+    old.urgency = "low"
+    old.log_to_csv()
+    assert _names(cache.top_requests(k=5)) == ["urgent", "old", "low"]
+    assert _names(cache.top_requests(k=1)) == ["urgent"]
+    # Every change above was pushed to the queue; the table was never reloaded
+    assert cache.loads['requests'] == loads
+
+
+def test_unreported_writes_rebuild_the_queue():
+    cache = DataCache()
+    first = _request("first", "normal")
+    assert _names(cache.top_requests()) == ["first"]
+    # Another connection to the same file, as another process would write
+    other = type(get_store())(get_store().path, import_existing=False)
+    other.save_request(dict(first.to_dict(), id=None, requester_name="second", urgency="urgent"))
+    assert _names(cache.top_requests()) == ["second", "first"]
+
+
+def test_top_requests_by_category():
+    cache = DataCache()
+    _request("beds", "urgent", items=("cot",))
+    food = Request(Needers("food", "Seattle"), [Item("rice", 5, category="food")], "low")
+    assert _names(cache.top_requests(category="food")) == ["food"]
+    get_store().update_request(food.id, {'status': "cancelled"})
+    assert _names(cache.top_requests(category="food")) == []
+
+
+def test_csv_store_updates_reach_the_queue(tmp_path):
+    set_store(CsvStore(str(tmp_path / "u.csv"), str(tmp_path / "r.csv"), str(tmp_path / "o.csv")))
+    cache = DataCache()
+    done = _request("done", "urgent")
+    _request("waiting", "low")
+    assert _names(cache.top_requests()) == ["done", "waiting"]
+    # Page rows from the CSV store carry string ids
+    get_store().update_request(str(done.id), {'status': "fulfilled"})
+    assert _names(cache.top_requests()) == ["waiting"]
+
+
+def test_search_uses_line_item_descriptions_and_categories():
+    cache = DataCache()
+    Request(Needers("cots", "Seattle"), [Item("Cot", 2, description="folding, for the overflow room", category="shelter")])
+    Request(Needers("soup", "Seattle"), [Item("Canned Soup", 5, category="food")])
+    assert _names(cache.search_requests("folding")) == ["cots"]
+    # "cot" is not in the lexicon; the category comes from the stored line item
+    assert _names(cache.search_requests("shelter")) == ["cots"]
+
+
+def test_tables_reload_only_after_a_write(tmp_path):
+    files = (str(tmp_path / "u.csv"), str(tmp_path / "r.csv"), str(tmp_path / "o.csv"))
+    for store in (get_store(), CsvStore(*files)):
+        cache = DataCache(store)
+        store.add_user({"Name": "Ballard Food Bank", "Address": "Seattle", "User Type": "Organization"})
+        for _ in range(3):
+            assert cache.user_type("Ballard Food Bank") == "Organization"
+            assert len(cache.requests()) == 0
+        assert cache.loads == {'users': 1, 'requests': 1, 'offerings': 0}
+
+        # A write from another store object over the same data, as another process would make
+        other = CsvStore(*files) if isinstance(store, CsvStore) else type(store)(store.path, import_existing=False)
+        other.add_user({"Name": "Sam", "Address": "Seattle", "User Type": "Person in Need"})
+        other.save_request({'id': None, 'requester_name': "Sam", 'items': "Rice (2)", 'urgency': "normal",
+                            'status': "open", 'created_at': "2025-10-01T09:00:00"})
+        assert cache.user_type("Sam") == "Person in Need" and len(cache.requests()) == 1
+        assert cache.count_requests() == 1
+        assert cache.loads == {'users': 2, 'requests': 2, 'offerings': 0}
+
+
+def test_search_follows_writes_without_reloading():
+    cache = DataCache()
+    Request(Needers("cots", "Seattle"), [Item("Cot", 2, category="shelter")])
+    assert _names(cache.search_requests("cot")) == ["cots"]
+    loads = dict(cache.loads)
+
+    soup = Request(Needers("soup", "Seattle"), [Item("Canned Soup", 5, category="food")])
+    assert _names(cache.search_requests("soup")) == ["soup"]
+    get_store().update_request(soup.id, {'status': "fulfilled"})
+    assert _names(cache.search_requests("soup")) == []
+
+    offering = Offering(Donor("Ana", "Seattle"), [Item("Wool Blanket", 3, category="shelter")])
+    assert list(cache.search_offerings("blanket")['donor_name']) == ["Ana"]
+    loads['offerings'] = cache.loads['offerings']
+    get_store().update_offering(offering.id, {'available': False})
+    assert len(cache.search_offerings("blanket")) == 0
+    # Every write above was indexed as it was saved; neither table was reloaded
+    assert cache.loads == loads
+
+    # Another connection to the same file, as another process would write
+    other = type(get_store())(get_store().path, import_existing=False)
+    other.save_request(dict(soup.to_dict(), id=None, requester_name="more soup", status="open"))
+    assert _names(cache.search_requests("soup")) == ["more soup"]
+    assert cache.loads['requests'] == loads['requests'] + 1
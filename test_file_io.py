@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import threading
+import time
+import pytest
+from file_io import GroupCommitAppender, atomic_write, file_lock
+
+
+class SlowAppender(GroupCommitAppender):
+    def _write(self, data: str):
+        time.sleep(0.005)
+        super()._write(data)
+
+
+def test_group_commit_keeps_every_line_whole(tmp_path):
+    path = str(tmp_path / "log.csv")
+    appender = SlowAppender(path, header="id,who\n", fsync=False)
+
+    def write(who):
+        for i in range(25):
+            appender.append(f"{i},{who}\n")
+
+    threads = [threading.Thread(target=write, args=(who,)) for who in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "id,who" and lines.count("id,who") == 1
+    assert sorted(lines[1:]) == sorted(f"{i},{who}" for who in range(8) for i in range(25))
+    # Threads that arrived during a write were committed together
+    assert appender.batches < 200
+
+
+def test_write_errors_reach_the_caller(tmp_path):
+    appender = GroupCommitAppender(str(tmp_path / "missing" / "log.csv"))
+    with pytest.raises(FileNotFoundError):
+        appender.append("1\n")
+
+
+def _increment(path, times):
+    for _ in range(times):
+        with file_lock(path):
+            with open(path) as f:
+                value = int(f.read())
+            with file_lock(path):  # re-entrant
+                atomic_write(path, str(value + 1), fsync=False)
+
+
+def test_file_lock_serializes_processes(tmp_path):
+    path = str(tmp_path / "counter.txt")
+    atomic_write(path, "0")
+    processes = [multiprocessing.get_context("fork").Process(target=_increment, args=(path, 50)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    _increment(path, 50)
+    for process in processes:
+        process.join()
+    with open(path) as f:
+        assert f.read() == "250"
+
+
+def test_atomic_write_leaves_the_old_file_on_failure(tmp_path):
+    path = str(tmp_path / "users.csv")
+    atomic_write(path, "old")
+    with pytest.raises(TypeError):
+        atomic_write(path, None)
+    with open(path) as f:
+        assert f.read() == "old"
+    assert os.listdir(tmp_path) == ["users.csv"]
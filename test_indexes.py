@@ -0,0 +1,62 @@
+import random
+from types import SimpleNamespace
+from indexes import AttributeIndex
+from models import CoordinationSystem, Donor, Item, ItemCategory, Needers, Offering, Request, RequestStatus
+
+STATUSES = ["open", "in_progress", "fulfilled"]
+CATEGORIES = ["food", "shelter", "clothing", "hygiene"]
+
+
+def _brute_force(objects, **criteria):
+    def allowed(value, wanted):
+        return wanted is None or value in (wanted if isinstance(wanted, (set, tuple, list)) else {wanted})
+    return [obj for obj in objects.values()
+            if allowed(obj.status, criteria.get('status'))
+            and (criteria.get('category') is None or obj.categories & set(
+                criteria['category'] if isinstance(criteria['category'], tuple) else {criteria['category']}))]
+
+
+def test_queries_agree_with_a_scan_through_updates():
+    rng = random.Random(4)
+    index = AttributeIndex({'status': lambda o: o.status, 'category': lambda o: o.categories})
+    objects = {}
+    for step in range(400):
+        action = rng.random()
+        if action < 0.4 or not objects:
+            obj = SimpleNamespace(id=step, status=rng.choice(STATUSES), categories=set(rng.sample(CATEGORIES, 2)))
+            objects[obj.id] = obj
+            index.update(obj)
+        elif action < 0.8:
+            obj = objects[rng.choice(sorted(objects))]
+            obj.status = rng.choice(STATUSES)
+            obj.categories = set(rng.sample(CATEGORIES, rng.randint(1, 2)))
+            index.update(obj)
+        else:
+            index.remove(objects.pop(rng.choice(sorted(objects))))
+
+        status = rng.choice([None, "open", ("open", "in_progress")])
+        category = rng.choice([None, "food", ("shelter", "hygiene")])
+        expected = _brute_force(objects, status=status, category=category)
+        assert index.query(status=status, category=category) == expected
+        assert index.count(status=status, category=category) == len(expected)
+
+
+def test_system_indexes_follow_status_changes():
+    system = CoordinationSystem()
+    needer, donor = Needers("Sam", "Seattle"), Donor("Ana", "Seattle")
+    soup = Request(needer, [Item("soup", 2, category="food")])
+    tent = Request(needer, [Item("tent", 1, category="shelter")], "urgent")
+    system.add_request(soup)
+    system.add_request(tent)
+    offering = Offering(donor, [Item("rice", 5, category="food")])
+    system.add_offering(offering)
+
+    assert system.get_open_requests(category=ItemCategory.FOOD) == [soup]
+    assert system.get_open_requests(urgency="urgent") == [tent]
+    soup.fulfill(donor)
+    assert system.get_open_requests() == [tent]
+    assert system.get_requests(status=RequestStatus.FULFILLED, requester=needer) == [soup]
+
+    assert system.get_available_offerings(category=ItemCategory.FOOD, donor=donor) == [offering]
+    offering.mark_donated()
+    assert system.get_available_offerings() == []
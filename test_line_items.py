@@ -0,0 +1,44 @@
+import random
+from datetime import datetime, timedelta
+from line_items import parse_items_text, totals
+from models import Item, Needers, Request
+from storage import CsvStore, get_store, set_store
+
+NAMES = [("Wool Blanket", "shelter"), ("Canned Soup", "food"), ("Rice", "food"), ("Socks", "clothing")]
+
+
+def test_legacy_items_text_is_parsed():
+    rows = parse_items_text("Warm Blanket (9); Canned Soup (5); mystery box")
+    assert [(row['position'], row['name'], row['quantity'], row['category']) for row in rows] == [
+        (0, "Warm Blanket", 9, "shelter"), (1, "Canned Soup", 5, "food"), (2, "mystery box", 1, "other")]
+    assert parse_items_text("nan") == []
+
+
+def _saved_requests(rng):
+    expected = []
+    for i in range(30):
+        items = [Item(name, rng.randint(1, 9), category=category) for name, category in rng.sample(NAMES, 2)]
+        request = Request(Needers(f"needer{i}", "Seattle"), items)
+        request.created_at = datetime(2025, 10, 1) + timedelta(days=i % 10)
+        if i % 3 == 0:
+            request.fulfill(None)
+        request.log_to_csv()
+        expected += [(request.created_at, request.status.value, item) for item in items]
+    return expected
+
+
+def test_totals_match_the_saved_items(tmp_path):
+    for store in (get_store(), CsvStore(str(tmp_path / "u.csv"), str(tmp_path / "r.csv"), str(tmp_path / "o.csv"))):
+        set_store(store)
+        expected = _saved_requests(random.Random(1))
+        frame = store.line_items_frame("request")
+        assert len(frame) == len(expected)
+
+        since = datetime(2025, 10, 5)
+        result = totals(frame, by=('category', 'name'), since=since, status="open", item="soup")
+        sums = {}
+        for created_at, status, item in expected:
+            if created_at >= since and status == "open" and "soup" in item.name.lower():
+                key = (item.category.value, item.name)
+                sums[key] = sums.get(key, 0) + item.quantity
+        assert sums and {(row['category'], row['name']): row['quantity'] for row in result.to_dict('records')} == sums
@@ -0,0 +1,31 @@
+import json
+import pytest
+from llm_backends import CassetteBackend, CassetteMiss, StubBackend
+from models import TextParser
+
+
+def test_stub_answers_parse_prompts_deterministically():
+    prompt = TextParser._build_parse_prompt("We need 20 blankets and 5 cans of soup asap")
+    first = json.loads(StubBackend().generate(prompt, task="parse"))
+    assert first == json.loads(StubBackend().generate(prompt, task="parse"))
+    assert [(item['name'], item['quantity'], item['category']) for item in first['items']] == \
+        [("Blankets", 20, "shelter"), ("Soup", 5, "food")]
+    assert first['urgency'] == "urgent"
+
+
+def test_cassette_records_then_replays_offline(tmp_path):
+    path = str(tmp_path / "cassette.json")
+    inner = StubBackend(responses={'message': lambda prompt: prompt.upper()})
+    recorder = CassetteBackend(path, inner=inner, mode="record")
+    assert recorder.generate("hello", task="message") == "HELLO"
+
+    replay = CassetteBackend(path, mode="replay")
+    assert replay.generate("hello", task="message") == "HELLO"
+    assert replay.model_name == "local-stub" and replay.hits == 1
+    with pytest.raises(CassetteMiss):
+        replay.generate("never recorded", task="message")
+
+    auto = CassetteBackend(path, inner=inner, mode="auto")
+    auto.generate("hello", task="message")
+    auto.generate("new", task="message")
+    assert inner.calls == 2 and (auto.hits, auto.misses) == (1, 1)
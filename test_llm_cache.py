@@ -0,0 +1,39 @@
+import time
+from llm_backends import StubBackend
+from llm_cache import LLMCache
+from models import TextParser
+
+
+def test_entries_are_keyed_by_text_prompt_version_and_model(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("request", "Need 2  Blankets", "v1", "model-a", {'urgency': "high"})
+    # Whitespace and case do not matter; prompt version and model do
+    assert cache.get("request", "need 2 blankets", "v1", "model-a") == {'urgency': "high"}
+    assert cache.get("request", "need 2 blankets", "v2", "model-a") is None
+    assert cache.get("request", "need 2 blankets", "v1", "model-b") is None
+    # Survives a restart (read back from SQLite, not the in-memory LRU)
+    assert LLMCache(str(tmp_path / "cache.sqlite3")).get("request", "Need 2 blankets", "v1", "model-a") == {'urgency': "high"}
+
+
+def test_expired_and_least_recently_used_entries_are_dropped(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"), max_entries=2, ttl_seconds=60, memory_entries=0)
+    for text in ("a", "b"):
+        cache.put("category", text, "v1", "m", text.upper())
+        time.sleep(0.01)
+    assert cache.get("category", "a", "v1", "m") == "A"  # "b" is now least recently used
+    cache.put("category", "c", "v1", "m", "C")
+    assert cache.get("category", "b", "v1", "m") is None
+    assert cache.get("category", "a", "v1", "m") == "A"
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get("category", "a", "v1", "m") is None
+
+
+def test_text_parser_calls_the_model_once_per_text():
+    backend = StubBackend()
+    text = "Looking for winter clothes for my kids"
+    first, _ = TextParser.parse_request(text, use_rules=False, backend=backend)
+    second, _ = TextParser.parse_request(text, use_rules=False, backend=backend)
+    assert backend.calls == 1 and second.cached
+    assert [item.name for item in second] == [item.name for item in first]
@@ -0,0 +1,57 @@
+import random
+from types import SimpleNamespace
+from llm_backends import StubBackend
+from llm_matching import build_chunk_prompt, chunked_llm_match, estimate_tokens, pack_chunks, parse_chunk_response
+from matching import MatchingEngine
+from models import Item
+
+NAMES = [("wool blanket", "shelter"), ("tent", "shelter"), ("canned soup", "food"), ("rice", "food"),
+         ("winter jacket", "clothing"), ("socks", "clothing")]
+
+
+def _post(rng, i, kind):
+    items = [Item(name, rng.randint(1, 20), category=category) for name, category in rng.sample(NAMES, rng.randint(1, 2))]
+    person = SimpleNamespace(name=f"{kind}{i}", location="Seattle")
+    if kind == "R":
+        return SimpleNamespace(id=i, items=items, requester=person, urgency="normal")
+    return SimpleNamespace(id=i, items=items, donor=person)
+
+
+def test_chunks_cover_every_pair_once_within_budget():
+    rng = random.Random(3)
+    requests = {i: _post(rng, i, "R") for i in range(40)}
+    offerings = {i: _post(rng, i, "O") for i in range(60)}
+    pairs = {r: sorted(rng.sample(sorted(offerings), rng.randint(1, 30))) for r in requests}
+
+    chunks = pack_chunks(requests, offerings, pairs, token_budget=800)
+    assert len(chunks) > 1
+    packed = sorted((r, o) for chunk in chunks for r, ids in chunk.items() for o in ids)
+    assert packed == sorted((r, o) for r, ids in pairs.items() for o in ids)
+    for chunk in chunks:
+        assert estimate_tokens(build_chunk_prompt(chunk, requests, offerings)) <= 800
+
+
+def test_responses_outside_the_chunk_are_dropped():
+    chunk = {1: [2, 3]}
+    response = "R1,O2,0.9,blankets\nR1,O4,0.95,not a candidate\nR1,O3,0.4,too low\nnonsense\nR1,Ox,0.8,bad id"
+    assert parse_chunk_response(response, chunk) == [(1, 2, 0.9, "blankets")]
+
+
+def test_chunked_match_only_asks_about_candidates():
+    rng = random.Random(9)
+    requests = [_post(rng, i, "R") for i in range(20)]
+    offerings = [_post(rng, i, "O") for i in range(20)]
+    matcher = MatchingEngine()
+    for offering in offerings:
+        matcher.add_offering(offering)
+
+    backend = StubBackend()
+    matches = chunked_llm_match(backend, matcher, requests, offerings, token_budget=600)
+    assert backend.calls > 1
+    assert matches
+    for match in matches:
+        assert match['offering_id'] in matcher.candidates(match['request'])
+        assert match['confidence'] >= 0.5
+    # Merged by id: each pair once, best first
+    assert len({(m['request_id'], m['offering_id']) for m in matches}) == len(matches)
+    assert [m['confidence'] for m in matches] == sorted((m['confidence'] for m in matches), reverse=True)
@@ -0,0 +1,126 @@
+import random
+from datetime import datetime
+from types import SimpleNamespace
+from matching import IncrementalMatcher, MatchingEngine
+from models import Item
+
+NOW = datetime(2025, 10, 18)
+
+
+def _request(i, *items, urgency="normal"):
+    return SimpleNamespace(id=i, items=[Item(name, qty, category=category) for name, qty, category in items],
+                           urgency=urgency, created_at=NOW)
+
+
+def _offering(i, *items):
+    return SimpleNamespace(id=i, items=[Item(name, qty, category=category) for name, qty, category in items])
+
+
+def test_same_item_ranks_above_related_ones():
+    engine = MatchingEngine(min_confidence=0.0)
+    blankets = _offering(1, ("Wool Blankets", 10, "shelter"))
+    tent = _offering(2, ("Tent", 2, "shelter"))
+    soup = _offering(3, ("Canned Soup", 40, "food"))
+    for offering in (blankets, tent, soup):
+        engine.add_offering(offering)
+
+    request = _request(10, ("Warm Blankets", 5, "shelter"))
+    matches = engine.match_request(request, NOW)
+    assert [match['offering'].id for match in matches] == [1, 2]
+    assert matches[0]['confidence'] > matches[1]['confidence']
+    # Same input, same answer
+    assert [m['confidence'] for m in engine.match_request(request, NOW)] == [m['confidence'] for m in matches]
+
+    engine.remove_offering(blankets)
+    assert [match['offering'].id for match in engine.match_request(request, NOW)] == [2]
+    assert 1 not in engine and 3 in engine
+
+
+NAMES = [("warm blanket", "shelter"), ("wool blanket", "shelter"), ("sleeping bag", "shelter"), ("tent", "shelter"),
+         ("canned soup", "food"), ("soup", "food"), ("rice", "food"), ("canned beans", "food"),
+         ("winter jacket", "clothing"), ("wool socks", "clothing"), ("socks", "clothing"), ("soap", "hygiene")]
+
+
+def _items(rng):
+    return [Item(name, rng.randint(1, 40), category=category) for name, category in rng.sample(NAMES, rng.randint(1, 3))]
+
+
+def _random_request(rng, i):
+    return SimpleNamespace(id=i, items=_items(rng), urgency=rng.choice(["low", "normal", "urgent"]), created_at=NOW)
+
+
+def _random_offering(rng, i):
+    return SimpleNamespace(id=i, items=_items(rng))
+
+
+def test_incremental_updates_equal_a_full_recompute():
+    rng = random.Random(7)
+    # A small cutoff so the per-key candidate limits actually bite
+    matcher = IncrementalMatcher(matches_per_request=3, candidates_per_item=2)
+    requests, offerings = {}, {}
+    for step in range(300):
+        action = rng.random()
+        if action < 0.3:
+            request = _random_request(rng, 1000 + step)
+            requests[request.id] = request
+            matcher.add_request(request)
+        elif action < 0.75 or not offerings:
+            offering = _random_offering(rng, step)
+            offerings[offering.id] = offering
+            matcher.add_offering(offering)
+        elif action < 0.9:
+            matcher.remove_offering(offerings.pop(rng.choice(sorted(offerings))))
+        elif requests:
+            matcher.remove_request(requests.pop(rng.choice(sorted(requests))))
+
+    fresh = IncrementalMatcher(matches_per_request=3, candidates_per_item=2)
+    for offering in offerings.values():
+        fresh.add_offering(offering)
+    for request in requests.values():
+        fresh.add_request(request)
+
+    assert matcher._best == fresh._best
+    assert [(m['request'].id, m['offering'].id, m['confidence']) for m in matcher.current_matches(now=NOW)] == \
+           [(m['request'].id, m['offering'].id, m['confidence']) for m in fresh.current_matches(now=NOW)]
+
+
+def test_insertion_order_does_not_matter():
+    rng = random.Random(3)
+    offerings = [_random_offering(rng, i) for i in range(30)]
+    requests = [_random_request(rng, 100 + i) for i in range(10)]
+
+    before, after = IncrementalMatcher(candidates_per_item=2), IncrementalMatcher(candidates_per_item=2)
+    for request in requests:
+        before.add_request(request)
+    for offering in offerings:
+        before.add_offering(offering)
+        after.add_offering(offering)
+    for request in requests:
+        after.add_request(request)
+    assert before._best == after._best
+
+
+WORDS = ["warm", "wool", "fleece", "winter", "canned", "baby", "large", "thermal"]
+HEADS = [("blanket", "shelter"), ("jacket", "clothing"), ("socks", "clothing"), ("soup", "food"),
+         ("beans", "food"), ("tent", "shelter"), ("soap", "hygiene"), ("gloves", "clothing")]
+
+
+def _named_item(rng):
+    head, category = rng.choice(HEADS)
+    return Item(" ".join(rng.sample(WORDS, rng.randint(0, 2)) + [head]), rng.randint(1, 60), category=category)
+
+
+def test_candidates_find_the_brute_force_best_matches():
+    rng = random.Random(11)
+    offerings = [SimpleNamespace(id=i, items=[_named_item(rng) for _ in range(rng.randint(1, 3))]) for i in range(300)]
+    requests = [SimpleNamespace(id=1000 + i, items=[_named_item(rng) for _ in range(rng.randint(1, 3))],
+                                urgency="normal", created_at=NOW) for i in range(100)]
+    engine = MatchingEngine(candidates_per_item=5, min_confidence=0.0)
+    for offering in offerings:
+        engine.add_offering(offering)
+
+    for request in requests:
+        scores = sorted((engine.score(request, offering, now=NOW)[0] for offering in offerings), reverse=True)
+        found = [match['confidence'] for match in engine.match_request(request, NOW)]
+        # Same top scores as scoring every offering (ties may pick different offerings)
+        assert found[:3] == scores[:3]
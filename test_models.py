@@ -0,0 +1,57 @@
+import gc
+from models import Donor, Item, Needers, Offering, Request, RequestStatus
+from storage import CsvStore, get_store, set_store
+
+
+def test_dropped_requests_keep_their_rows():
+    needer = Needers("Sam", "Seattle")
+    ids = []
+    for i in range(5):
+        # Nothing else holds the request, so CPython may hand its address to the next one
+        ids.append(Request(needer, [Item("blankets", i + 1)]).id)
+        gc.collect()
+    assert len(set(ids)) == 5 and None not in ids
+    assert sorted(row['id'] for row in get_store().requests()) == sorted(ids)
+
+
+def test_later_saves_update_the_same_row():
+    request = Request(Needers("Sam", "Seattle"), [Item("blankets", 3)])
+    first_id = request.id
+    request.fulfill(Donor("Ana", "Seattle"))
+    assert request.id == first_id
+    rows = get_store().requests()
+    assert len(rows) == 1 and rows[0]['status'] == "fulfilled"
+
+
+def test_csv_store_assigns_ids_too(tmp_path):
+    set_store(CsvStore(str(tmp_path / "u.csv"), str(tmp_path / "r.csv"), str(tmp_path / "o.csv")))
+    needer = Needers("Sam", "Seattle")
+    ids = {Request(needer, [Item("soap", 1)]).id for _ in range(3)}
+    assert len(ids) == 3 and None not in ids
+
+
+def test_partly_allocated_request_can_be_fulfilled():
+    blankets = Item("blankets", 4)
+    request = Request(Needers("Sam", "Seattle"), [blankets])
+    request.record_allocation(blankets, 1)
+    assert request.status == RequestStatus.IN_PROGRESS
+    assert Donor("Ana", "Seattle").fulfill_request(request)
+    assert request.status == RequestStatus.FULFILLED
+
+
+def test_allocated_units_survive_a_save_and_reload():
+    blankets, soup = Item("blankets", 4, category="shelter"), Item("canned soup", 5, category="food")
+    request = Request(Needers("Sam", "Seattle"), [blankets, soup])
+    request.record_allocation(blankets, 3)
+    request.record_allocation(soup, 5)
+    offered = Item("wool blankets", 10, category="shelter")
+    offering = Offering(Donor("Ana", "Seattle"), [offered])
+    offering.record_allocation(offered, 3)
+
+    loaded = Item.load("request", request.id)
+    assert [(item.name, item.quantity, item.remaining) for item in loaded] == [("blankets", 4, 1), ("canned soup", 5, 0)]
+    assert [item.remaining for item in Item.load("offering", offering.id)] == [7]
+    # Reopening the store reads the same column back
+    reopened = type(get_store())(get_store().path, import_existing=False)
+    assert [row['allocated'] for row in reopened.line_items("request", request.id)] == [3, 5]
+    assert list(reopened.line_items_frame("request")['allocated']) == [3, 5]
@@ -0,0 +1,44 @@
+import random
+from datetime import datetime, timedelta
+from priority_queue import AGING_PER_DAY, PriorityQueue
+from storage import URGENCY_RANK
+
+NOW = datetime(2025, 10, 18)
+
+
+def _priority(urgency, created_at):
+    return URGENCY_RANK[urgency] + AGING_PER_DAY * (NOW - created_at).total_seconds() / 86400
+
+
+def test_top_k_matches_a_sort_through_pushes_and_removals():
+    rng = random.Random(12)
+    queue, live = PriorityQueue(), {}
+    for step in range(1000):
+        item_id = rng.randrange(150)
+        if rng.random() < 0.35:
+            queue.remove(item_id)
+            live.pop(item_id, None)
+        else:
+            urgency = rng.choice(list(URGENCY_RANK))
+            created_at = NOW - timedelta(minutes=rng.randrange(60 * 24 * 30))
+            categories = set(rng.sample(["food", "shelter", "clothing"], rng.randint(0, 2)))
+            queue.push(item_id, urgency, created_at, categories)
+            live[item_id] = (urgency, created_at, categories)
+        if step % 50 == 0:
+            for category in (None, "food", "shelter"):
+                ids = [i for i, (_, _, cats) in live.items() if category is None or category in cats]
+                expected = sorted(ids, key=lambda i: -_priority(*live[i][:2]))[:7]
+                assert queue.top_k(category, 7) == expected
+    assert len(queue) == len(live)
+    # Stale entries are compacted away rather than piling up
+    assert len(queue._heaps[None]) <= 2 * len(live) + 1
+
+
+def test_waiting_requests_overtake_fresher_urgent_ones():
+    queue = PriorityQueue()
+    queue.push("fresh high", "high", NOW)
+    queue.push("old normal", "normal", NOW - timedelta(days=5))
+    queue.push("new urgent", "urgent", NOW)
+    assert queue.top_k(k=3) == ["new urgent", "old normal", "fresh high"]
+    queue.push("new urgent", "low", NOW)
+    assert queue.top_k(k=1) == ["old normal"]
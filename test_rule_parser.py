@@ -0,0 +1,56 @@
+import json
+from llm_backends import StubBackend
+from models import TextParser
+from rule_parser import detect_urgency, parse_quantities, whole_units
+
+THRESHOLD = TextParser.RULE_CONFIDENCE_THRESHOLD
+
+
+def _items(text):
+    parsed, _ = parse_quantities(text)
+    return [(p.quantity, p.unit, p.item) for p in parsed]
+
+
+def test_quantities_units_and_items():
+    assert _items("I need 20 warm blankets and 50 cans of soup ASAP") == [(20, "", "warm blankets"), (50, "can", "soup")]
+    assert _items("a dozen eggs and some rice") == [(12, "", "eggs"), (3, "", "rice")]
+    assert detect_urgency("no rush, whenever") == "low"
+    assert detect_urgency("kids are freezing") == "high"
+
+
+def test_confident_rule_parses_skip_the_model():
+    backend = StubBackend(responses={'parse': json.dumps({'items': [{'name': "Groceries", 'quantity': 1}]})})
+    items, urgency = TextParser.parse_request("20 blankets and 5 cans of soup, urgent", backend=backend)
+    assert items.tier == "rules" and items.confidence >= THRESHOLD and urgency == "urgent"
+    assert [(item.name, item.quantity, item.unit) for item in items] == [("Blankets", 20, ""), ("Soup", 5, "can")]
+    assert backend.calls == 0
+
+    items, _ = TextParser.parse_request("we could really use groceries", backend=backend)
+    assert items.tier == "llm" and backend.calls == 1
+
+
+def test_partitive_of_is_not_an_item():
+    parsed, confidence = parse_quantities("The 5 of us need blankets")
+    assert parsed == [] and confidence < THRESHOLD
+    # With a unit, "of" still introduces the item
+    assert _items("2 boxes of diapers please") == [(2, "box", "diapers")]
+
+
+def test_item_stops_before_urgency_words():
+    parsed, confidence = parse_quantities("10 blankets not urgent but soon")
+    assert [p.item for p in parsed] == ["blankets"] and confidence == 1.0
+
+
+def test_unknown_words_around_an_item_lower_confidence():
+    parsed, confidence = parse_quantities("10 blankets whenever-ish")
+    assert [p.item for p in parsed] == ["blankets"] and confidence < THRESHOLD
+    _, confidence = parse_quantities("20 warm blankets and 5 cans of soup")
+    assert THRESHOLD <= confidence < 1.0
+
+
+def test_decimal_quantities():
+    assert _items("1.5 kg rice") == [(1.5, "kg", "rice")]
+    assert _items("2.0 bags of rice") == [(2, "bag", "rice")]
+    assert whole_units(1.5) == 2 and whole_units(3) == 3
+    items, _ = TextParser.parse_with_rules("1.5 kg rice")
+    assert [(item.name, item.quantity, item.unit) for item in items] == [("Rice", 2, "kg")]
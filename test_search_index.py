@@ -0,0 +1,70 @@
+import math
+import random
+from search_index import SearchIndex, analyze
+
+WORDS = ["blanket", "soup", "rice", "tent", "jacket", "sock", "soap", "diaper"]
+
+
+def _bm25(docs, query, k1=1.2, b=0.75):
+    """Reference BM25 over {doc_id: {field: text}}, name weighted double, scaled by terms matched"""
+    terms = {doc_id: {} for doc_id in docs}
+    for doc_id, fields in docs.items():
+        for field, text in fields.items():
+            for term in analyze(text):
+                terms[doc_id][term] = terms[doc_id].get(term, 0) + (2.0 if field == 'name' else 1.0)
+    lengths = {doc_id: sum(weights.values()) for doc_id, weights in terms.items()}
+    avg_len = sum(lengths.values()) / len(docs)
+    query_terms = analyze(query)
+    scores = {}
+    for doc_id, weights in terms.items():
+        matched = [term for term in query_terms if term in weights]
+        if not matched:
+            continue
+        total = 0.0
+        for term in matched:
+            n = sum(1 for other in terms.values() if term in other)
+            idf = math.log(1 + (len(docs) - n + 0.5) / (n + 0.5))
+            tf = weights[term]
+            total += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[doc_id] / avg_len))
+        scores[doc_id] = total * len(matched) / len(query_terms)
+    return scores
+
+
+def test_scores_match_reference_bm25_through_updates():
+    rng = random.Random(2)
+    index, docs = SearchIndex(), {}
+    for step in range(200):
+        doc_id = rng.randrange(60)
+        if rng.random() < 0.2:
+            index.remove(doc_id)
+            docs.pop(doc_id, None)
+        else:
+            docs[doc_id] = {'name': " ".join(rng.sample(WORDS, 2)), 'description': rng.choice(WORDS)}
+            index.add(doc_id, docs[doc_id])
+    for query in ["blanket", "soup rice", "tent sock diaper"]:
+        expected = _bm25(docs, query)
+        results = dict(index.search(query, limit=100))
+        assert set(results) == set(expected)
+        for doc_id, score in expected.items():
+            assert math.isclose(results[doc_id], score)
+
+
+def test_typos_and_prefixes_find_documents():
+    index = SearchIndex()
+    index.add(1, {'name': "Wool Blankets", 'category': "shelter"})
+    index.add(2, {'name': "Canned Soup", 'category': "food"})
+    assert [doc_id for doc_id, _ in index.search("blankts")] == [1]
+    assert [doc_id for doc_id, _ in index.search("sleeping blanket")] == [1]
+    assert [doc_id for doc_id, _ in index.search("can")] == [2]
+    index.remove(2)
+    assert index.search("soup") == [] and len(index) == 1
+
+
+def test_capped_postings_keep_the_best_documents():
+    rng = random.Random(8)
+    full, capped = SearchIndex(), SearchIndex(max_postings=20)
+    for doc_id in range(300):
+        fields = {'name': "blanket " + " ".join(rng.choices(WORDS, k=rng.randint(0, 6)))}
+        full.add(doc_id, fields)
+        capped.add(doc_id, fields)
+    assert capped.search("blanket", limit=10) == full.search("blanket", limit=10)
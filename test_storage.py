@@ -0,0 +1,116 @@
+import random
+from data_cache import DataCache
+from models import Item, Needers, Request
+from storage import (ACTIVE_STATUSES, URGENCY_RANK, CsvStore, SqliteStore, get_store, offering_sort_key,
+                     request_sort_key)
+
+
+def _requests_with_one_in_progress():
+    needer = Needers("Sam", "Seattle")
+    waiting = Request(needer, [Item("rice", 2)], "normal")
+    blankets = Item("blankets", 4)
+    partial = Request(needer, [blankets], "urgent")
+    partial.record_allocation(blankets, 1)
+    done = Request(needer, [Item("soap", 1)], "high")
+    done.fulfill(None)
+    return waiting, partial, done
+
+
+def _ids(rows):
+    return [int(row['id']) for row in rows]
+
+
+def test_in_progress_requests_stay_listed():
+    waiting, partial, _ = _requests_with_one_in_progress()
+    store = get_store()
+    assert _ids(store.page_requests().rows) == [partial.id, waiting.id]
+    assert store.count_requests(status=ACTIVE_STATUSES) == 2
+    assert store.count_requests(status='in_progress') == 1
+
+    cache = DataCache()
+    assert cache.page_requests().total == 2
+    assert list(cache.top_requests()['id']) == [partial.id, waiting.id]
+    assert list(cache.search_requests("blankets")['id']) == [partial.id]
+
+
+def test_csv_store_lists_in_progress_requests_too(tmp_path):
+    store = CsvStore(str(tmp_path / "u.csv"), str(tmp_path / "r.csv"), str(tmp_path / "o.csv"))
+    for request in _requests_with_one_in_progress():
+        store.save_request(request.to_dict())
+    assert len(store.page_requests().rows) == 2
+    assert store.count_requests(status=ACTIVE_STATUSES) == 2
+    assert len(store.requests(status=('in_progress', 'fulfilled'))) == 2
+
+
+def _request_row(urgency="normal", status="open", created_at="2025-10-01T09:00:00", items="Rice (2)"):
+    return {'id': None, 'requester_id': 1, 'requester_name': "Sam", 'items': items, 'urgency': urgency,
+            'status': status, 'created_at': created_at, 'fulfilled_by': ""}
+
+
+def test_sqlite_import_is_idempotent(tmp_path):
+    csv_store = CsvStore(str(tmp_path / "u.csv"), str(tmp_path / "r.csv"), str(tmp_path / "o.csv"))
+    csv_store.add_user({"Name": "Ballard Food Bank", "Address": "Seattle", "User Type": "Organization"})
+    ids = [csv_store.save_request(_request_row(items=f"Rice ({i + 1})")) for i in range(3)]
+    csv_store.update_request(ids[0], {'status': 'fulfilled'})
+
+    store = SqliteStore(str(tmp_path / "d.sqlite3"), import_existing=False)
+    files = (str(tmp_path / "u.csv"), str(tmp_path / "r.csv"), str(tmp_path / "o.csv"))
+    assert store.import_csv(*files) == {'users': 1, 'requests': 3, 'offerings': 0}
+    store.import_csv(*files)
+    assert [user["Name"] for user in store.users()] == ["Ballard Food Bank"]
+    assert sorted(_ids(store.requests())) == sorted(ids)
+    assert store.count_requests(status='fulfilled') == 1 and store.count_requests() == 3
+
+
+def test_sqlite_writes_from_another_connection_are_seen(tmp_path):
+    path = str(tmp_path / "d.sqlite3")
+    reader, writer = SqliteStore(path, import_existing=False), SqliteStore(path, import_existing=False)
+    before = reader.version('requests')
+    request_id = writer.save_request(_request_row())
+    assert reader.version('requests') != before
+    assert _ids(reader.requests()) == [request_id]
+    writer.update_request(request_id, {'status': 'cancelled'})
+    assert reader.count_requests(status=ACTIVE_STATUSES) == 0
+
+
+def _walk(page_fn, limit, between=None):
+    seen, cursor = [], None
+    while True:
+        page = page_fn(cursor=cursor, limit=limit)
+        seen += _ids(page.rows)
+        if page.next_cursor is None:
+            return seen
+        cursor = page.next_cursor
+        if between:
+            between()
+
+
+def test_keyset_pages_are_sorted_and_stable_across_inserts(tmp_path):
+    sqlite = get_store()
+    csv_store = CsvStore(str(tmp_path / "u.csv"), str(tmp_path / "r.csv"), str(tmp_path / "o.csv"))
+    rng = random.Random(6)
+    for store in (sqlite, csv_store):
+        def add_request():
+            store.save_request(_request_row(urgency=rng.choice(list(URGENCY_RANK)),
+                                            created_at=f"2025-10-{rng.randint(1, 9):02d}T09:00:00"))
+
+        def add_offering():
+            store.save_offering({'id': None, 'donor_name': "Ana", 'items': "Soap (1)", 'available': rng.random() < 0.8,
+                                 'created_at': f"2025-10-{rng.randint(1, 9):02d}T09:00:00"})
+
+        for _ in range(60):
+            add_request()
+            add_offering()
+        for row in store.requests()[:10]:
+            store.update_request(row['id'], {'status': 'fulfilled'})
+
+        expected = [int(row['id']) for row in sorted(store.requests(status=ACTIVE_STATUSES), key=request_sort_key)]
+        assert store.page_requests(limit=7).total == store.count_requests(status=ACTIVE_STATUSES) == 50
+        # Rows added while paging may or may not show up, but never shift or repeat the others
+        seen = _walk(store.page_requests, 7, between=add_request)
+        assert len(seen) == len(set(seen)) and [i for i in seen if i in expected] == expected
+
+        expected = [int(row['id']) for row in sorted(store.offerings(available=True), key=offering_sort_key, reverse=True)]
+        assert store.count_offerings(available=True) == len(expected)
+        seen = _walk(store.page_offerings, 6, between=add_offering)
+        assert len(seen) == len(set(seen)) and [i for i in seen if i in expected] == expected
@@ -0,0 +1,27 @@
+import json
+from llm_backends import StubBackend
+from models import ItemCategory, TextParser
+
+RESPONSE = json.dumps({
+    'items': [{'name': "Winter Jacket", 'quantity': 3, 'description': "Kids sizes", 'category': "clothing"},
+              {'name': "Mystery Box", 'quantity': 1, 'description': "", 'category': "not-a-category"}],
+    'urgency': "URGENT",
+})
+
+
+def test_items_categories_and_urgency_come_from_one_call():
+    backend = StubBackend(responses={'parse': "```json\n" + RESPONSE + "\n```"})
+    items, urgency = TextParser.parse_request("jackets for my kids", use_rules=False, backend=backend)
+    assert backend.calls == 1
+    assert [(item.name, item.quantity, item.category) for item in items] == \
+        [("Winter Jacket", 3, ItemCategory.CLOTHING), ("Mystery Box", 1, ItemCategory.OTHER)]
+    assert urgency == "urgent" and items.tier == "llm"
+
+
+def test_bare_item_lists_and_bad_output():
+    backend = StubBackend(responses={'parse': json.dumps([{'name': "Soap", 'quantity': 4, 'category': "hygiene"}])})
+    items, urgency = TextParser.parse_request("soap", use_rules=False, backend=backend)
+    assert [item.name for item in items] == ["Soap"] and urgency == "normal"
+
+    items, urgency = TextParser.parse_request("anything", use_rules=False, backend=StubBackend(responses={'parse': "sorry"}))
+    assert items.tier == "fallback" and items[0].category == ItemCategory.OTHER and urgency == "normal"
@@ -0,0 +1,42 @@
+import re
+from typing import List
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into alphanumeric tokens"""
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def singularize(word: str) -> str:
+    """Cheap English plural stripping, good enough for item nouns"""
+    if len(word) <= 3 or word.endswith("ss"):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "xes", "sses", "zzes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Tokenize and singularize text"""
+    return [singularize(token) for token in tokenize(text)]
+
+
+def stem(word: str) -> str:
+    """singularize plus -ing/-ed stripping ("bedding" -> "bed", "canned" -> "can")"""
+    word = singularize(word)
+    if word.endswith("ied") and len(word) > 5:
+        return word[:-3] + "y"
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            base = word[:-len(suffix)]
+            # Undo consonant doubling, but keep "ll", "ss" and "zz" (e.g. "filled" -> "fill")
+            if base[-1] == base[-2] and base[-1] not in "lsz":
+                base = base[:-1]
+            return base
+    return word
@@ -5,6 +5,8 @@ import streamlit.components.v1 as components
 import folium
 from geopy.geocoders import Nominatim
 import numpy as np
+from storage import get_store
+from data_cache import get_data_cache
 
 # File to store users
 USERS_FILE = "user_information.csv"
@@ -18,23 +20,14 @@ def profile(USERS_FILE):
     if "auth_mode" not in st.session_state:
         st.session_state.auth_mode = "login"
 
-    # Load users from CSV file
+    # Load users from the store (SQLite by default, see storage.py)
     def load_users():
-        if os.path.exists(USERS_FILE):
-            df = pd.read_csv(USERS_FILE, sep="|")
-            return df
-        else:
-            return pd.DataFrame(columns=["Name", "Password", "Description", "Address", "Link", "Phone Number", "Categories", "User Type"])
-
-    # Save users to CSV file
-    def save_users(df):
-        df.to_csv(USERS_FILE, sep="|", index=False)
+        return get_data_cache().users()
 
     # Login function
     def login(user, password):
-        df = load_users()
-        user_row = df[df["Name"] == user]
-        if not user_row.empty and user_row.iloc[0]["Password"] == password:
+        user_row = get_data_cache().user(user)
+        if user_row is not None and user_row["Password"] == password:
             st.session_state.logged_in = True
             st.session_state.current_user = user
             st.session_state.auth_mode = "login"
@@ -45,27 +38,25 @@ def profile(USERS_FILE):
 
     # Signup function
     def signup(name, password, description, address, link, phone, categories, user_type):
-        df = load_users()
         if not name or not password:
             st.error("Name and password are required")
             return
-        if name in df["Name"].values:
-            st.error("Username already exists")
-            return
         
-        new_user = pd.DataFrame({
-            "Name": [name],
-            "Password": [password],
-            "Description": [description],
-            "Address": [address],
-            "Link": [link],
-            "Phone Number": [phone],
-            "Categories": [categories],
-            "User Type": [user_type]
-        })
+        new_user = {
+            "Name": name,
+            "Password": password,
+            "Description": description,
+            "Address": address,
+            "Link": link,
+            "Phone Number": phone,
+            "Categories": categories,
+            "User Type": user_type
+        }
         
-        df = pd.concat([df, new_user], ignore_index=True)
-        save_users(df)
+        # Inserts one row; fails if the name is already taken
+        if not get_store().add_user(new_user):
+            st.error("Username already exists")
+            return
         st.success("Account created successfully! Please log in.")
         st.session_state.auth_mode = "login"
         st.rerun()
@@ -73,24 +64,18 @@ def profile(USERS_FILE):
     # --- PROFILE PAGE ---
     if st.session_state.logged_in:
         # Load user data
-        if not os.path.exists(USERS_FILE):
-            st.error("User information file not found.")
-            st.stop()
+        username = st.session_state.current_user
 
         try:
-            df = pd.read_csv(USERS_FILE, sep="|")
+            user_info = get_data_cache().user(username)
         except Exception as e:
             st.error(f"Error loading user data: {e}")
             st.stop()
 
-        username = st.session_state.current_user
-
-        if username not in df["Name"].values:
+        if user_info is None:
             st.error("User not found in records.")
             st.stop()
 
-        user_info = df[df["Name"] == username].iloc[0]
-
         # --- Display profile info ---
         st.title("👤 Profile")
         st.markdown("---")